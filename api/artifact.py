@@ -0,0 +1,221 @@
+"""
+💾 GetAround - Artefact de modèle mappé en mémoire
+Exporte le model_package (model.pkl) en un seul fichier binaire dont les
+tableaux de la forêt sont lus par np.memmap : démarrage quasi instantané et
+pages partagées entre les workers uvicorn via le cache de pages de l'OS
+
+Usage :
+    python artifact.py model.pkl model.forest
+    python artifact.py model.pkl model-float32.forest --tier float32
+"""
+
+import argparse
+import hashlib
+import json
+import time
+
+import joblib
+import numpy as np
+
+from compact import MERGE_TOLERANCE, TIERS, merge_leaves, narrow
+from folding import scaler_affine
+from forest import CompiledForest, compile_model
+
+MAGIC = b'GAFOREST'
+FORMAT_VERSION = 2
+# Versions lisibles (1 : `left` et `right` toujours stockés)
+SUPPORTED_VERSIONS = (1, 2)
+# Alignement des tableaux dans le fichier (lignes de cache / pages)
+ALIGNMENT = 64
+
+# Tableaux de la forêt stockés dans l'artefact
+FOREST_ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'children')
+
+
+class AffineScaler:
+    """Scaler `(x - center) / scale` reconstruit depuis l'artefact (remplace le RobustScaler)"""
+
+    def __init__(self, center, scale):
+        self.center = center
+        self.scale = scale
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.center) / self.scale
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def export_artifact(model_package, path, model_version=None, tier='full', merge_tolerance=MERGE_TOLERANCE):
+    """
+    Écrit l'artefact : en-tête JSON puis tableaux alignés
+
+    Seuls les seuils sont stockés deux fois : `threshold` (features
+    normalisées) et `raw_threshold` (scaler replié). `cover` (poids des
+    nœuds) sert aux attributions de /explain. `tier` choisit le niveau de
+    compression (voir compact.TIERS) ; hors `full`, `left` et `right` ne
+    sont pas stockés (vues de `children` au chargement). Lève TypeError si
+    le modèle n'est pas compilable ou si le scaler n'est pas affine.
+    """
+    if tier not in TIERS:
+        raise ValueError(f"Niveau de compression inconnu : {tier} ({', '.join(TIERS)})")
+    model = model_package['model']
+    feature_names = list(model_package['feature_names'])
+
+    compiled = compile_model(model)
+    if compiled is None:
+        raise TypeError(f"Modèle non exportable : {type(model).__name__}")
+    if tier == 'merged':
+        compiled = merge_leaves(compiled, merge_tolerance)
+    if model_version and tier != 'full':
+        # Prédictions (légèrement) différentes : version distincte dans le registre et le cache
+        model_version = f"{model_version}-{tier}" + (f"{merge_tolerance:g}" if tier == 'merged' else '')
+    center, scale = scaler_affine(model_package['scaler'], len(feature_names))
+    folded = compiled.fold_scaler(center, scale)
+    if tier != 'full':
+        # Seuils repliés arrondis séparément (avant la conversion en float32)
+        compiled, folded = (narrow(forest, float32=tier != 'compact') for forest in (compiled, folded))
+
+    arrays = {name: getattr(compiled, name) for name in FOREST_ARRAYS if tier == 'full' or name not in ('left', 'right')}
+    arrays['raw_threshold'] = folded.threshold
+    arrays['cover'] = compiled.cover
+    arrays['scaler_center'] = center
+    arrays['scaler_scale'] = scale
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        layout[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset = _aligned(offset + array.nbytes)
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "model_name": model_package.get('model_name', 'Unknown'),
+        "model_type": type(model).__name__,
+        "model_version": model_version,
+        "feature_names": feature_names,
+        "metrics": model_package.get('metrics', {}),
+        "compression": {"tier": tier, "merge_tolerance": merge_tolerance if tier == 'merged' else None},
+        "forest": {
+            "max_depth": compiled.max_depth,
+            "n_features": compiled.n_features,
+            "base": compiled.base,
+            "scale": compiled.scale,
+            "average": compiled.average,
+        },
+        "arrays": layout,
+    }
+    header_bytes = json.dumps(header, default=float, ensure_ascii=False).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + 8 + len(header_bytes))
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.write(b'\0' * (data_start + layout[name]['offset'] - f.tell()))
+            f.write(array.tobytes())
+
+
+class ModelArtifact:
+    """
+    Artefact ouvert en lecture seule
+
+    Les tableaux sont des vues d'un unique np.memmap : rien n'est copié au
+    chargement, les pages sont lues à la demande et partagées entre processus.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} n'est pas un artefact de modèle")
+        header_size = int(buffer[len(MAGIC):len(MAGIC) + 8].view('<u8')[0])
+        header_end = len(MAGIC) + 8 + header_size
+        self.header = json.loads(bytes(buffer[len(MAGIC) + 8:header_end]).decode('utf-8'))
+        if self.header['format_version'] not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Version d'artefact non supportée : {self.header['format_version']}")
+
+        data_start = _aligned(header_end)
+        self.arrays = {}
+        for name, spec in self.header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            start = data_start + spec['offset']
+            count = int(np.prod(spec['shape']))
+            self.arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+
+    @property
+    def feature_names(self):
+        return self.header['feature_names']
+
+    @property
+    def model_version(self):
+        return self.header.get('model_version')
+
+    def model_package(self):
+        """Métadonnées au format du model_package (sans le modèle ni le scaler)"""
+        return {
+            "model_name": self.header['model_name'],
+            "feature_names": self.feature_names,
+            "metrics": self.header['metrics'],
+            "compression": self.header.get('compression', {"tier": "full"}),
+        }
+
+    def scaler(self):
+        return AffineScaler(self.arrays['scaler_center'], self.arrays['scaler_scale'])
+
+    def compiled_forest(self, folded=False):
+        """Forêt sur les features normalisées, ou sur les features brutes si `folded`"""
+        params = self.header['forest']
+        arrays = {name: self.arrays[name] for name in FOREST_ARRAYS if name in self.arrays}
+        if 'left' not in arrays:
+            # Artefact compact : children entrelace (droite, gauche)
+            arrays['left'] = arrays['children'][1::2]
+            arrays['right'] = arrays['children'][0::2]
+        if folded:
+            arrays['threshold'] = self.arrays['raw_threshold']
+        return CompiledForest(
+            **arrays,
+            max_depth=params['max_depth'],
+            n_features=params['n_features'],
+            base=params['base'],
+            scale=params['scale'],
+            average=params['average'],
+            input_dtype=np.float64 if folded else np.float32,
+            # Absent des artefacts exportés avant /explain
+            cover=self.arrays.get('cover'),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporte model.pkl en artefact mappable en mémoire")
+    parser.add_argument('source', nargs='?', default='model.pkl', help="model_package joblib")
+    parser.add_argument('target', nargs='?', default='model.forest', help="artefact à écrire")
+    parser.add_argument('--tier', choices=TIERS, default='full', help="niveau de compression")
+    parser.add_argument('--tolerance', type=float, default=MERGE_TOLERANCE,
+                        help="écart maximal (€) par arbre pour la fusion des feuilles (--tier merged)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with open(args.source, 'rb') as f:
+        model_version = hashlib.sha256(f.read()).hexdigest()[:12]
+    model_package = joblib.load(args.source)
+    export_artifact(model_package, args.target, model_version, args.tier, args.tolerance)
+
+    artifact = ModelArtifact(args.target)
+    size = sum(a.nbytes for a in artifact.arrays.values())
+    print(f"✅ Artefact écrit : {args.target}")
+    print(f"   - Version : {artifact.model_version} (compression : {args.tier})")
+    print(f"   - Nœuds : {len(artifact.arrays['feature'])}, tableaux : {size / 1e6:.1f} Mo")
+    print(f"   - Durée : {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
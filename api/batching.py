@@ -0,0 +1,157 @@
+"""
+📦 GetAround - Micro-batching des prédictions
+Regroupe les requêtes /predict concurrentes arrivées dans une courte fenêtre
+en une seule matrice, exécute un seul predict, puis redistribue les résultats
+"""
+
+import asyncio
+import time
+
+import numpy as np
+
+
+class BatchStats:
+    """Statistiques du micro-batcher (profondeur de file, taille des lots, attente)"""
+
+    def __init__(self, max_batch_size):
+        # Buckets puissances de 2 : 1, 2, 4, ... jusqu'à max_batch_size
+        self.buckets = [1]
+        while self.buckets[-1] < max_batch_size:
+            self.buckets.append(self.buckets[-1] * 2)
+        self.batch_size_counts = [0] * (len(self.buckets) + 1)
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self.wait_time_sum = 0.0
+        self.wait_time_max = 0.0
+
+    def record_batch(self, n_requests, n_rows, wait_times):
+        self.batches += 1
+        self.requests += n_requests
+        self.rows += n_rows
+        index = next((i for i, b in enumerate(self.buckets) if n_rows <= b), len(self.buckets))
+        self.batch_size_counts[index] += 1
+        self.wait_time_sum += sum(wait_times)
+        self.wait_time_max = max(self.wait_time_max, max(wait_times))
+
+    def to_dict(self, queue_depth):
+        labels = [str(b) for b in self.buckets] + ["+Inf"]
+        return {
+            "queue_depth": queue_depth,
+            "batches": self.batches,
+            "requests": self.requests,
+            "rows": self.rows,
+            "avg_batch_rows": self.rows / self.batches if self.batches else 0.0,
+            "avg_requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+            "batch_size_histogram": dict(zip(labels, self.batch_size_counts)),
+            "avg_wait_ms": 1000 * self.wait_time_sum / self.requests if self.requests else 0.0,
+            "max_wait_ms": 1000 * self.wait_time_max,
+        }
+
+
+class MicroBatcher:
+    """
+    Planificateur de micro-lots asyncio
+
+    Chaque appel à `submit` dépose une matrice (n, n_features) dans la file.
+    Une tâche de fond prend la première requête, attend au plus `max_wait`
+    secondes (ou jusqu'à `max_batch_size` lignes) que d'autres arrivent,
+    concatène le tout, attend la coroutine `predict_fn` une seule fois par
+    jeu d'arguments (ex. version du modèle) et renvoie à chaque appelant la
+    tranche de résultats qui lui correspond.
+    Les lots sont exécutés en tâches séparées : le lot suivant peut être
+    constitué pendant que le précédent tourne dans le pool d'inférence.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=256, max_wait=0.002):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.stats = BatchStats(max_batch_size)
+        self._queue = None
+        self._worker = None
+        self._running = set()
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_worker(self):
+        """Démarre la tâche de fond dans la boucle courante (au premier appel)"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, X, *args):
+        """
+        Ajoute X à la file et attend ses prédictions
+
+        Les arguments supplémentaires sont passés à `predict_fn` : seules les
+        requêtes ayant les mêmes arguments (ex. la version du modèle) sont
+        prédites ensemble.
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((X, args, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        """Attend une première requête puis regroupe celles qui suivent"""
+        batch = [await self._queue.get()]
+        n_rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while n_rows < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+
+        # Vider sans attendre ce qui est déjà arrivé, dans la limite de taille
+        while n_rows < self.max_batch_size and not self._queue.empty():
+            item = self._queue.get_nowait()
+            batch.append(item)
+            n_rows += len(item[0])
+
+        return batch, n_rows
+
+    async def _run(self):
+        while True:
+            batch, n_rows = await self._collect()
+            started = time.perf_counter()
+            self.stats.record_batch(len(batch), n_rows, [started - t for _, _, _, t in batch])
+            task = asyncio.get_running_loop().create_task(self._execute(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, batch):
+        """Exécute un lot, un appel à `predict_fn` par jeu d'arguments"""
+        groups = {}
+        for item in batch:
+            groups.setdefault(item[1], []).append(item)
+        await asyncio.gather(*(self._execute_group(args, items) for args, items in groups.items()))
+
+    async def _execute_group(self, args, items):
+        """Prédit un groupe et distribue résultats ou erreur aux appelants"""
+        try:
+            X = np.concatenate([x for x, _, _, _ in items]) if len(items) > 1 else items[0][0]
+            predictions = await self.predict_fn(X, *args)
+        except Exception as e:
+            for _, _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for x, _, future, _ in items:
+            if not future.done():
+                future.set_result(predictions[offset:offset + len(x)])
+            offset += len(x)
+
+    def get_stats(self):
+        return self.stats.to_dict(self.queue_depth)
@@ -0,0 +1,114 @@
+"""
+🗜️ GetAround - Benchmark des niveaux de compression de l'artefact
+Exporte model.pkl à chaque niveau (full, compact, float32, merged) et compare
+taille du fichier, durée de chargement, latence de prédiction et précision
+sur le jeu de test du notebook, par rapport à model_package['metrics'].
+
+Usage :
+    python bench_compact.py model.pkl --tolerance 5 --json compact.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+import train
+from artifact import export_artifact
+from compact import MERGE_TOLERANCE, TIERS
+from registry import load_served_model
+
+# Répétitions des mesures de latence (médiane) par taille de lot
+LATENCY_REPEATS = {1: 200, 1000: 20}
+
+
+def median_latency(predict, X, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings))
+
+
+def measure(name, path, X_test, y_test, reference):
+    """Taille, chargement, latences et métriques d'une variante"""
+    started = time.perf_counter()
+    served = load_served_model(path)
+    served.warm_up()
+    load_s = time.perf_counter() - started
+
+    predict = served.folded_model.predict if served.folded_model is not None else (
+        lambda X: served.model.predict(served.scaler.transform(X))
+    )
+    predictions = predict(X_test)
+    metrics = train.evaluate(type('Model', (), {'predict': staticmethod(predict)}), X_test, y_test)
+    result = {
+        "variant": name,
+        "size_mb": os.path.getsize(path) / 1e6,
+        "load_ms": load_s * 1e3,
+        "nodes": served.compiled_model.n_nodes if served.compiled_model is not None else None,
+        "max_abs_diff": float(np.abs(predictions - reference).max()),
+        "metrics": metrics,
+    }
+    for size, repeats in LATENCY_REPEATS.items():
+        result[f"latency_{size}_ms"] = median_latency(predict, X_test[np.arange(size) % len(X_test)], repeats) * 1e3
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Taille, chargement, latence et précision par niveau de compression")
+    parser.add_argument('source', nargs='?', default='model.pkl', help="model_package joblib")
+    parser.add_argument('--data', default=train.DATA_PATH, help="CSV du notebook (jeu de test)")
+    parser.add_argument('--tiers', default=','.join(TIERS), help="niveaux à comparer")
+    parser.add_argument('--tolerance', type=float, default=MERGE_TOLERANCE, help="tolérance de fusion (--tier merged)")
+    parser.add_argument('--json', dest='json_path', help="écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    model_package = joblib.load(args.source)
+    with contextlib.redirect_stdout(sys.stderr):
+        X, y, feature_names, _, _ = train.load_features(args.data, cache_dir='')
+    if feature_names != list(model_package['feature_names']):
+        print(f"❌ {args.data} ne correspond pas aux features du modèle")
+        sys.exit(1)
+    # Même découpage que l'entraînement : métriques comparables à model_package['metrics']
+    _, X_test, _, y_test = train_test_split(X, y, test_size=train.TEST_SIZE, random_state=train.RANDOM_STATE)
+    reference = model_package['model'].predict(model_package['scaler'].transform(X_test))
+
+    with contextlib.redirect_stdout(sys.stderr):
+        results = [measure('pickle', args.source, X_test, y_test, reference)]
+    with tempfile.TemporaryDirectory() as directory:
+        for tier in args.tiers.split(','):
+            path = os.path.join(directory, f"model-{tier}.forest")
+            export_artifact(model_package, path, 'bench', tier, args.tolerance)
+            with contextlib.redirect_stdout(sys.stderr):
+                results.append(measure(tier, path, X_test, y_test, reference))
+
+    stored = model_package.get('metrics', {})
+    print(f"\nMétriques de model_package : R² = {stored.get('r2_test', float('nan')):.4f}, "
+          f"RMSE = {stored.get('rmse_test', float('nan')):.4f}")
+    print(f"\n{'Variante':<9} {'Taille (Mo)':>11} {'Nœuds':>8} {'Chargement (ms)':>16} {'1 ligne (ms)':>13} "
+          f"{'1000 lignes (ms)':>17} {'Δ max (€)':>10} {'Δ R²':>9} {'Δ RMSE':>8}")
+    for r in results:
+        m = r['metrics']
+        print(
+            f"{r['variant']:<9} {r['size_mb']:>11.2f} {r['nodes'] or 0:>8} {r['load_ms']:>16.1f} "
+            f"{r['latency_1_ms']:>13.3f} {r['latency_1000_ms']:>17.2f} {r['max_abs_diff']:>10.4f} "
+            f"{m['r2_test'] - stored.get('r2_test', np.nan):>+9.5f} {m['rmse_test'] - stored.get('rmse_test', np.nan):>+8.4f}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({"stored_metrics": stored, "tolerance": args.tolerance, "results": results}, f, indent=2, default=float)
+        print(f"\n💾 Résultats écrits dans {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
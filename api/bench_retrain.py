@@ -0,0 +1,117 @@
+"""
+⏱️ GetAround - Benchmark du réentraînement incrémental
+Compare, pour des datasets de 1x, 10x et 100x la taille actuelle, la durée
+d'un réentraînement complet (CSV fusionné, sans GridSearchCV) et celle du
+mode incrémental (cache des features + arbres ajoutés par warm_start) quand
+10 % de nouvelles lignes arrivent.
+
+Les datasets agrandis sont des tirages avec remise des lignes du CSV, avec
+un kilométrage et un prix légèrement bruités (pas de doublons supprimés).
+
+Usage :
+    python bench_retrain.py --scales 1,10,100 --json retrain.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import train
+
+# Part de nouvelles lignes ajoutées au dataset à chaque réentraînement
+NEW_ROWS_FRACTION = 0.1
+
+# Modèle servi par l'API (les autres ne grandissent pas par warm_start)
+MODEL_NAME = 'Random Forest'
+
+
+def make_dataset(df, n_rows, seed):
+    """Tirage avec remise de `n_rows` lignes de df, bruitées pour rester distinctes"""
+    rng = np.random.default_rng(seed)
+    sample = df.iloc[rng.integers(0, len(df), n_rows)].reset_index(drop=True)
+    sample['Unnamed: 0'] = np.arange(n_rows)
+    sample['mileage'] = np.maximum(0, sample['mileage'] + rng.integers(-2000, 2001, n_rows))
+    sample[train.TARGET] = np.maximum(10, sample[train.TARGET] + rng.integers(-3, 4, n_rows))
+    return sample
+
+
+def timed(function, *args, **kwargs):
+    """Durée et résultat d'un appel (sorties de train.py masquées)"""
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        result = function(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def run(df, scale, directory, n_jobs):
+    n_old = len(df) * scale
+    n_new = int(n_old * NEW_ROWS_FRACTION)
+    dataset = make_dataset(df, n_old + n_new, seed=scale)
+    paths = {name: os.path.join(directory, f"{name}-{scale}x.csv") for name in ('old', 'new', 'all')}
+    dataset[:n_old].to_csv(paths['old'], index=False)
+    dataset[n_old:].to_csv(paths['new'], index=False)
+    dataset.to_csv(paths['all'], index=False)
+    cache_dir = os.path.join(directory, 'cache')
+
+    # Modèle en production avant l'arrivée des nouvelles lignes (non chronométré)
+    base_path = os.path.join(directory, f"base-{scale}x.pkl")
+    _, base = timed(train.train, paths['old'], cache_dir, n_jobs, False, MODEL_NAME)
+    with contextlib.redirect_stdout(sys.stderr):
+        train.save_package(base, base_path)
+
+    # Réentraînement complet : relecture et encodage du CSV fusionné, nouveau scaler, 100 arbres
+    full_s, full = timed(train.train, paths['all'], '', n_jobs, False, MODEL_NAME)
+    incremental_s, grown = timed(train.incremental, base_path, paths['new'], cache_dir, n_jobs)
+    return {
+        "scale": scale,
+        "rows": n_old + n_new,
+        "full_s": full_s,
+        "incremental_s": incremental_s,
+        "speedup": full_s / incremental_s,
+        "added_trees": grown['training']['added_trees'],
+        "drift": grown['training']['drift'],
+        "r2_full": full['metrics']['r2_test'],
+        "r2_incremental": grown['metrics']['r2_test'],
+        "full_timings": full['training']['timings'],
+        "incremental_timings": grown['training']['timings'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réentraînement complet vs incrémental")
+    parser.add_argument('--data', default=train.DATA_PATH, help="CSV de référence (taille 1x)")
+    parser.add_argument('--scales', default='1,10,100', help="tailles du dataset, en multiples du CSV")
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--json', dest='json_path', help="écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in (int(s) for s in args.scales.split(',')):
+            print(f"⏳ {scale}x ({len(df) * scale:,} lignes + {NEW_ROWS_FRACTION:.0%})...", flush=True)
+            results.append(run(df, scale, directory, args.n_jobs))
+
+    print(f"\n{'Taille':<7} {'Lignes':>10} {'Complet (s)':>12} {'Incrément (s)':>14} {'Gain':>6} "
+          f"{'Arbres +':>9} {'R² complet':>11} {'R² incr.':>9}")
+    for r in results:
+        print(
+            f"{r['scale']:>5}x {r['rows']:>10,} {r['full_s']:>12.2f} {r['incremental_s']:>14.2f} "
+            f"{r['speedup']:>5.1f}x {r['added_trees']:>9} {r['r2_full']:>11.4f} {r['r2_incremental']:>9.4f}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
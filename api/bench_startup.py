@@ -0,0 +1,123 @@
+"""
+⏱️ GetAround - Benchmark du démarrage des workers
+Compare le chargement pickle (joblib) et l'artefact mappé en mémoire :
+durée de démarrage d'un worker (import de main.py) et mémoire par worker
+(RSS, et PSS qui répartit les pages partagées entre les processus)
+
+Usage :
+    python artifact.py model.pkl model.forest
+    python bench_startup.py --workers 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Code exécuté dans chaque worker : démarrer l'API, prédire, puis attendre
+# que tous les workers aient démarré avant de mesurer la mémoire
+WORKER_CODE = r"""
+import contextlib, json, sys, time
+started = time.perf_counter()
+with contextlib.redirect_stdout(sys.stderr):
+    import main
+startup = time.perf_counter() - started
+
+import numpy as np
+X = np.zeros((1000, len(main.registry.current().feature_names)))
+X[:, 1] = np.linspace(0, 300000, 1000)
+main.run_model(X)
+
+def memory_kb():
+    fields = {}
+    for name in ('/proc/self/status', '/proc/self/smaps_rollup'):
+        try:
+            with open(name) as f:
+                for line in f:
+                    key, _, value = line.partition(':')
+                    if key in ('VmRSS', 'Pss', 'Shared_Clean'):
+                        fields[key] = int(value.split()[0])
+        except OSError:
+            pass
+    return fields
+
+print(json.dumps({"format": main.MODEL_FORMAT, "loaded": main.model_loaded, "startup_s": startup}), flush=True)
+sys.stdin.readline()
+print(json.dumps(memory_kb()), flush=True)
+sys.stdin.readline()
+"""
+
+
+def run(model_format, n_workers):
+    """Démarre n_workers processus avec le format demandé, retourne leurs mesures"""
+    env = dict(os.environ, MODEL_FORMAT=model_format, BATCHING_ENABLED='false', INFERENCE_POOL='none')
+    workers = [
+        subprocess.Popen(
+            [sys.executable, '-c', WORKER_CODE],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, env=env,
+        )
+        for _ in range(n_workers)
+    ]
+    try:
+        results = [json.loads(w.stdout.readline()) for w in workers]
+        # Tous les workers sont vivants : la PSS reflète le partage des pages
+        for w in workers:
+            w.stdin.write('\n')
+            w.stdin.flush()
+        for result, w in zip(results, workers):
+            result.update(json.loads(w.stdout.readline()))
+            w.stdin.write('\n')
+            w.stdin.flush()
+    finally:
+        for w in workers:
+            if w.poll() is None:
+                w.stdin.close()
+            w.wait(timeout=30)
+    return results
+
+
+def summarize(model_format, results):
+    def mean(key, unit=1):
+        values = [r[key] / unit for r in results if key in r]
+        return sum(values) / len(values) if values else None
+
+    return {
+        "format": model_format,
+        "workers": len(results),
+        "loaded": all(r['loaded'] for r in results),
+        "startup_s": mean('startup_s'),
+        "rss_mb": mean('VmRSS', 1024),
+        "pss_mb": mean('Pss', 1024),
+        "shared_mb": mean('Shared_Clean', 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Démarrage et mémoire des workers : pickle vs artefact")
+    parser.add_argument('--workers', type=int, default=4, help="nombre de workers simultanés")
+    parser.add_argument('--json', dest='json_path', help="écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists('model.forest'):
+        print("❌ model.forest introuvable : lancez d'abord `python artifact.py model.pkl model.forest`")
+        sys.exit(1)
+
+    summaries = [summarize(fmt, run(fmt, args.workers)) for fmt in ('pickle', 'mmap')]
+
+    print(f"\n{'Format':<8} {'Workers':>7} {'Démarrage (s)':>14} {'RSS (Mo)':>9} {'PSS (Mo)':>9} {'Partagé (Mo)':>13}")
+    for s in summaries:
+        print(
+            f"{s['format']:<8} {s['workers']:>7} {s['startup_s']:>14.3f} "
+            f"{s['rss_mb'] or 0:>9.1f} {s['pss_mb'] or 0:>9.1f} {s['shared_mb'] or 0:>13.1f}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(summaries, f, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
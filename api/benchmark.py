@@ -0,0 +1,342 @@
+"""
+🏁 GetAround - Benchmark de charge de l'API
+Envoie des requêtes /predict concurrentes (dans le processus via ASGI, ou vers
+un uvicorn local), mesure débit, latences p50/p95/p99 et mémoire, puis
+chronomètre séparément chaque étape de /predict. Les résultats sont écrits en
+JSON pour comparer deux commits.
+
+Usage :
+    python benchmark.py                                   # application dans le processus
+    python benchmark.py --url http://localhost:8000       # serveur déjà lancé
+    python benchmark.py --concurrency 1,8,32 --mix 1:0.7,10:0.2,100:0.1 --json bench.json
+    python benchmark.py --json new.json --compare old.json
+
+Les variables d'environnement de l'API (CACHE_ENABLED, BATCHING_ENABLED,
+INFERENCE_POOL...) s'appliquent en mode dans le processus.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import time
+import warnings
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+# Latences rapportées (percentiles)
+PERCENTILES = (50, 95, 99)
+
+# Variables d'environnement de l'API recopiées dans les résultats
+BENCH_ENV_VARS = (
+    'MODEL_FORMAT', 'INFERENCE_ENGINE', 'COMPILED_MAX_ROWS', 'FOLD_SCALER', 'INFERENCE_POOL',
+    'INFERENCE_WORKERS', 'BATCHING_ENABLED', 'BATCH_WINDOW_MS', 'BATCH_MAX_SIZE', 'CACHE_ENABLED',
+    'CACHE_MAX_ROWS', 'INPUT_VALIDATION', 'STRICT_INPUT',
+)
+
+
+# ===== DONNÉES =====
+
+class RowGenerator:
+    """
+    Génère des véhicules réalistes à partir de la description de /features
+
+    - kilométrage log-normal, puissance entre 70 et 300 ch
+    - équipements booléens tirés indépendamment
+    - une seule catégorie par champ catégoriel (ou la catégorie de référence)
+    """
+
+    def __init__(self, features, seed=0):
+        self.feature_names = features['features']
+        self.named = features['named_input']
+        self.rng = np.random.default_rng(seed)
+        self.column = {name: i for i, name in enumerate(self.feature_names)}
+
+    def rows(self, n):
+        X = np.zeros((n, len(self.feature_names)))
+        for name in self.named['numeric']:
+            column = self.column[name]
+            if name == 'mileage':
+                X[:, column] = np.round(self.rng.lognormal(11.5, 0.6, n))
+            elif name == 'engine_power':
+                X[:, column] = self.rng.integers(70, 300, n)
+            elif name == 'Unnamed: 0':
+                X[:, column] = self.rng.integers(0, 5000, n)
+            else:
+                X[:, column] = self.rng.random(n) < 0.5
+
+        for field, categories in self.named['categorical'].items():
+            # Indice -1 : catégorie de référence (aucune colonne active)
+            choice = self.rng.integers(-1, len(categories), n)
+            for row, index in enumerate(choice):
+                if index >= 0:
+                    X[row, self.column[f"{field}_{categories[index]}"]] = 1.0
+        return X
+
+
+def parse_mix(text):
+    """Parse "1:0.7,10:0.2,100:0.1" en (tailles, probabilités)"""
+    sizes, weights = [], []
+    for item in text.split(','):
+        size, _, weight = item.partition(':')
+        sizes.append(int(size))
+        weights.append(float(weight or 1))
+    weights = np.array(weights) / sum(weights)
+    return sizes, weights
+
+
+# ===== MESURES =====
+
+def memory_mb():
+    """RSS courante et pic de RSS de ce processus (Mo), qui héberge l'API en mode dans le processus"""
+    current = None
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    current = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"rss_mb": current, "peak_rss_mb": peak}
+
+
+async def server_memory_mb(client):
+    """RSS du serveur distant, lue dans /metrics (process_resident_memory_bytes)"""
+    response = await client.get('/metrics')
+    for line in response.text.splitlines():
+        if line.startswith('process_resident_memory_bytes '):
+            return {"rss_mb": float(line.split()[1]) / 1024 ** 2, "peak_rss_mb": None}
+    return {"rss_mb": None, "peak_rss_mb": None}
+
+
+def latency_summary(latencies):
+    latencies = np.asarray(latencies) * 1000
+    if len(latencies) == 0:
+        return {}
+    summary = {f"p{p}_ms": float(np.percentile(latencies, p)) for p in PERCENTILES}
+    summary["mean_ms"] = float(latencies.mean())
+    summary["max_ms"] = float(latencies.max())
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ===== CHARGE =====
+
+async def run_load(client, generator, concurrency, n_requests, sizes, weights):
+    """Boucle fermée : `concurrency` clients envoient n_requests requêtes au total"""
+    plan = generator.rng.choice(sizes, size=n_requests, p=weights)
+    bodies = [json.dumps({"input": generator.rows(int(n)).tolist()}) for n in plan]
+    latencies = []
+    errors = {}
+    next_request = 0
+
+    async def client_loop():
+        nonlocal next_request
+        while next_request < len(bodies):
+            body = bodies[next_request]
+            next_request += 1
+            started = time.perf_counter()
+            response = await client.post(
+                '/predict', content=body, headers={'content-type': 'application/json'}
+            )
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors[response.status_code] = errors.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "rows": int(plan.sum()),
+        "seconds": elapsed,
+        "requests_per_sec": n_requests / elapsed,
+        "rows_per_sec": int(plan.sum()) / elapsed,
+        "errors": errors,
+        **latency_summary(latencies),
+    }
+
+
+# ===== MICRO-BENCHMARKS =====
+
+def time_call(fn, min_time=0.2):
+    """Durée médiane d'un appel (µs), répété au moins `min_time` secondes"""
+    fn()
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while time.perf_counter() < deadline or len(timings) < 5:
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings) * 1e6)
+
+
+def stage_benchmarks(main, generator, batch_sizes):
+    """Chronomètre chaque étape de /predict isolément, pour plusieurs tailles de lot"""
+    from cache import PredictionCache
+    from formats import (
+        RAW_CONTENT_TYPE, clip_prices, decode_matrix, encode_json_predictions, encode_predictions,
+    )
+
+    served = main.registry.current()
+    results = []
+    for n in batch_sizes:
+        X = generator.rows(n)
+        body = json.dumps({"input": X.tolist()}).encode()
+        data = main.PredictionInput.model_validate_json(body)
+        raw = X.tobytes()
+        predictions = main.run_model(X)
+        prices = clip_prices(predictions)
+        mileage = served.feature_names.index('mileage')
+        cache = PredictionCache(max_size=max(10000, 2 * n))
+        _, _, keys = cache.lookup(X, served.version)
+        cache.store(keys, predictions)
+
+        stages = {
+            "parse_json": lambda: main.PredictionInput.model_validate_json(body),
+            "convert": lambda: np.array(data.input),
+            "parse_fast": lambda: served.validator.parse(body),
+            "check_values": lambda: served.validator.check(X),
+            "decode_binary": lambda: decode_matrix(RAW_CONTENT_TYPE, raw, X.shape[1], {}),
+            "cache_lookup": lambda: cache.lookup(X, served.version),
+            "scaling": lambda: served.scaler.transform(X),
+            "model_sklearn": (
+                (lambda: served.model.predict(served.scaler.transform(X)))
+                if served.model is not None else None
+            ),
+            "model_compiled": lambda: main.run_model(X, 'compiled'),
+            "model_interval": lambda: main.run_model(X, quantiles=(0.1, 0.5, 0.9)),
+            "model_sweep": lambda: main.run_model(X[:1], sweep=(mileage, X[:, mileage])),
+            "clip_prices": lambda: clip_prices(predictions),
+            "serialize_json": lambda: encode_json_predictions(prices),
+            "encode_binary": lambda: encode_predictions(prices, RAW_CONTENT_TYPE),
+        }
+        timings = {name: time_call(fn) for name, fn in stages.items() if fn is not None}
+        results.append({"rows": n, "median_us": timings})
+    return results
+
+
+# ===== RAPPORT =====
+
+def print_load(results):
+    print(f"\n{'Conc.':>5} {'Req/s':>9} {'Lignes/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Erreurs':>8}")
+    for r in results:
+        print(
+            f"{r['concurrency']:>5} {r['requests_per_sec']:>9.1f} {r['rows_per_sec']:>10.0f} "
+            f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {sum(r['errors'].values()):>8}"
+        )
+
+
+def print_stages(results):
+    names = list(results[0]['median_us'])
+    print(f"\n{'Étape (µs médian)':<18}" + ''.join(f"{r['rows']:>12}" for r in results))
+    for name in names:
+        print(f"{name:<18}" + ''.join(f"{r['median_us'].get(name, float('nan')):>12.1f}" for r in results))
+
+
+def print_comparison(current, previous):
+    """Compare débit et p95 avec un fichier de résultats précédent"""
+    print(f"\n📊 Comparaison avec {previous.get('commit') or '?'} ({previous.get('timestamp', '')})")
+    before = {r['concurrency']: r for r in previous.get('load', [])}
+    for r in current['load']:
+        old = before.get(r['concurrency'])
+        if old is None:
+            continue
+        throughput = (r['requests_per_sec'] / old['requests_per_sec'] - 1) * 100
+        p95 = (r['p95_ms'] / old['p95_ms'] - 1) * 100
+        print(f"   concurrence {r['concurrency']:>3} : débit {throughput:+.1f}%, p95 {p95:+.1f}%")
+
+
+async def run_benchmark(args):
+    sizes, weights = parse_mix(args.mix)
+    levels = [int(c) for c in args.concurrency.split(',')]
+
+    main = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        import main
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url='http://bench', timeout=60)
+
+    async with client:
+        features = (await client.get('/features')).json()
+        generator = RowGenerator(features, seed=args.seed)
+        # Préchauffage (premier lot, pages du modèle, pool)
+        await run_load(client, generator, 1, 5, sizes, weights)
+        load = [
+            await run_load(client, generator, c, args.requests, sizes, weights)
+            for c in levels
+        ]
+        memory = memory_mb() if main is not None else await server_memory_mb(client)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "mode": 'url' if args.url else 'in-process',
+        "config": {
+            "url": args.url,
+            "requests": args.requests,
+            "concurrency": levels,
+            "mix": args.mix,
+            "seed": args.seed,
+            "env": {k: v for k, v in os.environ.items() if k in BENCH_ENV_VARS},
+        },
+        "load": load,
+        "memory": memory,
+    }
+    if main is not None and not args.skip_stages:
+        results["stages"] = stage_benchmarks(main, generator, [int(n) for n in args.stage_sizes.split(',')])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de charge et par étape de /predict")
+    parser.add_argument('--url', help="URL d'un serveur lancé (sinon : application dans le processus)")
+    parser.add_argument('--requests', type=int, default=500, help="requêtes par niveau de concurrence")
+    parser.add_argument('--concurrency', default='1,8,32', help="niveaux de concurrence, ex : 1,8,32")
+    parser.add_argument('--mix', default='1:0.7,10:0.2,100:0.1', help="tailles de lot et proportions")
+    parser.add_argument('--stage-sizes', default='1,100,1000', help="tailles de lot des micro-benchmarks")
+    parser.add_argument('--skip-stages', action='store_true', help="ne pas lancer les micro-benchmarks")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', dest='json_path', help="écrit les résultats dans ce fichier JSON")
+    parser.add_argument('--compare', help="fichier JSON d'un benchmark précédent")
+    args = parser.parse_args()
+
+    # scaler.transform sur un ndarray (sans noms de colonnes) avertit à chaque appel
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    results = asyncio.run(run_benchmark(args))
+
+    print_load(results['load'])
+    if 'stages' in results:
+        print_stages(results['stages'])
+    memory = results['memory']
+    peak = f", pic {memory['peak_rss_mb']:.1f} Mo" if memory['peak_rss_mb'] else ''
+    print(f"\n💾 Mémoire du serveur : RSS {memory['rss_mb'] or 0:.1f} Mo{peak}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
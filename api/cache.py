@@ -0,0 +1,125 @@
+"""
+🗃️ GetAround - Cache des prédictions
+Cache LRU (avec TTL optionnel) des prix prédits, indexé par les octets de la
+ligne de features arrondie, préfixés par un hash de la version du modèle
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    """
+    Cache LRU ligne par ligne
+
+    Un lot mixte ne recalcule que ses lignes absentes du cache : `lookup`
+    renvoie les valeurs connues et le masque des lignes manquantes, `store`
+    enregistre les prédictions calculées pour ces lignes.
+
+    La version du modèle fait partie de la clé et le cache est vidé dès
+    qu'une autre version est déclarée par `set_model_version`.
+    """
+
+    def __init__(self, max_size=10000, ttl=None, decimals=6):
+        self.max_size = max_size
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.decimals = decimals
+        self.model_version = ''
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def set_model_version(self, version):
+        """Déclare la version du modèle servi, vide le cache si elle change"""
+        if version != self.model_version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.model_version = version
+
+    def _keys(self, X, version=None):
+        """
+        Une clé bytes par ligne : [hash de la version | octets de la ligne arrondie]
+
+        Construites en une seule matrice d'octets, sans boucle Python ; le dict
+        hache ensuite ces clés en C. Une clé occupe 16 + 8 × n_features octets.
+        """
+        rows = np.ascontiguousarray(np.round(np.asarray(X, dtype=np.float64), self.decimals))
+        # -0.0 et 0.0 doivent donner la même clé
+        rows += 0.0
+        prefix = hashlib.blake2b((version or self.model_version).encode(), digest_size=16).digest()
+        keys = np.empty((len(rows), len(prefix) + rows.shape[1] * rows.itemsize), dtype=np.uint8)
+        keys[:, :len(prefix)] = np.frombuffer(prefix, dtype=np.uint8)
+        keys[:, len(prefix):] = rows.view(np.uint8)
+        return keys.view(f'V{keys.shape[1]}').ravel().tolist()
+
+    def lookup(self, X, version=None):
+        """
+        Cherche chaque ligne de X dans le cache
+
+        `version` permet de servir une autre version que celle déclarée par
+        `set_model_version` (versions servies côte à côte).
+
+        Returns:
+            (values, missing, keys) : prédictions connues (NaN sinon), masque
+            booléen des lignes à calculer, clés à repasser à `store`
+        """
+        keys = self._keys(X, version)
+        values = np.full(len(keys), np.nan)
+        missing = np.ones(len(keys), dtype=bool)
+        now = time.monotonic()
+
+        # Seules les lignes présentes passent par la boucle Python
+        entries = [self._entries.get(key) for key in keys]
+        for i, entry in enumerate(entries):
+            if entry is None:
+                continue
+            key = keys[i]
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                continue
+            self._entries.move_to_end(key)
+            values[i] = value
+            missing[i] = False
+
+        n_hits = len(keys) - int(missing.sum())
+        self.hits += n_hits
+        self.misses += len(keys) - n_hits
+        return values, missing, keys
+
+    def store(self, keys, predictions):
+        """Enregistre les prédictions calculées, en évinçant les entrées les plus anciennes"""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        for key, value in zip(keys, np.asarray(predictions).tolist()):
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self):
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "model_version": self.model_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,150 @@
+"""
+🗜️ GetAround - Réduction de la taille de la forêt compilée
+Variantes plus compactes des tableaux de la forêt pour l'artefact mappé en
+mémoire : indices entiers étroits, nœuds en float32 et fusion des feuilles
+sœurs qui prédisent presque le même prix. Utilisé par `artifact.py --tier`.
+"""
+
+import numpy as np
+
+from forest import CompiledForest
+
+# Niveaux de compression, du plus fidèle au plus compact :
+# - full    : tableaux d'origine (int64 / float64)
+# - compact : indices int8 / int32, `left` et `right` lus dans `children`
+#             (prédictions identiques au bit près)
+# - float32 : compact + seuils, valeurs et cover en float32
+# - merged  : float32 + fusion des feuilles (voir merge_leaves)
+TIERS = ('full', 'compact', 'float32', 'merged')
+
+# Écart maximal (en €) entre la sortie d'un arbre avant et après fusion
+MERGE_TOLERANCE = 5.0
+
+
+def merge_leaves(forest, tolerance=MERGE_TOLERANCE):
+    """
+    Remplace par une feuille chaque sous-arbre dont les feuilles sont proches
+
+    Un nœud devient une feuille quand ses deux enfants sont des feuilles et
+    que toutes les feuilles d'origine qu'ils couvrent ont des sorties
+    (valeur × learning_rate pour le gradient boosting) distantes d'au plus
+    `tolerance` ; sa valeur est la moyenne des enfants pondérée par cover.
+    On remonte niveau par niveau : la sortie de chaque arbre change donc
+    d'au plus `tolerance` pour n'importe quelle entrée. Les nœuds devenus
+    inaccessibles sont ensuite supprimés.
+    """
+    if forest.cover is None:
+        raise ValueError("Fusion impossible : poids des nœuds (cover) absents du modèle")
+    feature = forest.feature.copy()
+    threshold = forest.threshold.copy()
+    left = forest.left.copy()
+    right = forest.right.copy()
+    value = forest.value.astype(np.float64)
+    cover = forest.cover.astype(np.float64)
+    output_scale = 1.0 if forest.average else abs(forest.scale)
+    # Plage des valeurs des feuilles d'origine sous chaque nœud (pour les feuilles : leur valeur)
+    low, high = value.copy(), value.copy()
+
+    while True:
+        internal = np.flatnonzero(~np.isinf(threshold))
+        l, r = left[internal], right[internal]
+        mergeable = np.isinf(threshold[l]) & np.isinf(threshold[r])
+        node_low = np.minimum(low[l], low[r])
+        node_high = np.maximum(high[l], high[r])
+        mergeable &= (node_high - node_low) * output_scale <= tolerance
+        if not mergeable.any():
+            break
+        node, l, r = internal[mergeable], l[mergeable], r[mergeable]
+        value[node] = (cover[l] * value[l] + cover[r] * value[r]) / (cover[l] + cover[r])
+        low[node], high[node] = node_low[mergeable], node_high[mergeable]
+        # Même convention que les feuilles compilées : feature 0, seuil +inf, boucle sur soi
+        feature[node] = 0
+        threshold[node] = np.inf
+        left[node] = right[node] = node
+
+    return _prune(forest, feature, threshold, left, right, value)
+
+
+def _prune(forest, feature, threshold, left, right, value):
+    """Supprime les nœuds inaccessibles depuis les racines et renumérote les autres"""
+    reachable = np.zeros(len(threshold), dtype=bool)
+    node = forest.roots.astype(np.intp)
+    depth = 0
+    while len(node):
+        reachable[node] = True
+        node = node[~np.isinf(threshold[node])]
+        if len(node):
+            depth += 1
+            node = np.concatenate([left[node], right[node]])
+
+    new_index = np.cumsum(reachable) - 1
+    kept = np.flatnonzero(reachable)
+    return CompiledForest(
+        feature=feature[kept],
+        threshold=threshold[kept],
+        left=new_index[left[kept]],
+        right=new_index[right[kept]],
+        value=value[kept],
+        roots=new_index[forest.roots],
+        max_depth=depth,
+        n_features=forest.n_features,
+        base=forest.base,
+        scale=forest.scale,
+        average=forest.average,
+        input_dtype=forest.input_dtype,
+        cover=forest.cover[kept],
+    )
+
+
+def _smallest_int(n):
+    """Plus petit type entier signé contenant 0..n"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def float32_thresholds(threshold):
+    """
+    Seuils float32 arrondis vers le bas
+
+    Pour tout x représentable en float32 (les features converties par
+    scikit-learn, les entiers < 2**24), `x <= t` équivaut à
+    `x <= float32_bas(t)` : les décisions ne changent pas.
+    """
+    rounded = threshold.astype(np.float32)
+    above = rounded > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def narrow(forest, float32=False):
+    """
+    Même forêt avec des tableaux plus étroits
+
+    `children` en int32 (assez pour 2 × n_nœuds), `left` et `right` en sont
+    des vues (aucune copie), features en int8 ; avec `float32`, seuils
+    arrondis par float32_thresholds, valeurs et cover en float32.
+    """
+    children = forest.children.astype(np.int32 if 2 * forest.n_nodes + 1 <= np.iinfo(np.int32).max else np.int64)
+    threshold, value, cover = forest.threshold, forest.value, forest.cover
+    if float32:
+        threshold = float32_thresholds(threshold)
+        value = value.astype(np.float32)
+        cover = None if cover is None else cover.astype(np.float32)
+    return CompiledForest(
+        feature=forest.feature.astype(_smallest_int(forest.n_features)),
+        threshold=threshold,
+        left=children[1::2],
+        right=children[0::2],
+        value=value,
+        roots=forest.roots.astype(children.dtype),
+        max_depth=forest.max_depth,
+        n_features=forest.n_features,
+        base=forest.base,
+        scale=forest.scale,
+        average=forest.average,
+        input_dtype=forest.input_dtype,
+        children=children,
+        cover=cover,
+    )
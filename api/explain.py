@@ -0,0 +1,164 @@
+"""
+🔍 GetAround - Attributions par feature (TreeSHAP)
+Décompose chaque prédiction de la forêt compilée en contributions par
+feature (valeurs de Shapley, variante « path-dependent » de TreeSHAP),
+calculées en temps polynomial à partir des tableaux de nœuds
+"""
+
+import numpy as np
+
+# Nombre de valeurs intermédiaires (lignes × points × features du chemin ×
+# feuilles) calculées à la fois : assez pour amortir les appels NumPy, assez
+# peu pour que les tableaux temporaires restent dans le cache
+BLOCK_ELEMENTS = 1 << 15
+
+# Nombre maximal de lignes traitées ensemble
+ROWS_PER_BLOCK = 16
+
+
+class TreeExplainer:
+    """
+    Attributions exactes de Shapley pour une forêt compilée
+
+    Chaque feuille est résumée une fois pour toutes par les features
+    distinctes de son chemin : pour chacune, l'intervalle ]lo, hi] que doit
+    respecter x pour suivre le chemin, et la fraction `z` des échantillons
+    d'entraînement qui le suivent (produit des cover enfant / parent). Pour
+    une ligne, `o_j = lo_j < x_j <= hi_j` et la contribution d'une feuille de
+    valeur v à la feature i vaut :
+
+        φ_i = v (o_i - z_i) Σ_k w_k [t^k] Π_{j≠i} (z_j + o_j t)
+
+    avec w_k = k! (m - k - 1)! / m! pour m features distinctes sur le chemin.
+    Comme w_k = ∫_0^1 u^k (1 - u)^(m-k-1) du, la somme est l'intégrale sur
+    [0, 1] du polynôme Π_{j≠i} (z_j (1 - u) + o_j u), de degré m - 1 : une
+    quadrature de Gauss-Legendre à ⌈m/2⌉ points la calcule exactement.
+    Coût O(feuilles × profondeur²) par ligne, vectorisé sur les feuilles et
+    les lignes (feuilles regroupées par valeur de m).
+    """
+
+    def __init__(self, forest):
+        if forest.cover is None:
+            raise ValueError("Attributions indisponibles : poids des nœuds (cover) absents du modèle")
+        self.forest = forest
+        self.n_features = forest.n_features
+        self.groups, self.expected_value = self._build_paths(forest)
+
+    @staticmethod
+    def _build_paths(forest):
+        """
+        Parcourt tous les arbres niveau par niveau et résume le chemin de chaque feuille
+
+        Returns:
+            (groupes de feuilles par nombre m de features distinctes,
+             valeur attendue = prédiction moyenne pondérée par les cover)
+        """
+        depth = max(forest.max_depth, 1)
+        n_trees = forest.n_trees
+        node = forest.roots.astype(np.intp)
+        feat = np.full((n_trees, depth), -1, dtype=np.intp)
+        lo = np.full((n_trees, depth), -np.inf)
+        hi = np.full((n_trees, depth), np.inf)
+        z = np.ones((n_trees, depth))
+        m = np.zeros(n_trees, dtype=np.intp)
+
+        leaves = []
+        for _ in range(depth + 1):
+            is_leaf = np.isinf(forest.threshold[node])
+            leaves.append((node[is_leaf], feat[is_leaf], lo[is_leaf], hi[is_leaf], z[is_leaf], m[is_leaf]))
+            internal = ~is_leaf
+            node, feat, lo, hi, z, m = (a[internal] for a in (node, feat, lo, hi, z, m))
+            if not len(node):
+                break
+
+            # Emplacement de la feature du nœud dans le chemin (existant ou nouveau)
+            f = forest.feature[node]
+            t = forest.threshold[node]
+            match = feat == f[:, None]
+            known = match.any(axis=1)
+            slot = np.where(known, match.argmax(axis=1), m)
+            rows = np.arange(len(node))
+
+            children = []
+            for child, goes_left in ((forest.left[node], True), (forest.right[node], False)):
+                c_feat, c_lo, c_hi, c_z = feat.copy(), lo.copy(), hi.copy(), z.copy()
+                c_feat[rows, slot] = f
+                if goes_left:
+                    c_hi[rows, slot] = np.minimum(hi[rows, slot], t)
+                else:
+                    c_lo[rows, slot] = np.maximum(lo[rows, slot], t)
+                c_z[rows, slot] *= forest.cover[child] / forest.cover[node]
+                children.append((child, c_feat, c_lo, c_hi, c_z, m + ~known))
+            node, feat, lo, hi, z, m = (np.concatenate(arrays) for arrays in zip(*children))
+
+        node, feat, lo, hi, z, m = (np.concatenate(arrays) for arrays in zip(*leaves))
+        # Valeur de chaque feuille dans la prédiction finale (1 / n_arbres ou learning_rate)
+        value = forest.scale * forest.value[node].astype(np.float64)
+        expected_value = forest.base + float(np.sum(value * z.prod(axis=1)))
+
+        groups = []
+        for size in np.unique(m):
+            if size == 0:
+                continue
+            selected = m == size
+            # Quadrature de Gauss-Legendre ramenée sur [0, 1]
+            nodes, weights = np.polynomial.legendre.leggauss((size + 1) // 2)
+            u = (nodes[:, None, None] + 1) / 2
+
+            # Tableaux (features du chemin, feuilles) et (points, features du
+            # chemin, feuilles), indépendants des lignes : z_j (1 - u), facteur
+            # quand o_j = 0, et v (o_i - z_i) quand o_i = 0
+            g_z = z[selected, :size].T
+            g_value = value[selected]
+            leaf_arrays = (
+                np.ascontiguousarray(feat[selected, :size].T),
+                np.ascontiguousarray(lo[selected, :size].T),
+                np.ascontiguousarray(hi[selected, :size].T),
+                g_z * (1 - u),
+                -g_value * g_z,
+                g_value,
+            )
+            groups.append((leaf_arrays, u, weights / 2))
+        return groups, expected_value
+
+    def shap_values(self, X):
+        """
+        Contributions de chaque feature, forme (n_lignes, n_features)
+
+        Pour chaque ligne, `expected_value + somme des contributions` redonne
+        la prédiction de la forêt.
+        """
+        # Mêmes conversions et comparaisons que le parcours des arbres
+        X = self.forest._as_input(X).astype(np.float64)
+        n_rows = len(X)
+        phi = np.zeros((n_rows, self.n_features))
+        for leaf_arrays, u, weights in self.groups:
+            n_points, size, n_leaves = leaf_arrays[3].shape
+            for start in range(0, n_rows, ROWS_PER_BLOCK):
+                x = X[start:start + ROWS_PER_BLOCK]
+                leaves_per_block = max(64, BLOCK_ELEMENTS // (len(x) * n_points * size))
+                for first in range(0, n_leaves, leaves_per_block):
+                    block = [a[..., first:first + leaves_per_block] for a in leaf_arrays]
+                    phi[start:start + len(x)] += self._contributions(x, block, u, weights)
+        return phi
+
+    def _contributions(self, x, block, u, weights):
+        """Contributions d'un bloc de feuilles (même m) pour un bloc de lignes"""
+        feat, lo, hi, zero_factors, zero_coefs, value = block
+        n_rows = len(x)
+
+        # o_j pour chaque (ligne, feature du chemin, feuille)
+        xf = x[:, feat]
+        o = ((lo < xf) & (xf <= hi)).astype(np.float64)
+
+        # Facteurs z_j (1 - u) + o_j u aux points de quadrature, tous > 0
+        # (z_j > 0 et 0 < u < 1) : le produit sans j s'obtient par division
+        factors = zero_factors + o[:, None] * u
+        integral = np.einsum('rpml,p->rml', factors.prod(axis=2, keepdims=True) / factors, weights)
+
+        # v (o_i - z_i) = -v z_i + o_i v
+        contributions = (zero_coefs + o * value) * integral
+        index = np.arange(n_rows)[:, None, None] * self.n_features + feat
+        return np.bincount(
+            index.ravel(), weights=contributions.ravel(), minlength=n_rows * self.n_features
+        ).reshape(n_rows, self.n_features)
@@ -0,0 +1,78 @@
+"""
+📐 GetAround - Repli du scaler dans le modèle
+Intègre la normalisation (RobustScaler, StandardScaler) directement dans les
+paramètres du modèle pour que /predict consomme les features brutes sans
+appeler scaler.transform
+"""
+
+import numpy as np
+
+
+def scaler_affine(scaler, n_features):
+    """
+    Retourne (center, scale) tels que `scaler.transform(x) == (x - center) / scale`
+
+    Lève TypeError si le scaler n'est pas une transformation affine connue.
+    """
+    kind = type(scaler).__name__
+    if kind == 'RobustScaler':
+        center = scaler.center_ if scaler.with_centering else None
+        scale = scaler.scale_ if scaler.with_scaling else None
+    elif kind == 'StandardScaler':
+        center = scaler.mean_ if scaler.with_mean else None
+        scale = scaler.scale_ if scaler.with_std else None
+    else:
+        raise TypeError(f"Scaler non repliable : {kind}")
+
+    center = np.zeros(n_features) if center is None else np.asarray(center, dtype=np.float64)
+    scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+    return center, scale
+
+
+class FoldedLinearModel:
+    """
+    Modèle linéaire dont les coefficients intègrent le scaler
+
+    `coef · (x - center) / scale + b` = `(coef / scale) · x + (b - Σ coef * center / scale)`
+    """
+
+    def __init__(self, coef, intercept):
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+
+    @classmethod
+    def from_sklearn(cls, model, center, scale):
+        coef = np.asarray(model.coef_, dtype=np.float64)
+        if coef.ndim != 1:
+            raise TypeError("Seuls les modèles linéaires à une seule sortie sont supportés")
+        folded_coef = coef / scale
+        return cls(folded_coef, float(model.intercept_) - np.dot(folded_coef, center))
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.coef):
+            raise ValueError(f"X doit avoir la forme (n, {len(self.coef)}), reçu {X.shape}")
+        return X @ self.coef + self.intercept
+
+
+def fold_scaler(model, compiled, scaler):
+    """
+    Replie le scaler dans le modèle si possible
+
+    - modèle à base d'arbres (compilé) : le scaler est replié dans les seuils
+    - modèle linéaire (LinearRegression, Ridge, Lasso) : dans les coefficients
+    - sinon : retourne None, l'API garde le chemin scaler.transform + predict
+    """
+    n_features = getattr(model, 'n_features_in_', None)
+    if n_features is None:
+        return None
+
+    try:
+        center, scale = scaler_affine(scaler, n_features)
+        if compiled is not None:
+            return compiled.fold_scaler(center, scale)
+        if hasattr(model, 'coef_') and hasattr(model, 'intercept_'):
+            return FoldedLinearModel.from_sklearn(model, center, scale)
+    except (TypeError, ValueError, AttributeError):
+        return None
+    return None
@@ -0,0 +1,355 @@
+"""
+🌲 GetAround - Moteur d'inférence compilé
+Convertit les arbres scikit-learn en tableaux NumPy contigus et les parcourt
+de façon vectorisée (par blocs de lignes et d'arbres)
+"""
+
+import numpy as np
+
+# Types d'ensembles supportés par le compilateur
+SUPPORTED_MODELS = (
+    'RandomForestRegressor',
+    'ExtraTreesRegressor',
+    'DecisionTreeRegressor',
+    'GradientBoostingRegressor',
+)
+
+# Nombre de couples (arbre, ligne) parcourus simultanément : assez grand pour
+# amortir le coût des appels NumPy, assez petit pour rester dans le cache
+CHUNK_SIZE = 16384
+
+
+def check_finite(X):
+    """Lève ValueError si X contient des valeurs manquantes (NaN) ou infinies"""
+    if not np.isfinite(X).all():
+        raise ValueError("Valeurs manquantes ou non finies : non supportées par le moteur compilé")
+
+
+class CompiledForest:
+    """
+    Forêt d'arbres de régression stockée sous forme de tableaux plats
+
+    Tous les nœuds de tous les arbres sont concaténés dans les tableaux
+    `feature`, `threshold`, `left`, `right` et `value`. Les feuilles
+    bouclent sur elles-mêmes (seuil = +inf), ce qui permet de faire
+    `max_depth` itérations sans test de fin de parcours. `children`
+    entrelace (droite, gauche) pour descendre d'un niveau en une seule
+    indexation : `children[2 * node + go_left]`.
+
+    La prédiction vaut `base + scale * Σ value[feuille]` où :
+    - forêt aléatoire : base = 0, scale = 1 / n_arbres
+    - gradient boosting : base = prédiction initiale, scale = learning_rate
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots,
+                 max_depth, n_features, base=0.0, scale=1.0, average=True,
+                 input_dtype=np.float32, children=None, cover=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.base = float(base)
+        self.scale = float(scale)
+        self.average = bool(average)
+        self.input_dtype = np.dtype(input_dtype)
+        # `children` peut être fourni déjà calculé (artefact mappé en mémoire)
+        self.children = np.stack([right, left], axis=1).ravel() if children is None else children
+        # Poids des échantillons d'entraînement par nœud (attributions TreeSHAP), facultatif
+        self.cover = cover
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Compile un modèle scikit-learn à base d'arbres"""
+        kind = type(model).__name__
+        if kind not in SUPPORTED_MODELS:
+            raise TypeError(f"Modèle non compilable : {kind}")
+
+        base, scale, average = 0.0, 1.0, True
+        if kind == 'DecisionTreeRegressor':
+            trees = [model.tree_]
+        elif kind == 'GradientBoostingRegressor':
+            if model.init_ == 'zero':
+                base = 0.0
+            elif hasattr(model.init_, 'constant_'):
+                base = float(np.ravel(model.init_.constant_)[0])
+            else:
+                raise TypeError("Estimateur initial du gradient boosting non supporté")
+            trees = [est.tree_ for est in model.estimators_[:, 0]]
+            scale, average = model.learning_rate, False
+        else:
+            trees = [est.tree_ for est in model.estimators_]
+
+        if any(t.n_outputs != 1 for t in trees):
+            raise TypeError("Seuls les modèles à une seule sortie sont supportés")
+
+        sizes = np.array([t.node_count for t in trees], dtype=np.intp)
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+        n_nodes = int(sizes.sum())
+
+        feature = np.empty(n_nodes, dtype=np.intp)
+        threshold = np.empty(n_nodes, dtype=np.float64)
+        left = np.empty(n_nodes, dtype=np.intp)
+        right = np.empty(n_nodes, dtype=np.intp)
+        value = np.empty(n_nodes, dtype=np.float64)
+        cover = np.empty(n_nodes, dtype=np.float64)
+
+        for tree, offset, size in zip(trees, roots, sizes):
+            sl = slice(offset, offset + size)
+            node_ids = np.arange(offset, offset + size, dtype=np.intp)
+            is_leaf = tree.children_left == -1
+
+            feature[sl] = np.where(is_leaf, 0, tree.feature)
+            threshold[sl] = np.where(is_leaf, np.inf, tree.threshold)
+            left[sl] = np.where(is_leaf, node_ids, tree.children_left + offset)
+            right[sl] = np.where(is_leaf, node_ids, tree.children_right + offset)
+            value[sl] = tree.value[:, 0, 0]
+            cover[sl] = tree.weighted_n_node_samples
+
+        if average:
+            scale = 1.0 / len(trees)
+
+        return cls(
+            feature=feature,
+            threshold=threshold,
+            left=left,
+            right=right,
+            value=value,
+            roots=roots,
+            max_depth=max(t.max_depth for t in trees),
+            n_features=model.n_features_in_,
+            base=base,
+            scale=scale,
+            average=average,
+            cover=cover,
+        )
+
+    def fold_scaler(self, center, scale):
+        """
+        Retourne une forêt équivalente qui consomme directement les features brutes
+
+        Un scaler affine calcule `x_scaled = (x - center) / scale`, que
+        scikit-learn convertit ensuite en float32 avant de le comparer au
+        seuil `t`. Avec `scale > 0`, cette fonction est croissante : le test
+        `float32((x - center) / scale) <= t` équivaut à `x <= x_t`, où `x_t`
+        est le plus grand float64 qui passe encore à gauche. `x_t` est
+        d'abord approché par `t * scale + center`, puis ajusté par dichotomie
+        pour que les décisions restent identiques au bit près, y compris
+        pour les valeurs entières qui tombent exactement sur un seuil.
+        """
+        center = np.asarray(center, dtype=np.float64)
+        scale = np.asarray(scale, dtype=np.float64)
+        if np.any(scale <= 0):
+            raise ValueError("Le scaler doit avoir des échelles strictement positives")
+
+        internal = np.flatnonzero(~np.isinf(self.threshold))
+        t = self.threshold[internal]
+        c = center[self.feature[internal]]
+        s = scale[self.feature[internal]]
+
+        def goes_left(x):
+            return ((x - c) / s).astype(np.float32) <= t
+
+        # Encadrer la frontière : goes_left(lo) et non goes_left(hi)
+        guess = t * s + c
+        width = (np.abs(guess) + np.abs(c) + s) * 1e-6
+        lo, hi = guess - width, guess + width
+        for _ in range(64):
+            bad_lo, bad_hi = ~goes_left(lo), goes_left(hi)
+            if not (bad_lo.any() or bad_hi.any()):
+                break
+            width *= 2
+            lo = np.where(bad_lo, guess - width, lo)
+            hi = np.where(bad_hi, guess + width, hi)
+
+        # Dichotomie jusqu'à deux float64 consécutifs
+        for _ in range(128):
+            mid = lo + (hi - lo) / 2
+            active = (mid > lo) & (mid < hi)
+            if not active.any():
+                break
+            left = goes_left(mid)
+            lo = np.where(active & left, mid, lo)
+            hi = np.where(active & ~left, mid, hi)
+
+        threshold = self.threshold.copy()
+        threshold[internal] = lo
+
+        return CompiledForest(
+            feature=self.feature,
+            threshold=threshold,
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            roots=self.roots,
+            max_depth=self.max_depth,
+            n_features=self.n_features,
+            base=self.base,
+            scale=self.scale,
+            average=self.average,
+            input_dtype=np.float64,
+            children=self.children,
+            cover=self.cover,
+        )
+
+    def _as_input(self, X):
+        """
+        Convertit l'entrée comme scikit-learn (float32 par défaut, C-contigu)
+
+        Refuse les valeurs non finies : scikit-learn envoie un NaN du côté
+        appris pour les valeurs manquantes, alors que `NaN <= seuil` est
+        toujours faux ici (le NaN irait toujours à droite). Après conversion,
+        un float64 trop grand pour float32 devient infini et est refusé aussi.
+        """
+        X = np.ascontiguousarray(X, dtype=self.input_dtype)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(
+                f"X doit avoir la forme (n, {self.n_features}), reçu {X.shape}"
+            )
+        check_finite(X)
+        return X
+
+    def apply(self, X):
+        """
+        Retourne l'indice (global) de la feuille atteinte pour chaque arbre
+
+        Returns:
+            tableau (n_arbres, n_lignes) d'indices de nœuds
+        """
+        X = self._as_input(X)
+        n_rows = X.shape[0]
+        leaves = np.empty((self.n_trees, n_rows), dtype=np.intp)
+        if n_rows == 0:
+            return leaves
+
+        flat_X = X.ravel()
+        rows_per_chunk = min(n_rows, CHUNK_SIZE)
+        trees_per_chunk = max(1, CHUNK_SIZE // rows_per_chunk)
+
+        for start in range(0, n_rows, rows_per_chunk):
+            stop = min(start + rows_per_chunk, n_rows)
+            row_offsets = np.arange(start, stop, dtype=np.intp) * self.n_features
+
+            for first in range(0, self.n_trees, trees_per_chunk):
+                last = min(first + trees_per_chunk, self.n_trees)
+                node = np.repeat(self.roots[first:last, None].astype(np.intp), stop - start, axis=1)
+                for _ in range(self.max_depth):
+                    go_left = flat_X[row_offsets + self.feature[node]] <= self.threshold[node]
+                    node = self.children[2 * node + go_left].astype(np.intp, copy=False)
+                leaves[first:last, start:stop] = node
+
+        return leaves
+
+    def predict_trees(self, X):
+        """Retourne les sorties brutes de chaque arbre, forme (n_arbres, n_lignes)"""
+        # Valeurs éventuellement stockées en float32 (artefact compact) : calculs en float64
+        return self.value[self.apply(X)].astype(np.float64, copy=False)
+
+    def predict(self, X):
+        """
+        Prédit comme le modèle scikit-learn d'origine
+
+        Les sorties des arbres sont accumulées dans l'ordre des arbres,
+        comme le fait scikit-learn, pour obtenir des résultats identiques
+        au bit près.
+        """
+        return self._combine(self.predict_trees(X))
+
+    def predict_quantiles(self, X, quantiles):
+        """
+        Prédiction et quantiles des sorties des arbres, en un seul parcours
+
+        Les sorties des arbres d'une forêt aléatoire forment une distribution
+        du prix : ses quantiles donnent un intervalle de prédiction. Sans
+        objet pour le gradient boosting (arbres successifs sur les résidus).
+
+        Returns:
+            (prédictions (n_lignes,), quantiles (n_quantiles, n_lignes))
+        """
+        if not self.average:
+            raise ValueError("Quantiles disponibles uniquement pour une forêt aléatoire")
+        tree_values = self.predict_trees(X)
+        return self._combine(tree_values), np.quantile(tree_values, quantiles, axis=0)
+
+    def predict_sweep(self, x, column, grid):
+        """
+        Prédit un véhicule `x` pour chaque valeur `grid` de la feature `column`
+
+        Équivaut à predict sur len(grid) copies de x ne différant que par
+        cette colonne, sans les parcourir une par une : chaque arbre n'est
+        parcouru qu'une fois avec x, en suivant les deux branches des seuls
+        nœuds qui coupent `column` dans l'intervalle encore possible. On
+        obtient par arbre une partition de la colonne en intervalles
+        ]lo, hi] associés à une feuille, puis chaque valeur de la grille est
+        placée dans son intervalle par np.searchsorted.
+        """
+        x = self._as_input(np.reshape(x, (1, -1)))[0]
+        # Valeurs de la grille converties comme les entrées (float32 par défaut)
+        grid = np.asarray(grid, dtype=self.input_dtype).astype(np.float64).ravel()
+        check_finite(grid)
+
+        tree = np.arange(self.n_trees)
+        node = self.roots.astype(np.intp)
+        lo = np.full(self.n_trees, -np.inf)
+        hi = np.full(self.n_trees, np.inf)
+        for _ in range(self.max_depth):
+            feature = self.feature[node]
+            threshold = self.threshold[node]
+            on_column = feature == column
+            # Seuil à l'intérieur de ]lo, hi] : les deux branches restent possibles
+            split = on_column & (lo < threshold) & (threshold < hi)
+            go_left = np.where(on_column, hi <= threshold, x[feature] <= threshold)
+
+            right = np.flatnonzero(split)
+            tree = np.concatenate([tree, tree[right]])
+            lo = np.concatenate([lo, threshold[right]])
+            hi = np.concatenate([np.where(split, threshold, hi), hi[right]])
+            node = np.concatenate([
+                self.children[2 * node + (go_left | split)],
+                self.right[node[right]],
+            ])
+
+        # Les valeurs de la grille comprises entre deux mêmes bornes (tous
+        # arbres confondus) tombent dans les mêmes feuilles : une seule par cellule
+        bounds = np.unique(hi)
+        cells, inverse = np.unique(np.searchsorted(bounds, grid, side='left'), return_inverse=True)
+
+        # Trier les intervalles par (arbre, hi) puis chercher pour chaque
+        # (arbre, cellule) le premier intervalle tel que valeur <= hi
+        order = np.lexsort((hi, tree))
+        stride = len(bounds) + 1
+        keys = tree[order] * stride + np.searchsorted(bounds, hi[order], side='left')
+        queries = np.arange(self.n_trees)[:, None] * stride + cells
+        leaves = node[order][np.searchsorted(keys, queries, side='left')]
+        return self._combine(self.value[leaves].astype(np.float64, copy=False))[inverse]
+
+    def _combine(self, tree_values):
+        out = np.zeros(tree_values.shape[1], dtype=np.float64)
+        if self.average:
+            for row in tree_values:
+                out += row
+            out /= self.n_trees
+        else:
+            out += self.base
+            for row in tree_values:
+                out += self.scale * row
+        return out
+
+
+def compile_model(model):
+    """Compile le modèle si possible, sinon retourne None"""
+    try:
+        return CompiledForest.from_sklearn(model)
+    except (TypeError, AttributeError):
+        return None
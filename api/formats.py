@@ -0,0 +1,171 @@
+"""
+🧱 GetAround - Formats d'entrée et de sortie pour /predict
+Décode les matrices de features envoyées en binaire (little-endian brut ou
+.npy) sans copie via np.frombuffer, et encode les prédictions (JSON ou
+binaire) à partir d'un tableau NumPy, sans boucle Python par élément
+"""
+
+import io
+import json
+
+import numpy as np
+
+JSON_CONTENT_TYPE = 'application/json'
+RAW_CONTENT_TYPE = 'application/octet-stream'
+NPY_CONTENT_TYPE = 'application/x-npy'
+BINARY_CONTENT_TYPES = (RAW_CONTENT_TYPE, NPY_CONTENT_TYPE)
+
+# Types acceptés pour le format brut (en-tête X-Dtype)
+RAW_DTYPES = {
+    'float32': np.dtype('<f4'),
+    'float64': np.dtype('<f8'),
+}
+
+# Schéma OpenAPI des corps binaires, pour la documentation /docs
+BINARY_OPENAPI_CONTENT = {
+    RAW_CONTENT_TYPE: {
+        "schema": {"type": "string", "format": "binary"},
+        "description": "Matrice little-endian brute, en-têtes X-Shape (ex : 2,56) et X-Dtype (float32 ou float64)",
+    },
+    NPY_CONTENT_TYPE: {
+        "schema": {"type": "string", "format": "binary"},
+        "description": "Fichier .npy (np.save) contenant une matrice 2D de floats",
+    },
+}
+
+
+def media_type(header):
+    """Extrait le type MIME d'un en-tête Content-Type / Accept (sans paramètres)"""
+    return (header or '').split(';')[0].strip().lower()
+
+
+def negotiate_response_type(accept):
+    """Retourne le format binaire demandé par l'en-tête Accept, sinon JSON"""
+    for item in (accept or '').split(','):
+        mime = media_type(item)
+        if mime in BINARY_CONTENT_TYPES:
+            return mime
+    return JSON_CONTENT_TYPE
+
+
+def _parse_shape(header, size, n_features):
+    """Lit l'en-tête X-Shape ("n" ou "n,n_features"), déduit la forme sinon"""
+    if not header:
+        if size % n_features != 0:
+            raise ValueError(f"Taille du corps incompatible avec {n_features} features")
+        return size // n_features, n_features
+
+    try:
+        dims = tuple(int(d) for d in header.replace('x', ',').split(',') if d.strip())
+    except ValueError:
+        raise ValueError(f"En-tête X-Shape invalide : {header}")
+    if len(dims) == 1:
+        dims = (dims[0], n_features)
+    if len(dims) != 2 or dims[0] < 0 or dims[1] < 0:
+        raise ValueError(f"En-tête X-Shape invalide : {header}")
+    return dims
+
+
+def decode_raw(body, n_features, shape_header=None, dtype_header=None):
+    """Décode une matrice little-endian brute sans copie"""
+    dtype = RAW_DTYPES.get((dtype_header or 'float64').lower())
+    if dtype is None:
+        raise ValueError(f"X-Dtype non supporté : {dtype_header} (attendu : {', '.join(RAW_DTYPES)})")
+    if len(body) % dtype.itemsize != 0:
+        raise ValueError(f"Taille du corps non multiple de {dtype.itemsize} octets")
+
+    size = len(body) // dtype.itemsize
+    shape = _parse_shape(shape_header, size, n_features)
+    if shape[0] * shape[1] != size:
+        raise ValueError(f"X-Shape {shape} incompatible avec {size} valeurs reçues")
+    return np.frombuffer(body, dtype=dtype).reshape(shape)
+
+
+def decode_npy(body):
+    """Décode un fichier .npy sans copie (lecture de l'en-tête puis np.frombuffer)"""
+    stream = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            header = np.lib.format.read_array_header_1_0(stream)
+        else:
+            header = np.lib.format.read_array_header_2_0(stream)
+    except ValueError as e:
+        raise ValueError(f"Fichier .npy invalide : {e}")
+    shape, fortran_order, dtype = header
+
+    if dtype.kind != 'f' or dtype.hasobject:
+        raise ValueError(f"Le .npy doit contenir des floats, reçu {dtype}")
+    if len(shape) != 2:
+        raise ValueError(f"Le .npy doit contenir une matrice 2D, reçu la forme {shape}")
+
+    count = int(np.prod(shape))
+    X = np.frombuffer(body, dtype=dtype, count=count, offset=stream.tell())
+    if fortran_order:
+        return X.reshape(shape[::-1]).T
+    return X.reshape(shape)
+
+
+def decode_matrix(content_type, body, n_features, headers):
+    """Décode le corps binaire selon son Content-Type"""
+    if content_type == NPY_CONTENT_TYPE:
+        return decode_npy(body)
+    return decode_raw(body, n_features, headers.get('x-shape'), headers.get('x-dtype'))
+
+
+def clip_prices(predictions):
+    """
+    Arrondit à 2 décimales et borne à 0, en un seul passage NumPy
+
+    Équivalent à `max(round(float(p), 2), 0)` élément par élément : np.round
+    (qui calcule rint(p * 100) / 100) peut différer de round() quand p * 100
+    tombe presque exactement sur .5 ; ces rares valeurs sont arrondies par
+    round(). `+ 0.0` transforme -0.0 en 0.0.
+    """
+    predictions = np.asarray(predictions, dtype=np.float64)
+    prices = np.round(predictions, 2)
+    scaled = predictions * 100
+    ambiguous = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ambiguous.any():
+        prices[ambiguous] = [round(p, 2) for p in predictions[ambiguous].tolist()]
+    return np.maximum(prices, 0.0) + 0.0
+
+
+def encode_json_predictions(prices):
+    """
+    Sérialise {"prediction": [...]} directement, sans validation Pydantic par élément
+
+    Même schéma et même texte que PredictionOutput.model_dump_json() pour des
+    prix arrondis à 2 décimales.
+    """
+    return json.dumps({"prediction": np.asarray(prices, dtype=np.float64).tolist()}, separators=(',', ':')).encode()
+
+
+def encode_json_intervals(prices, quantiles, values):
+    """
+    Sérialise {"prediction": [...], "quantiles": [...], "intervals": [[...], ...]}
+
+    `values` a la forme (n_quantiles, n_lignes) : chaque véhicule reçoit la
+    liste de ses prix aux quantiles demandés, dans l'ordre de `quantiles`.
+    """
+    return json.dumps({
+        "prediction": np.asarray(prices, dtype=np.float64).tolist(),
+        "quantiles": list(quantiles),
+        "intervals": np.asarray(values, dtype=np.float64).T.tolist(),
+    }, separators=(',', ':')).encode()
+
+
+def encode_predictions(predictions, response_type):
+    """
+    Encode un vecteur de prédictions en binaire
+
+    Returns:
+        (octets, en-têtes HTTP)
+    """
+    predictions = np.ascontiguousarray(predictions, dtype='<f8')
+    headers = {'X-Shape': str(len(predictions)), 'X-Dtype': 'float64'}
+    if response_type == NPY_CONTENT_TYPE:
+        buffer = io.BytesIO()
+        np.save(buffer, predictions)
+        return buffer.getvalue(), headers
+    return predictions.tobytes(), headers
@@ -3,18 +3,80 @@
 API FastAPI pour prédire les prix optimaux de location de voitures
 """
 
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel, Field, field_validator, ConfigDict
-from typing import List, Dict, Any
-import joblib
+from fastapi import FastAPI, HTTPException, Query, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict, ValidationError
+from typing import List, Dict, Any, Literal, Optional
 import numpy as np
 import pandas as pd
+import asyncio
+import secrets
+import json
 import os
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
+from batching import MicroBatcher
+from cache import PredictionCache
+from metrics import BATCH_SIZE_BUCKETS, HTTPMetricsMiddleware, MetricsRegistry, resident_memory_bytes
+from registry import DEFAULT_MODEL, MODEL_EXTENSIONS, ModelRegistry, load_served_model
+from formats import (
+    BINARY_CONTENT_TYPES, BINARY_OPENAPI_CONTENT, JSON_CONTENT_TYPE,
+    clip_prices, decode_matrix, encode_json_intervals, encode_json_predictions, encode_predictions,
+    media_type, negotiate_response_type,
+)
+from streaming import CSV_CONTENT_TYPES, NDJSON_CONTENT_TYPES, RequestStreamingResponse, iter_row_chunks
+from validation import InputValidationError
+from workers import InferencePool, PoolSaturatedError
+
 # ===== CONFIGURATION =====
 MODEL_PATH = 'model.pkl'
+# Artefact mappé en mémoire exporté par `python artifact.py model.pkl model.forest`
+MODEL_ARTIFACT_PATH = 'model.forest'
+# Format chargé : "auto" (artefact s'il est à jour, sinon pickle), "mmap" ou "pickle" ;
+# avec l'artefact, le moteur sklearn charge model.pkl à sa première utilisation
+MODEL_FORMAT = os.getenv('MODEL_FORMAT', 'auto')
+# Dossier des versions chargeables à chaud via POST /models/{name}/load
+MODELS_DIR = os.getenv('MODELS_DIR', '.')
+# Jeton exigé (en-tête X-Admin-Token) par les endpoints d'administration des modèles
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+# Moteur d'inférence : "compiled" (tableaux NumPy), "sklearn" (model.predict) ou "auto"
+# (compilé jusqu'à COMPILED_MAX_ROWS lignes, sklearn au-delà : mesuré sur 1 CPU, le parcours
+# NumPy est ~20x plus rapide pour 1 ligne, à égalité vers 2000-3000 et ~1,5x plus lent à 10000)
+INFERENCE_ENGINE = os.getenv('INFERENCE_ENGINE', 'auto')
+COMPILED_MAX_ROWS = int(os.getenv('COMPILED_MAX_ROWS', '2000'))
+# Lecture des entrées JSON : "fast" (matrice NumPy directe) ou "pydantic"
+INPUT_VALIDATION = os.getenv('INPUT_VALIDATION', 'fast')
+# Refuser (422) les valeurs non finies, hors de {0, 1} ou négatives, quel que soit le
+# format d'entrée (voir check_input) ; désactivé par défaut, comme le contrat d'origine
+STRICT_INPUT = os.getenv('STRICT_INPUT', 'false').lower() in ('1', 'true', 'yes')
+# Replier le scaler dans le modèle au chargement (évite scaler.transform à chaque requête)
+FOLD_SCALER = os.getenv('FOLD_SCALER', 'true').lower() in ('1', 'true', 'yes')
+# Micro-batching : regroupe les requêtes concurrentes arrivées dans la fenêtre
+BATCHING_ENABLED = os.getenv('BATCHING_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+BATCH_WINDOW_MS = float(os.getenv('BATCH_WINDOW_MS', '2'))
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '256'))
+# Pool d'inférence : "thread", "process" (fork, modèle hérité) ou "none" (dans la boucle)
+INFERENCE_POOL = os.getenv('INFERENCE_POOL', 'thread')
+INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', str(min(4, os.cpu_count() or 1))))
+# Nombre maximal de prédictions en cours avant de répondre 503
+INFERENCE_MAX_PENDING = int(os.getenv('INFERENCE_MAX_PENDING', str(8 * INFERENCE_WORKERS)))
+# Cache LRU des prédictions (TTL en secondes, 0 = sans expiration)
+CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+CACHE_MAX_SIZE = int(os.getenv('CACHE_MAX_SIZE', '10000'))
+CACHE_TTL_SECONDS = float(os.getenv('CACHE_TTL_SECONDS', '0'))
+CACHE_DECIMALS = int(os.getenv('CACHE_DECIMALS', '6'))
+# Lots plus grands prédits sans passer par le cache (clés et recherche coûtent ~1 µs par ligne)
+CACHE_MAX_ROWS = int(os.getenv('CACHE_MAX_ROWS', '1000'))
+# Nombre de lignes prédites par bloc sur /predict/stream
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '2000'))
+# Quantiles renvoyés par défaut par /predict/interval (et nombre maximal par requête)
+INTERVAL_QUANTILES = os.getenv('INTERVAL_QUANTILES', '0.1,0.5,0.9')
+MAX_QUANTILES = int(os.getenv('MAX_QUANTILES', '20'))
+# Nombre maximal de valeurs d'une grille /predict/sweep
+SWEEP_MAX_POINTS = int(os.getenv('SWEEP_MAX_POINTS', '10000'))
 API_VERSION = "1.0.0"
 API_TITLE = "GetAround Pricing API"
 API_DESCRIPTION = """
@@ -54,68 +116,263 @@ app = FastAPI(
     },
 )
 
+# ===== MÉTRIQUES =====
+metrics = MetricsRegistry()
+http_requests = metrics.counter(
+    'getaround_http_requests_total', "Requêtes HTTP traitées", ('method', 'path', 'status')
+)
+http_errors = metrics.counter(
+    'getaround_http_errors_total', "Réponses HTTP en erreur (status >= 400)", ('path', 'status')
+)
+http_latency = metrics.histogram(
+    'getaround_http_request_duration_seconds', "Durée des requêtes HTTP", ('method', 'path')
+)
+predict_stage_latency = metrics.histogram(
+    'getaround_predict_stage_duration_seconds',
+    "Durée de chaque étape de /predict (parse, convert, validate, cache, inference, scaling, model, serialize)",
+    ('stage',)
+)
+explain_latency = metrics.histogram(
+    'getaround_explain_duration_seconds', "Durée du calcul des attributions de /explain"
+)
+predict_batch_rows = metrics.histogram(
+    'getaround_predict_batch_rows', "Nombre de véhicules par requête /predict", buckets=BATCH_SIZE_BUCKETS
+)
+
+# Compter les requêtes et mesurer leur durée par route
+app.add_middleware(
+    HTTPMetricsMiddleware,
+    requests=http_requests,
+    errors=http_errors,
+    latency=http_latency,
+)
+
 # ===== CHARGEMENT DU MODÈLE =====
-model_package = None
-model = None
-scaler = None
-feature_names = []
-model_metrics = {}
+
+# Cache des prédictions, vidé automatiquement quand la version par défaut change
+prediction_cache = PredictionCache(
+    max_size=CACHE_MAX_SIZE,
+    ttl=CACHE_TTL_SECONDS,
+    decimals=CACHE_DECIMALS,
+) if CACHE_ENABLED else None
+
+def release_model(served):
+    """Appelé quand une version remplacée n'a plus de requête en cours"""
+    print(f"♻️ Version {served.version} ({served.source}) libérée")
+
+# Versions publiées ("default", canaris...), remplaçables sans redémarrage
+registry = ModelRegistry(on_release=release_model)
+
+def use_artifact():
+    """Indique si le modèle doit être chargé depuis l'artefact mappé en mémoire"""
+    if MODEL_FORMAT == 'pickle':
+        return False
+    if not os.path.exists(MODEL_ARTIFACT_PATH):
+        if MODEL_FORMAT == 'mmap':
+            print(f"⚠️ Artefact introuvable : {MODEL_ARTIFACT_PATH}, chargement de {MODEL_PATH}")
+        return False
+    if (MODEL_FORMAT == 'auto' and os.path.exists(MODEL_PATH)
+            and os.path.getmtime(MODEL_PATH) > os.path.getmtime(MODEL_ARTIFACT_PATH)):
+        print(f"⚠️ {MODEL_ARTIFACT_PATH} est plus ancien que {MODEL_PATH}, artefact ignoré")
+        return False
+    return True
+
+def default_model_path():
+    """Fichier de la version par défaut (artefact mappé ou model.pkl)"""
+    return MODEL_ARTIFACT_PATH if use_artifact() else MODEL_PATH
+
+def load_model_version(path):
+    """Charge et préchauffe une version (bloquant : à exécuter hors de la boucle asyncio)"""
+    served = load_served_model(path, fold=FOLD_SCALER)
+    served.warm_up()
+    return served
+
+def publish_model(name, served):
+    """Publie une version chargée sous `name` et affiche son résumé"""
+    served = registry.publish(name, served)
+    if name == DEFAULT_MODEL and prediction_cache is not None:
+        prediction_cache.set_model_version(served.version)
+
+    print(f"✅ Modèle chargé avec succès ({name})")
+    print(f"   - Modèle : {served.model_name}")
+    print(f"   - Format : {'artefact mappé en mémoire' if served.format == 'mmap' else 'pickle'}")
+    print(f"   - Version : {served.version}")
+    print(f"   - Features : {len(served.feature_names)}")
+    print(f"   - R² : {served.metrics.get('r2_test', 'N/A')}")
+    if served.compiled_model is not None:
+        print(f"   - Moteur compilé : {served.compiled_model.n_trees} arbres, {served.compiled_model.n_nodes} nœuds")
+    if served.folded_model is not None:
+        print("   - Scaler replié dans le modèle")
+    return served
 
 def load_model():
     """Charge le modèle au démarrage de l'API"""
-    global model_package, model, scaler, feature_names, model_metrics
-
     try:
-        if not os.path.exists(MODEL_PATH):
-            print(f"❌ Fichier modèle introuvable : {MODEL_PATH}")
-            return False
-
-        model_package = joblib.load(MODEL_PATH)
-        model = model_package['model']
-        scaler = model_package['scaler']
-        feature_names = model_package['feature_names']
-        model_metrics = model_package.get('metrics', {})
-
-        print("✅ Modèle chargé avec succès")
-        print(f"   - Modèle : {model_package.get('model_name', 'Unknown')}")
-        print(f"   - Features : {len(feature_names)}")
-        print(f"   - R² : {model_metrics.get('r2_test', 'N/A')}")
+        publish_model(DEFAULT_MODEL, load_model_version(default_model_path()))
         return True
     except Exception as e:
         print(f"❌ Erreur lors du chargement du modèle : {e}")
         return False
 
+def run_model(X, engine=None, version=None, quantiles=None, sweep=None, explain=False):
+    """
+    Exécute scaler + modèle sur les features brutes avec le moteur demandé
+
+    `version` est le hash d'une version chargée (par défaut : la version
+    publiée sous "default"). Le moteur compilé utilise le modèle replié s'il
+    existe (pas de scaler.transform), sinon les arbres compilés. Le moteur
+    sklearn garde le chemin d'origine en deux étapes. Les étapes scaling/model
+    ne sont mesurées que dans ce processus (pas dans les workers d'un pool "process").
+
+    Avec `quantiles`, retourne `(prédictions, quantiles des arbres)` calculés
+    en un seul parcours des arbres compilés (voir /predict/interval). Avec
+    `sweep=(colonne, valeurs)`, X est un seul véhicule prédit pour chaque
+    valeur de la colonne (voir /predict/sweep). Avec `explain`, retourne
+    `(prédictions, valeur attendue, contributions)` (voir /explain).
+    """
+    served = registry.get_version(version) if version else registry.current()
+    if quantiles is not None:
+        return served.predict_quantiles(X, quantiles)
+    if sweep is not None:
+        return served.predict_sweep(X, *sweep)
+    if explain:
+        return served.explain(X)
+    engine = engine or default_engine(served, len(X))
+    if engine == 'compiled' and served.folded_model is not None:
+        with predict_stage_latency.time(stage='model'):
+            return served.folded_model.predict(X)
+
+    with predict_stage_latency.time(stage='scaling'):
+        X_scaled = served.scaler.transform(X)
+    with predict_stage_latency.time(stage='model'):
+        if engine == 'compiled' and served.compiled_model is not None:
+            return served.compiled_model.predict(X_scaled)
+        # Artefact mappé : model.pkl chargé au premier appel du moteur sklearn
+        return served.sklearn_model().predict(X_scaled)
+
+def default_engine(served, n_rows):
+    """
+    Moteur utilisé sans `engine` explicite
+
+    Avec INFERENCE_ENGINE=auto, les lots de plus de COMPILED_MAX_ROWS lignes
+    passent par sklearn si le modèle scikit-learn est disponible (chargé au
+    premier gros lot pour un artefact mappé), sinon par le moteur compilé.
+    """
+    if INFERENCE_ENGINE != 'auto':
+        return INFERENCE_ENGINE
+    if n_rows <= COMPILED_MAX_ROWS or served.compiled_model is None:
+        return 'compiled'
+    try:
+        served.sklearn_model()
+    except ValueError:
+        return 'compiled'
+    return 'sklearn'
+
+def acquire_model(name=None):
+    """Réserve la version publiée sous `name` pour la durée d'une requête (503/404 sinon)"""
+    try:
+        return registry.acquire(name)
+    except KeyError:
+        if name is None or name == DEFAULT_MODEL:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Modèle non chargé"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Modèle inconnu : {name} (voir /models)"
+        )
+
 # Charger le modèle au démarrage
 model_loaded = load_model()
 
+# Pool exécutant les prédictions hors de la boucle asyncio
+inference_pool = InferencePool(
+    run_model,
+    kind=INFERENCE_POOL,
+    workers=INFERENCE_WORKERS,
+    max_pending=INFERENCE_MAX_PENDING,
+)
+
+# Micro-batcher partagé par les requêtes /predict utilisant le moteur par défaut
+batcher = MicroBatcher(
+    inference_pool.run,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait=BATCH_WINDOW_MS / 1000,
+) if BATCHING_ENABLED else None
+
+# Jauges lues au moment de l'export /metrics
+metrics.gauge('getaround_inference_in_flight', "Prédictions en cours dans le pool", lambda: inference_pool.in_flight)
+metrics.gauge('getaround_inference_rejected', "Requêtes refusées (503) par le pool depuis le démarrage", lambda: inference_pool.rejected)
+metrics.gauge('getaround_batch_queue_depth', "Requêtes en attente dans le micro-batcher", lambda: batcher.queue_depth if batcher else 0)
+metrics.gauge('process_resident_memory_bytes', "Mémoire résidente du processus", resident_memory_bytes)
+metrics.gauge('getaround_models_loaded', "Versions du modèle en mémoire (publiées ou en fin d'utilisation)", lambda: registry.n_loaded)
+metrics.gauge('getaround_cache_hits', "Lignes servies par le cache depuis le démarrage", lambda: prediction_cache.hits if prediction_cache else 0)
+metrics.gauge('getaround_cache_misses', "Lignes absentes du cache depuis le démarrage", lambda: prediction_cache.misses if prediction_cache else 0)
+metrics.gauge('getaround_cache_size', "Entrées dans le cache", lambda: prediction_cache.get_stats()['size'] if prediction_cache else 0)
+
 # ===== MODÈLES PYDANTIC =====
 
 class PredictionInput(BaseModel):
-    """Format d'entrée pour la prédiction"""
+    """Format d'entrée pour la prédiction (positionnel via `input` ou nommé via `records`)"""
     model_config = ConfigDict(
         json_schema_extra={
-            "example": {
-                "input": [
-                    [3203, 109839, 135, 1, 1, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0]
-                ]
-            }
+            "examples": [
+                {
+                    "input": [
+                        [3203, 109839, 135, 1, 1, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0]
+                    ]
+                },
+                {
+                    "records": [
+                        {
+                            "model_key": "Renault", "mileage": 109839, "engine_power": 135,
+                            "fuel": "diesel", "paint_color": "black", "car_type": "estate",
+                            "private_parking_available": True, "has_gps": True,
+                            "has_air_conditioning": False, "automatic_car": False,
+                            "has_getaround_connect": True, "has_speed_regulator": False,
+                            "winter_tires": True
+                        }
+                    ]
+                }
+            ]
         }
     )
 
-    input: List[List[float]] = Field(
-        ...,
+    input: Optional[List[List[float]]] = Field(
+        None,
         description="Liste de listes de features. Chaque liste interne représente un véhicule à prédire."
     )
 
+    records: Optional[List[Dict[str, Any]]] = Field(
+        None,
+        description="Liste de véhicules décrits par leurs champs bruts (model_key, fuel, paint_color, car_type, mileage, ...). Voir /features."
+    )
+
     @field_validator('input')
     @classmethod
     def validate_input(cls, v):
+        if v is None:
+            return v
         if not v:
             raise ValueError("La liste d'input ne peut pas être vide")
         if not all(isinstance(item, list) for item in v):
             raise ValueError("Chaque élément doit être une liste")
         return v
 
+    @field_validator('records')
+    @classmethod
+    def validate_records(cls, v):
+        if v is not None and not v:
+            raise ValueError("La liste de records ne peut pas être vide")
+        return v
+
+    @model_validator(mode='after')
+    def check_one_format(self):
+        if (self.input is None) == (self.records is None):
+            raise ValueError("Fournir exactement un des champs 'input' ou 'records'")
+        return self
+
 class PredictionOutput(BaseModel):
     """Format de sortie pour la prédiction"""
     model_config = ConfigDict(
@@ -131,6 +388,138 @@ class PredictionOutput(BaseModel):
         description="Liste des prix prédits en euros par jour"
     )
 
+class IntervalOutput(BaseModel):
+    """Format de sortie des intervalles de prédiction"""
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "prediction": [138.29],
+                "quantiles": [0.1, 0.5, 0.9],
+                "intervals": [[112.4, 137.5, 166.02]]
+            }
+        }
+    )
+
+    prediction: List[float] = Field(
+        ...,
+        description="Liste des prix prédits en euros par jour (moyenne des arbres, comme /predict)"
+    )
+
+    quantiles: List[float] = Field(
+        ...,
+        description="Quantiles calculés, dans l'ordre des valeurs de `intervals`"
+    )
+
+    intervals: List[List[float]] = Field(
+        ...,
+        description="Pour chaque véhicule, le prix à chacun des quantiles demandés"
+    )
+
+class SweepInput(BaseModel):
+    """Véhicule de base et feature à faire varier pour /predict/sweep"""
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "input": [3203, 109839, 135, 1, 1, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0],
+                    "feature": "mileage",
+                    "start": 0,
+                    "stop": 300000,
+                    "num": 61
+                },
+                {
+                    "record": {
+                        "model_key": "Renault", "mileage": 109839, "engine_power": 135,
+                        "fuel": "diesel", "paint_color": "black", "car_type": "estate",
+                        "private_parking_available": True, "has_gps": True,
+                        "has_air_conditioning": False, "automatic_car": False,
+                        "has_getaround_connect": True, "has_speed_regulator": False,
+                        "winter_tires": True
+                    },
+                    "feature": "has_gps"
+                }
+            ]
+        }
+    )
+
+    input: Optional[List[float]] = Field(
+        None,
+        description="Véhicule de base : ses 56 features positionnelles"
+    )
+
+    record: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Véhicule de base décrit par ses champs bruts (comme `records` de /predict)"
+    )
+
+    feature: str = Field(
+        ...,
+        description="Nom de la feature à faire varier (voir /features), ex : mileage, engine_power, has_gps"
+    )
+
+    values: Optional[List[float]] = Field(
+        None,
+        description="Valeurs explicites de la feature"
+    )
+
+    start: Optional[float] = Field(None, description="Début de la grille régulière")
+    stop: Optional[float] = Field(None, description="Fin de la grille régulière (incluse)")
+    num: int = Field(50, ge=1, description="Nombre de points de la grille régulière")
+
+    @model_validator(mode='after')
+    def check_sweep(self):
+        if (self.input is None) == (self.record is None):
+            raise ValueError("Fournir exactement un des champs 'input' ou 'record'")
+        if self.values is not None and (self.start is not None or self.stop is not None):
+            raise ValueError("Fournir 'values' ou 'start'/'stop', pas les deux")
+        if (self.start is None) != (self.stop is None):
+            raise ValueError("'start' et 'stop' vont ensemble")
+        return self
+
+class SweepOutput(BaseModel):
+    """Courbe de prix en fonction d'une feature"""
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "feature": "has_gps",
+                "values": [0.0, 1.0],
+                "prediction": [131.4, 138.29]
+            }
+        }
+    )
+
+    feature: str = Field(..., description="Feature que l'on a fait varier")
+    values: List[float] = Field(..., description="Valeurs de la feature")
+    prediction: List[float] = Field(..., description="Prix prédit (euros par jour) pour chaque valeur")
+
+class ExplainOutput(BaseModel):
+    """Attributions par feature de chaque prédiction"""
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "prediction": [138.29],
+                "expected_value": 121.5,
+                "features": ["Unnamed: 0", "mileage", "engine_power", "..."],
+                "contributions": [[0.42, -6.13, 18.7, "..."]],
+                "top": [[{"feature": "engine_power", "value": 135.0, "contribution": 18.7}]],
+                "latency_ms": 31.2
+            }
+        }
+    )
+
+    prediction: List[float] = Field(..., description="Prix prédits en euros par jour")
+    expected_value: float = Field(..., description="Prix moyen du modèle (point de départ des contributions)")
+    features: List[str] = Field(..., description="Noms des features, dans l'ordre des contributions")
+    contributions: List[List[float]] = Field(
+        ...,
+        description="Pour chaque véhicule, contribution de chaque feature : expected_value + somme = prix prédit"
+    )
+    top: Optional[List[List[Dict[str, Any]]]] = Field(
+        None,
+        description="Avec ?top=k : les k features les plus influentes de chaque véhicule"
+    )
+    latency_ms: float = Field(..., description="Durée du calcul des attributions")
+
 class HealthResponse(BaseModel):
     """Réponse du health check"""
     model_config = ConfigDict(protected_namespaces=())
@@ -158,6 +547,11 @@ async def read_root():
     """
     Page d'accueil de l'API avec les liens principaux
     """
+    served = registry.current()
+    model_loaded = served is not None
+    model_metrics = served.metrics if model_loaded else {}
+    feature_names = served.feature_names if model_loaded else []
+
     html_content = f"""
     <!DOCTYPE html>
     <html>
@@ -285,12 +679,66 @@ async def read_root():
                 Prédire le prix d'un ou plusieurs véhicules
             </div>
 
+            <div class="endpoint">
+                <span class="method post">POST</span>
+                <strong>/predict/stream</strong><br>
+                Prédire toute une flotte en flux (NDJSON ou CSV)
+            </div>
+
+            <div class="endpoint">
+                <span class="method post">POST</span>
+                <strong>/predict/interval</strong><br>
+                Intervalle de prédiction (quantiles des arbres) par véhicule
+            </div>
+
+            <div class="endpoint">
+                <span class="method post">POST</span>
+                <strong>/predict/sweep</strong><br>
+                Courbe de prix quand une feature varie (kilométrage, options, ...)
+            </div>
+
+            <div class="endpoint">
+                <span class="method post">POST</span>
+                <strong>/explain</strong><br>
+                Contribution de chaque feature au prix prédit (TreeSHAP)
+            </div>
+
             <div class="endpoint">
                 <span class="method get">GET</span>
                 <strong>/health</strong><br>
                 Vérifier le statut de l'API
             </div>
 
+            <div class="endpoint">
+                <span class="method get">GET</span>
+                <strong>/models</strong><br>
+                Versions du modèle publiées (rechargement à chaud : POST /models/{{name}}/load)
+            </div>
+
+            <div class="endpoint">
+                <span class="method get">GET</span>
+                <strong>/metrics</strong><br>
+                Métriques Prometheus (requêtes, erreurs, latence par étape)
+            </div>
+
+            <div class="endpoint">
+                <span class="method get">GET</span>
+                <strong>/cache-stats</strong><br>
+                Statistiques du cache des prédictions
+            </div>
+
+            <div class="endpoint">
+                <span class="method get">GET</span>
+                <strong>/pool-stats</strong><br>
+                Statistiques du pool d'inférence
+            </div>
+
+            <div class="endpoint">
+                <span class="method get">GET</span>
+                <strong>/batching-stats</strong><br>
+                Statistiques du micro-batching des prédictions
+            </div>
+
             <div class="endpoint">
                 <span class="method get">GET</span>
                 <strong>/model-info</strong><br>
@@ -353,7 +801,8 @@ async def health_check():
         - api_version: Version de l'API
         - timestamp: Date et heure actuelles
     """
-    if not model_loaded or model is None:
+    served = registry.current()
+    if served is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Modèle non chargé. L'API n'est pas opérationnelle."
@@ -362,14 +811,106 @@ async def health_check():
     return HealthResponse(
         status="healthy",
         model_loaded=True,
-        model_name=model_package.get('model_name', 'Unknown'),
-        features_count=len(feature_names),
+        model_name=served.model_name,
+        features_count=len(served.feature_names),
         api_version=API_VERSION,
         timestamp=datetime.now().isoformat()
     )
 
-@app.post("/predict", response_model=PredictionOutput, tags=["Prediction"])
-async def predict(data: PredictionInput):
+async def compute_predictions(X, engine=None, version=None):
+    """Prédit X hors de la boucle (via le micro-batcher pour les petites requêtes)"""
+    # Refuser tout de suite si le pool d'inférence est saturé
+    inference_pool.check_capacity()
+
+    if batcher is not None and engine is None and len(X) < BATCH_MAX_SIZE:
+        return await batcher.submit(X, None, version)
+    return await inference_pool.run(X, engine, version)
+
+def body_errors(e):
+    """
+    Erreurs Pydantic au format des erreurs 422 de FastAPI pour le corps
+
+    Comme la validation d'un paramètre `data: PredictionInput` : loc préfixée
+    par "body" et `ctx.error` (une exception) convertie en texte.
+    """
+    errors = []
+    for error in e.errors(include_url=False):
+        error = {**error, 'loc': ('body', *error['loc'])}
+        if 'error' in error.get('ctx', {}):
+            error['ctx'] = {**error['ctx'], 'error': str(error['ctx']['error'])}
+        errors.append(error)
+    return errors
+
+async def read_prediction_input(request: Request, served):
+    """
+    Lit le corps de /predict selon son Content-Type
+
+    - JSON `input` (INPUT_VALIDATION=fast) : parsé directement en matrice ;
+      lignes de longueurs différentes signalées dans une erreur 422
+    - autre JSON : validé par PredictionInput (erreur 422 comme auparavant) ;
+      les `records` nommés sont vectorisés par le FeatureVectorizer
+    - application/octet-stream ou application/x-npy : matrice décodée sans copie
+
+    Toutes les matrices passent ensuite par check_input, quel que soit le
+    format ou le chemin de lecture.
+    """
+    content_type = media_type(request.headers.get('content-type')) or JSON_CONTENT_TYPE
+
+    with predict_stage_latency.time(stage='parse'):
+        body = await request.body()
+
+        X = None
+        if content_type in BINARY_CONTENT_TYPES:
+            X = decode_matrix(content_type, body, len(served.feature_names), request.headers)
+        elif INPUT_VALIDATION == 'fast':
+            try:
+                X = served.validator.parse(body)
+            except InputValidationError as e:
+                raise RequestValidationError(e.to_errors(), body=None)
+
+        if X is None:
+            try:
+                data = PredictionInput.model_validate_json(body)
+            except ValidationError as e:
+                raise RequestValidationError(body_errors(e), body=body)
+
+            with predict_stage_latency.time(stage='convert'):
+                if data.records is not None:
+                    X = served.vectorizer.transform(data.records)
+                else:
+                    X = np.array(data.input, dtype=np.float64)
+
+    with predict_stage_latency.time(stage='validate'):
+        return check_input(X, served)
+
+PREDICT_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            JSON_CONTENT_TYPE: {"schema": PredictionInput.model_json_schema()},
+            **BINARY_OPENAPI_CONTENT,
+        },
+    },
+}
+
+@app.post(
+    "/predict",
+    response_model=PredictionOutput,
+    tags=["Prediction"],
+    openapi_extra=PREDICT_OPENAPI,
+    responses={200: {"content": BINARY_OPENAPI_CONTENT}},
+)
+async def predict(
+    request: Request,
+    engine: Optional[Literal['compiled', 'sklearn']] = Query(
+        None,
+        description="Moteur d'inférence (par défaut : variable d'environnement INFERENCE_ENGINE)"
+    ),
+    model: Optional[str] = Query(
+        None,
+        description="Version publiée à utiliser (voir /models), par défaut : default"
+    )
+):
     """
     Effectue des prédictions de prix pour un ou plusieurs véhicules
 
@@ -388,6 +929,23 @@ async def predict(data: PredictionInput):
       has_air_conditioning, automatic_car, has_getaround_connect,
       has_speed_regulator, winter_tires, + 46 features one-hot encodées
 
+    **Input nommé** (sans encodage côté client) :
+    ```json
+    {
+        "records": [
+            {"model_key": "Renault", "fuel": "diesel", "paint_color": "black",
+             "car_type": "estate", "mileage": 109839, "engine_power": 135,
+             "private_parking_available": true, "has_gps": true, ...}
+        ]
+    }
+    ```
+    Les catégories inconnues (ou de référence) n'activent aucune colonne one-hot.
+    `Unnamed: 0` est facultatif (0 par défaut).
+
+    Avec `STRICT_INPUT=true`, les valeurs sont vérifiées quel que soit le
+    format : finies, booléens et one-hot dans {0, 1}, autres features
+    positives (erreur 422 listant les lignes fautives sinon).
+
     **Output Format:**
     ```json
     {
@@ -396,38 +954,46 @@ async def predict(data: PredictionInput):
     ```
 
     Les prix sont en euros par jour.
-    """
-    try:
-        # Vérifier que le modèle est chargé
-        if not model_loaded or model is None:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Modèle non chargé"
-            )
-
-        # Convertir en numpy array
-        X = np.array(data.input)
 
-        # Vérifier la shape
-        if X.shape[1] != len(feature_names):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Nombre de features incorrect. Attendu: {len(feature_names)}, Reçu: {X.shape[1]}"
-            )
-
-        # Standardiser
-        X_scaled = scaler.transform(X)
-
-        # Prédire
-        predictions = model.predict(X_scaled)
-
-        # Arrondir à 2 décimales et s'assurer que les prix sont positifs
-        predictions = [max(round(float(p), 2), 0) for p in predictions]
-
-        return PredictionOutput(prediction=predictions)
+    Le paramètre `engine` permet de choisir le moteur d'inférence :
+    `compiled` (arbres compilés en tableaux NumPy) ou `sklearn` (appel
+    direct à `model.predict`). Les deux moteurs donnent des prédictions
+    identiques. Le moteur compilé est beaucoup plus rapide pour quelques
+    véhicules (~0,2 ms contre ~7 ms pour 1 ligne), mais plus lent au-delà
+    de 2000-3000 lignes (~2x à 10000) : sans `engine`, les lots de plus de
+    COMPILED_MAX_ROWS lignes (2000) passent par sklearn. Préciser `engine`
+    contourne le cache des prédictions.
+
+    **Formats binaires** (pour les gros lots, sans parsing JSON) :
+    - `Content-Type: application/octet-stream` : matrice float64 (ou float32
+      avec `X-Dtype: float32`) little-endian, forme dans `X-Shape: n,56`
+    - `Content-Type: application/x-npy` : fichier `.npy` (np.save)
+
+    Avec `Accept: application/octet-stream` ou `application/x-npy`, les
+    prédictions sont renvoyées en float64 little-endian dans le même format.
+
+    Le paramètre `model` choisit une version publiée côte à côte (ex :
+    `?model=v2` pour un canari, voir `/models`). Une requête commencée
+    termine toujours avec la version qu'elle a réservée, même si un
+    rechargement a lieu entre-temps.
+    """
+    # Réserver la version demandée (503 si aucun modèle, 404 si nom inconnu)
+    with prediction_errors(), acquire_model(model) as served:
+        return await predict_with_model(request, served, engine)
 
-    except HTTPException:
+@contextmanager
+def prediction_errors():
+    """Traduit les erreurs d'une prédiction en réponses HTTP (503, 400 ou 500)"""
+    try:
+        yield
+    except (HTTPException, RequestValidationError):
         raise
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Serveur surchargé, réessayez plus tard : {str(e)}",
+            headers={"Retry-After": "1"}
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -439,6 +1005,430 @@ async def predict(data: PredictionInput):
             detail=f"Erreur lors de la prédiction: {str(e)}"
         )
 
+def check_feature_count(X, served):
+    """Vérifie la shape de la matrice de features (400 sinon)"""
+    n_features = len(served.feature_names)
+    if X.ndim != 2 or X.shape[1] != n_features:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Nombre de features incorrect. Attendu: {n_features}, Reçu: {X.shape[-1]}"
+        )
+
+def check_input(X, served):
+    """
+    Vérifie la shape (400) puis, avec STRICT_INPUT, les valeurs (422)
+
+    Valeurs finies, colonnes booléennes et one-hot dans {0, 1}, autres
+    features positives : toutes les lignes fautives dans une seule erreur
+    (voir InputValidator.check).
+    """
+    check_feature_count(X, served)
+    if not STRICT_INPUT:
+        return X
+    try:
+        return served.validator.check(X)
+    except InputValidationError as e:
+        raise RequestValidationError(e.to_errors(), body=None)
+
+async def predict_with_model(request: Request, served, engine=None):
+    """Corps de /predict pour une version réservée"""
+    # Lire l'entrée (JSON ou binaire) et le format de réponse demandé
+    X = await read_prediction_input(request, served)
+    response_type = negotiate_response_type(request.headers.get('accept'))
+
+    predict_batch_rows.observe(len(X))
+
+    # Servir depuis le cache les lignes déjà prédites, ne calculer que les autres
+    # (un moteur explicite ou un gros lot contourne le cache)
+    if prediction_cache is not None and engine is None and len(X) <= CACHE_MAX_ROWS:
+        with predict_stage_latency.time(stage='cache'):
+            predictions, missing, keys = prediction_cache.lookup(X, served.version)
+        if missing.any():
+            with predict_stage_latency.time(stage='inference'):
+                computed = await compute_predictions(X[missing], engine, served.version)
+            with predict_stage_latency.time(stage='cache'):
+                predictions[missing] = computed
+                prediction_cache.store([k for k, m in zip(keys, missing) if m], computed)
+    else:
+        with predict_stage_latency.time(stage='inference'):
+            predictions = await compute_predictions(X, engine, served.version)
+
+    with predict_stage_latency.time(stage='serialize'):
+        # Arrondir à 2 décimales et s'assurer que les prix sont positifs (sur tout le tableau)
+        prices = clip_prices(predictions)
+
+        if response_type in BINARY_CONTENT_TYPES:
+            content, headers = encode_predictions(prices, response_type)
+            return Response(content=content, media_type=response_type, headers=headers)
+
+        # JSON écrit directement : même schéma que PredictionOutput (documenté
+        # via response_model), sans validation Pydantic élément par élément
+        return Response(content=encode_json_predictions(prices), media_type=JSON_CONTENT_TYPE)
+
+def parse_quantiles(value):
+    """'0.1,0.5,0.9' -> (0.1, 0.5, 0.9) ; lève ValueError si la liste est invalide"""
+    try:
+        quantiles = tuple(float(q) for q in value.split(','))
+    except ValueError:
+        raise ValueError(f"Quantiles invalides : {value} (attendu : ex. 0.1,0.5,0.9)")
+    if not 0 < len(quantiles) <= MAX_QUANTILES:
+        raise ValueError(f"Entre 1 et {MAX_QUANTILES} quantiles attendus, reçu {len(quantiles)}")
+    if not all(0 <= q <= 1 for q in quantiles):
+        raise ValueError(f"Les quantiles doivent être compris entre 0 et 1 : {value}")
+    return quantiles
+
+@app.post(
+    "/predict/interval",
+    response_model=IntervalOutput,
+    tags=["Prediction"],
+    openapi_extra=PREDICT_OPENAPI,
+)
+async def predict_interval(
+    request: Request,
+    quantiles: Optional[str] = Query(
+        None,
+        description="Quantiles séparés par des virgules (par défaut : variable d'environnement INTERVAL_QUANTILES)"
+    ),
+    model: Optional[str] = Query(
+        None,
+        description="Version publiée à utiliser (voir /models), par défaut : default"
+    )
+):
+    """
+    Prédit le prix et un intervalle de prédiction pour chaque véhicule
+
+    Même entrée que `/predict` (JSON `input` / `records` ou binaire). Chacun
+    des arbres de la forêt aléatoire donne un prix : leurs quantiles forment
+    l'intervalle, calculés en un seul parcours vectorisé de tous les arbres
+    (le même que pour la prédiction moyenne).
+
+    **Output Format:**
+    ```json
+    {
+        "prediction": [138.29],
+        "quantiles": [0.1, 0.5, 0.9],
+        "intervals": [[112.4, 137.5, 166.02]]
+    }
+    ```
+
+    `?quantiles=0.05,0.95` choisit les quantiles renvoyés. Les prédictions ne
+    passent ni par le cache ni par le micro-batching.
+    """
+    with prediction_errors():
+        levels = parse_quantiles(quantiles or INTERVAL_QUANTILES)
+        with acquire_model(model) as served:
+            X = await read_prediction_input(request, served)
+            predictions, values = await inference_pool.run(X, None, served.version, levels)
+
+        content = encode_json_intervals(clip_prices(predictions), levels, clip_prices(values))
+        return Response(content=content, media_type=JSON_CONTENT_TYPE)
+
+def sweep_grid(data: SweepInput, served, column):
+    """Valeurs de la feature à prédire (0/1 par défaut pour une feature booléenne)"""
+    if data.values is not None:
+        grid = np.asarray(data.values, dtype=np.float64)
+    elif data.start is not None:
+        grid = np.linspace(data.start, data.stop, data.num)
+    elif served.validator.binary_mask[column]:
+        grid = np.array([0.0, 1.0])
+    else:
+        raise ValueError(f"Fournir 'values' ou 'start'/'stop' pour la feature {data.feature}")
+    if not 0 < len(grid) <= SWEEP_MAX_POINTS:
+        raise ValueError(f"Entre 1 et {SWEEP_MAX_POINTS} valeurs attendues, reçu {len(grid)}")
+    if not np.isfinite(grid).all():
+        raise ValueError("Les valeurs de la grille doivent être finies")
+    # Mêmes plages que les entrées de /predict (voir InputValidator)
+    if not STRICT_INPUT:
+        return grid
+    if served.validator.binary_mask[column] and not np.isin(grid, (0.0, 1.0)).all():
+        raise ValueError(f"La feature {data.feature} ne prend que les valeurs 0 et 1")
+    if not served.validator.binary_mask[column] and (grid < 0).any():
+        raise ValueError(f"Les valeurs de la grille doivent être positives pour {data.feature}")
+    return grid
+
+@app.post("/predict/sweep", response_model=SweepOutput, tags=["Prediction"])
+async def predict_sweep(
+    data: SweepInput,
+    model: Optional[str] = Query(
+        None,
+        description="Version publiée à utiliser (voir /models), par défaut : default"
+    )
+):
+    """
+    Courbe de prix d'un véhicule quand une seule de ses features varie
+
+    Exemple : comment évolue le prix avec le kilométrage, la puissance, ou
+    avec/sans GPS ? Au lieu d'envoyer des centaines de lignes presque
+    identiques à `/predict`, on envoie le véhicule de base et la grille.
+    Chaque arbre n'est parcouru qu'une fois pour toute la grille : seuls
+    les nœuds qui testent la feature font bifurquer le parcours.
+
+    **Input Format:**
+    ```json
+    {"input": [3203, 109839, 135, ...], "feature": "mileage", "start": 0, "stop": 300000, "num": 61}
+    ```
+    ou `"values": [50000, 100000, 150000]`, ou `"record": {...}` (champs bruts)
+    à la place de `input`. Sans grille, une feature booléenne prend les
+    valeurs 0 et 1.
+
+    **Output Format:**
+    ```json
+    {"feature": "mileage", "values": [0.0, 5000.0, ...], "prediction": [152.3, 150.9, ...]}
+    ```
+    """
+    with prediction_errors(), acquire_model(model) as served:
+        if data.feature not in served.feature_names:
+            raise ValueError(f"Feature inconnue : {data.feature} (voir /features)")
+        column = served.feature_names.index(data.feature)
+
+        if data.record is not None:
+            x = served.vectorizer.transform([data.record])
+        else:
+            x = np.array([data.input], dtype=np.float64)
+        check_input(x, served)
+        grid = sweep_grid(data, served, column)
+
+        predictions = await inference_pool.run(x, None, served.version, None, (column, grid))
+        content = json.dumps({
+            "feature": data.feature,
+            "values": grid.tolist(),
+            "prediction": clip_prices(predictions).tolist(),
+        }, separators=(',', ':')).encode()
+        return Response(content=content, media_type=JSON_CONTENT_TYPE)
+
+def top_contributions(X, contributions, feature_names, k):
+    """Les k contributions les plus fortes (en valeur absolue) de chaque ligne"""
+    order = np.argsort(-np.abs(contributions), axis=1, kind='stable')[:, :k]
+    return [
+        [
+            {"feature": feature_names[j], "value": float(x[j]), "contribution": round(float(c[j]), 4)}
+            for j in columns
+        ]
+        for x, c, columns in zip(X, contributions, order)
+    ]
+
+@app.post(
+    "/explain",
+    response_model=ExplainOutput,
+    tags=["Prediction"],
+    openapi_extra=PREDICT_OPENAPI,
+)
+async def explain_predictions(
+    request: Request,
+    top: Optional[int] = Query(
+        None, ge=1,
+        description="Ne détailler que les k features les plus influentes de chaque véhicule (champ `top`)"
+    ),
+    model: Optional[str] = Query(
+        None,
+        description="Version publiée à utiliser (voir /models), par défaut : default"
+    )
+):
+    """
+    Explique chaque prix prédit par la contribution de chaque feature
+
+    Même entrée que `/predict` (JSON `input` / `records` ou binaire). Les
+    contributions sont les valeurs de Shapley de la forêt (TreeSHAP) :
+    pour chaque véhicule, `expected_value` + la somme des contributions
+    redonne le prix prédit. Elles sont calculées exactement, en temps
+    polynomial, à partir des chemins des feuilles de la forêt compilée
+    (pas de perturbation des entrées).
+
+    **Output Format:**
+    ```json
+    {
+        "prediction": [138.29],
+        "expected_value": 121.5,
+        "features": ["Unnamed: 0", "mileage", ...],
+        "contributions": [[0.42, -6.13, ...]],
+        "latency_ms": 31.2
+    }
+    ```
+
+    `?top=5` ajoute, pour chaque véhicule, les 5 features les plus influentes
+    (nom, valeur, contribution), pour un affichage direct. Compter quelques
+    dizaines de millisecondes par véhicule ; le premier appel prépare en plus
+    les chemins des feuilles (~0,3 s).
+    """
+    with prediction_errors(), acquire_model(model) as served:
+        X = await read_prediction_input(request, served)
+
+        started = time.perf_counter()
+        predictions, expected_value, contributions = await inference_pool.run(
+            X, None, served.version, None, None, True
+        )
+        elapsed = time.perf_counter() - started
+        explain_latency.observe(elapsed)
+
+        result = {
+            "prediction": clip_prices(predictions).tolist(),
+            "expected_value": round(float(expected_value), 4),
+            "features": served.feature_names,
+            "contributions": np.round(contributions, 4).tolist(),
+            "latency_ms": round(elapsed * 1000, 2),
+        }
+        if top is not None:
+            result["top"] = top_contributions(X, contributions, served.feature_names, top)
+        return Response(content=json.dumps(result, separators=(',', ':')).encode(), media_type=JSON_CONTENT_TYPE)
+
+async def run_in_pool_with_retry(X, version):
+    """Prédit un bloc dans le pool, en attendant qu'une place se libère si besoin"""
+    while True:
+        try:
+            return await inference_pool.run(X, None, version)
+        except PoolSaturatedError:
+            await asyncio.sleep(0.01)
+
+async def stream_predictions(request: Request, fmt: str, model_name=None):
+    """Générateur NDJSON : un objet par véhicule, puis un résumé final"""
+    started = time.perf_counter()
+    n_rows = 0
+    try:
+        # La version est réservée pendant tout le flux
+        with registry.acquire(model_name) as served:
+            async for X, _ in iter_row_chunks(
+                request.stream(), fmt, served.feature_names, STREAM_CHUNK_SIZE,
+                check=served.validator.check if STRICT_INPUT else None
+            ):
+                predictions = clip_prices(await run_in_pool_with_retry(X, served.version))
+                n_rows += len(predictions)
+                yield ''.join(f'{{"prediction": {p}}}\n' for p in predictions.tolist())
+    except KeyError:
+        yield json.dumps({"error": f"Modèle inconnu : {model_name}", "rows": n_rows}, ensure_ascii=False) + "\n"
+        return
+    except ValueError as e:
+        yield json.dumps({"error": str(e), "rows": n_rows}, ensure_ascii=False) + "\n"
+        return
+
+    elapsed = time.perf_counter() - started
+    rows_per_sec = n_rows / elapsed if elapsed > 0 else 0.0
+    print(f"🌊 /predict/stream : {n_rows} lignes en {elapsed:.2f}s ({rows_per_sec:,.0f} lignes/s)")
+    yield json.dumps({"rows": n_rows, "seconds": round(elapsed, 4), "rows_per_sec": round(rows_per_sec, 1)}) + "\n"
+
+@app.post(
+    "/predict/stream",
+    tags=["Prediction"],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}, "example": "[3203, 109839, 135, ...]\n[1500, 50000, 200, ...]\n"},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        },
+    },
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def predict_stream(
+    request: Request,
+    model: Optional[str] = Query(None, description="Version publiée à utiliser (voir /models)")
+):
+    """
+    Prédiction en flux pour la tarification de toute la flotte
+
+    **Input Format** (lu au fil de l'eau, mémoire constante) :
+    - `Content-Type: application/x-ndjson` : une liste JSON de 56 features par ligne
+    - `Content-Type: text/csv` : 56 valeurs séparées par des virgules par ligne,
+      avec un en-tête optionnel (noms de `/features`, dans n'importe quel ordre)
+
+    Les lignes sont prédites par blocs de `STREAM_CHUNK_SIZE` et les résultats
+    renvoyés dès qu'un bloc est prêt.
+
+    **Output Format** (NDJSON) :
+    ```
+    {"prediction": 138.29}
+    {"prediction": 152.1}
+    ...
+    {"rows": 2, "seconds": 0.01, "rows_per_sec": 200.0}
+    ```
+
+    En cas de ligne invalide, un objet `{"error": ..., "rows": n}` termine le flux
+    (`rows` = nombre de prédictions déjà envoyées).
+    """
+    # Vérifier la version avant de commencer à répondre (503 / 404)
+    with acquire_model(model):
+        pass
+
+    content_type = media_type(request.headers.get('content-type'))
+    if content_type in CSV_CONTENT_TYPES:
+        fmt = 'csv'
+    elif content_type in NDJSON_CONTENT_TYPES or not content_type:
+        fmt = 'ndjson'
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Type non supporté : {content_type} (attendu : application/x-ndjson ou text/csv)"
+        )
+
+    return RequestStreamingResponse(stream_predictions(request, fmt, model), media_type="application/x-ndjson")
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Monitoring"])
+async def get_metrics():
+    """
+    Métriques au format texte Prometheus
+
+    - getaround_http_requests_total / getaround_http_errors_total : requêtes par route et status
+    - getaround_http_request_duration_seconds : latence par route
+    - getaround_predict_stage_duration_seconds : latence de /predict par étape
+      (parse, convert, validate, cache, inference, scaling, model, serialize)
+    - getaround_predict_batch_rows : nombre de véhicules par requête
+    - jauges du pool d'inférence, du micro-batcher et du cache
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache-stats", tags=["Monitoring"])
+async def get_cache_stats():
+    """
+    Statistiques du cache des prédictions
+
+    Returns:
+        - size / max_size: nombre d'entrées et capacité
+        - hits / misses / hit_rate: lignes servies depuis le cache ou calculées
+        - evictions: entrées évincées (LRU)
+        - expirations: entrées expirées (TTL)
+        - invalidations: vidages suite au chargement d'un autre modèle
+    """
+    if prediction_cache is None:
+        return {"enabled": False}
+
+    return {"enabled": True, **prediction_cache.get_stats()}
+
+@app.get("/pool-stats", tags=["Monitoring"])
+async def get_pool_stats():
+    """
+    Statistiques du pool d'inférence
+
+    Returns:
+        - kind: type de pool (thread, process, none)
+        - workers: nombre de workers
+        - max_pending: nombre maximal de prédictions en cours avant 503
+        - in_flight: prédictions en cours
+        - rejected: requêtes refusées (503) depuis le démarrage
+    """
+    return inference_pool.get_stats()
+
+@app.get("/batching-stats", tags=["Monitoring"])
+async def get_batching_stats():
+    """
+    Statistiques du micro-batching de /predict
+
+    Returns:
+        - enabled: True si le micro-batching est actif
+        - window_ms / max_batch_size: configuration
+        - queue_depth: requêtes en attente dans la file
+        - batch_size_histogram: nombre de lots par taille (en lignes)
+        - avg_wait_ms / max_wait_ms: temps d'attente avant exécution du lot
+    """
+    if batcher is None:
+        return {"enabled": False}
+
+    return {
+        "enabled": True,
+        "window_ms": BATCH_WINDOW_MS,
+        "max_batch_size": BATCH_MAX_SIZE,
+        **batcher.get_stats()
+    }
+
 @app.get("/model-info", response_model=ModelInfoResponse, tags=["Model"])
 async def get_model_info():
     """
@@ -450,17 +1440,18 @@ async def get_model_info():
         - metrics: Métriques de performance (R², RMSE, MAE, MAPE)
         - feature_names: Liste complète des features
     """
-    if not model_loaded or model is None:
+    served = registry.current()
+    if served is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Modèle non chargé"
         )
 
     return ModelInfoResponse(
-        model_name=model_package.get('model_name', 'Unknown'),
-        features_count=len(feature_names),
-        metrics=model_metrics,
-        feature_names=feature_names
+        model_name=served.model_name,
+        features_count=len(served.feature_names),
+        metrics=served.metrics,
+        feature_names=served.feature_names
     )
 
 @app.get("/features", tags=["Model"])
@@ -470,37 +1461,146 @@ async def get_features():
 
     Utile pour construire les inputs de prédiction correctement.
     """
-    if not model_loaded or model is None:
+    served = registry.current()
+    if served is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Modèle non chargé"
         )
 
     return {
-        "features": feature_names,
-        "count": len(feature_names),
-        "description": "Liste des 56 features attendues dans l'ordre exact pour /predict"
+        "features": served.feature_names,
+        "count": len(served.feature_names),
+        "description": "Liste des 56 features attendues dans l'ordre exact pour /predict",
+        "named_input": served.vectorizer.describe()
     }
 
 @app.get("/version", tags=["Info"])
 async def get_version():
     """Retourne la version de l'API"""
+    served = registry.current()
+    compiled = served is not None and served.compiled_model is not None
     return {
         "api_version": API_VERSION,
-        "model_version": model_package.get('model_name', 'Unknown') if model_loaded else None,
+        "model_version": served.model_name if served is not None else None,
+        "model_hash": served.version if served is not None else None,
+        "inference_engine": INFERENCE_ENGINE if compiled else 'sklearn',
         "python_version": f"{os.sys.version_info.major}.{os.sys.version_info.minor}.{os.sys.version_info.micro}"
     }
 
+# ===== GESTION DES MODÈLES =====
+
+# Un seul chargement à la fois (le chargement lui-même tourne hors de la boucle)
+reload_lock = asyncio.Lock()
+
+def check_admin_token(request: Request):
+    """Exige l'en-tête X-Admin-Token si ADMIN_TOKEN est défini"""
+    if ADMIN_TOKEN and not secrets.compare_digest(request.headers.get('x-admin-token', ''), ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Jeton d'administration invalide"
+        )
+
+def resolve_model_path(filename):
+    """Chemin d'un fichier de MODELS_DIR (.pkl ou .forest), sans sortir du dossier"""
+    if os.path.basename(filename) != filename or not filename.endswith(MODEL_EXTENSIONS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Nom de fichier invalide : {filename} (fichier {' ou '.join(MODEL_EXTENSIONS)} de MODELS_DIR)"
+        )
+    return os.path.join(MODELS_DIR, filename)
+
+@app.get("/models", tags=["Model"])
+async def list_models():
+    """
+    Liste les versions publiées (nom -> version) et leurs requêtes en cours
+
+    Une version remplacée reste en mémoire jusqu'à la fin de sa dernière requête.
+    """
+    return registry.describe()
+
+@app.post("/models/{name}/load", tags=["Model"])
+async def load_model_endpoint(
+    name: str,
+    request: Request,
+    path: Optional[str] = Query(
+        None,
+        description="Fichier .pkl ou .forest de MODELS_DIR (par défaut pour \"default\" : model.forest / model.pkl)"
+    )
+):
+    """
+    Charge une version en arrière-plan, la préchauffe puis la publie sous `name`
+
+    - `default` : remplace la version servie par défaut, sans redémarrage
+    - autre nom (ex : `v2`) : version servie côte à côte via `/predict?model=v2`
+
+    Les requêtes en cours terminent avec l'ancienne version, qui est libérée
+    ensuite. Protégé par l'en-tête `X-Admin-Token` si `ADMIN_TOKEN` est défini.
+    """
+    check_admin_token(request)
+    if path is None:
+        if name != DEFAULT_MODEL:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Paramètre `path` requis pour publier une autre version que default"
+            )
+        source = default_model_path()
+    else:
+        source = resolve_model_path(path)
+
+    async with reload_lock:
+        started = time.perf_counter()
+        try:
+            loaded = await asyncio.get_running_loop().run_in_executor(None, load_model_version, source)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Chargement de {source} impossible : {str(e)}"
+            )
+        served = publish_model(name, loaded)
+        # Les workers d'un pool de processus sont recréés avec le registre à jour
+        inference_pool.restart()
+
+    return {
+        "name": name,
+        "load_seconds": round(time.perf_counter() - started, 3),
+        **served.describe()
+    }
+
+@app.delete("/models/{name}", tags=["Model"])
+async def unload_model(name: str, request: Request):
+    """Retire une version publiée côte à côte (la version default ne peut pas être retirée)"""
+    check_admin_token(request)
+    if name == DEFAULT_MODEL:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La version default ne peut pas être retirée (la recharger à la place)"
+        )
+    try:
+        registry.unpublish(name)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Modèle inconnu : {name} (voir /models)"
+        )
+    return registry.describe()
+
 # ===== GESTION DES ERREURS =====
 
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    """Handler pour les routes non trouvées"""
-    return {
-        "error": "Endpoint non trouvé",
-        "detail": "Consultez /docs pour la liste des endpoints disponibles",
-        "path": str(request.url)
-    }
+    """Handler pour les routes (ou versions de modèle) non trouvées"""
+    detail = getattr(exc, 'detail', None)
+    if not detail or detail == "Not Found":
+        detail = "Consultez /docs pour la liste des endpoints disponibles"
+    return JSONResponse(
+        status_code=status.HTTP_404_NOT_FOUND,
+        content={
+            "error": "Endpoint non trouvé",
+            "detail": detail,
+            "path": str(request.url)
+        }
+    )
 
 # ===== ÉVÉNEMENTS =====
 
@@ -510,10 +1610,11 @@ async def startup_event():
     print("="*80)
     print(f"🚀 {API_TITLE} v{API_VERSION}")
     print("="*80)
-    if model_loaded:
+    served = registry.current()
+    if served is not None:
         print("✅ API prête à recevoir des requêtes")
-        print(f"📊 Modèle : {model_package.get('model_name', 'Unknown')}")
-        print(f"🎯 R² Score : {model_metrics.get('r2_test', 'N/A')}")
+        print(f"📊 Modèle : {served.model_name}")
+        print(f"🎯 R² Score : {served.metrics.get('r2_test', 'N/A')}")
     else:
         print("⚠️ ATTENTION : Modèle non chargé !")
     print("="*80)
@@ -521,6 +1622,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Événement à l'arrêt de l'API"""
+    inference_pool.shutdown()
     print("\n👋 Arrêt de l'API GetAround")
 
 # ===== POINT D'ENTRÉE =====
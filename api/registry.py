@@ -0,0 +1,323 @@
+"""
+🗂️ GetAround - Registre des modèles servis
+Charge une version du modèle hors de la boucle asyncio, la préchauffe puis la
+publie de façon atomique sous un nom ("default", "v2", ...). Plusieurs
+versions peuvent être servies côte à côte et une version remplacée est
+libérée dès que sa dernière requête en cours se termine.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+
+from artifact import ModelArtifact
+from explain import TreeExplainer
+from folding import fold_scaler
+from forest import compile_model
+from validation import InputValidator
+from vectorizer import FeatureVectorizer
+
+# Nom sous lequel est publiée la version servie par défaut
+DEFAULT_MODEL = 'default'
+
+# Extensions des fichiers chargeables
+MODEL_EXTENSIONS = ('.pkl', '.forest')
+
+
+class ServedModel:
+    """
+    Une version chargée du modèle et tout ce qui en dépend
+
+    `version` est le hash du model.pkl d'origine : il identifie la version
+    dans le cache des prédictions et dans les workers du pool de processus.
+    `active` compte les requêtes en cours qui utilisent cette version.
+    Pour un artefact, `model` vaut None et `pickle_path` désigne le
+    model.pkl d'origine, chargé au premier appel du moteur sklearn.
+    """
+
+    def __init__(self, version, model_package, model, scaler, compiled_model, folded_model, source,
+                 pickle_path=None):
+        self.version = version
+        self.model_package = model_package
+        self.model = model
+        self.scaler = scaler
+        self.compiled_model = compiled_model
+        self.folded_model = folded_model
+        self.source = source
+        self.pickle_path = pickle_path
+        self._model_lock = threading.Lock()
+        # Message mémorisé quand model.pkl ne correspond pas (évite de le hacher à chaque appel)
+        self._sklearn_error = None
+        self.model_name = model_package.get('model_name', 'Unknown')
+        self.feature_names = list(model_package['feature_names'])
+        self.metrics = model_package.get('metrics', {})
+        # Vectoriseur des entrées nommées (catégorie -> colonne one-hot)
+        self.vectorizer = FeatureVectorizer(self.feature_names)
+        # Règles de validation rapide des entrées positionnelles
+        self.validator = InputValidator(self.feature_names)
+        self.loaded_at = time.time()
+        self.active = 0
+        # Explicateur TreeSHAP construit au premier appel de /explain (mémoire non négligeable)
+        self._explainer = None
+        self._explainer_lock = threading.Lock()
+
+    @property
+    def format(self):
+        return 'mmap' if self.source.endswith('.forest') else 'pickle'
+
+    def sklearn_model(self):
+        """
+        Modèle scikit-learn (moteur sklearn), ValueError si indisponible
+
+        Pour un artefact mappé, charge `pickle_path` au premier appel après
+        avoir vérifié qu'il s'agit bien du model.pkl dont l'artefact est issu.
+        """
+        with self._model_lock:
+            if self.model is None:
+                if self.pickle_path is None or not os.path.exists(self.pickle_path):
+                    raise ValueError(
+                        f"Moteur sklearn indisponible : {self.pickle_path or 'model.pkl'} introuvable "
+                        "à côté de l'artefact mappé en mémoire"
+                    )
+                if self._sklearn_error is not None:
+                    raise ValueError(self._sklearn_error)
+                # Version des artefacts compressés : "<hash>-<niveau>"
+                if file_version(self.pickle_path) != self.version.split('-')[0]:
+                    self._sklearn_error = (
+                        f"Moteur sklearn indisponible : {self.pickle_path} ne correspond pas à l'artefact {self.source}"
+                    )
+                    raise ValueError(self._sklearn_error)
+                self.model = joblib.load(self.pickle_path)['model']
+                print(f"📦 Modèle scikit-learn chargé depuis {self.pickle_path} (moteur sklearn)")
+            return self.model
+
+    def warm_up(self):
+        """
+        Prédit quelques lignes avec chaque moteur disponible avant publication
+
+        Charge les pages des tableaux mappés et fait échouer le chargement
+        (plutôt que les requêtes) si la version est inutilisable.
+        """
+        X = np.zeros((8, len(self.feature_names)))
+        X_scaled = self.scaler.transform(X)
+        outputs = []
+        if self.folded_model is not None:
+            outputs.append(self.folded_model.predict(X))
+        if self.compiled_model is not None:
+            outputs.append(self.compiled_model.predict(X_scaled))
+        if self.model is not None:
+            outputs.append(self.model.predict(X_scaled))
+        for predictions in outputs:
+            if predictions.shape != (len(X),) or not np.isfinite(predictions).all():
+                raise ValueError("Préchauffage : prédictions invalides")
+
+    def predict_quantiles(self, X, quantiles):
+        """Prédiction et quantiles des sorties des arbres (moteur compilé uniquement)"""
+        # Vérifier d'abord : un modèle linéaire peut avoir un folded_model (FoldedLinearModel)
+        if self.compiled_model is None:
+            raise ValueError("Intervalles indisponibles : modèle non compilé en arbres")
+        if self.folded_model is not None:
+            return self.folded_model.predict_quantiles(X, quantiles)
+        return self.compiled_model.predict_quantiles(self.scaler.transform(X), quantiles)
+
+    def predict_sweep(self, x, column, grid):
+        """
+        Prédiction du véhicule `x` pour chaque valeur `grid` de la colonne `column`
+
+        Parcours partagé des arbres compilés ; pour un autre modèle, prédit
+        simplement les copies de `x` empilées.
+        """
+        if self.compiled_model is not None and self.folded_model is not None:
+            return self.folded_model.predict_sweep(x, column, grid)
+        X = np.repeat(np.reshape(x, (1, -1)).astype(np.float64), len(grid), axis=0)
+        X[:, column] = grid
+        if self.folded_model is not None:
+            return self.folded_model.predict(X)
+        X_scaled = self.scaler.transform(X)
+        if self.compiled_model is not None:
+            return self.compiled_model.predict_sweep(X_scaled[0], column, X_scaled[:, column])
+        return self.model.predict(X_scaled)
+
+    def explainer(self):
+        """TreeExplainer de la forêt compilée (repliée de préférence), ValueError si indisponible"""
+        with self._explainer_lock:
+            if self._explainer is None:
+                if self.compiled_model is None:
+                    raise ValueError("Attributions indisponibles : modèle non compilé en arbres")
+                self._explainer = TreeExplainer(self.folded_model or self.compiled_model)
+            return self._explainer
+
+    def explain(self, X):
+        """
+        Attributions TreeSHAP par feature
+
+        Returns:
+            (prédictions, valeur attendue, contributions (n_lignes, n_features))
+        """
+        explainer = self.explainer()
+        if explainer.forest is not self.folded_model:
+            X = self.scaler.transform(X)
+        return explainer.forest.predict(X), explainer.expected_value, explainer.shap_values(X)
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "model_name": self.model_name,
+            "format": self.format,
+            "compression": self.model_package.get('compression', {}).get('tier', 'full'),
+            "source": self.source,
+            "features_count": len(self.feature_names),
+            "compiled": self.compiled_model is not None,
+            "scaler_folded": self.folded_model is not None,
+            "loaded_at": time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.loaded_at)),
+            "active_requests": self.active,
+        }
+
+
+def file_version(path):
+    """Version d'un model.pkl : début du sha256 du fichier"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def load_pickle(path, fold=True):
+    """Charge un model_package joblib, le compile et replie le scaler si possible"""
+    version = file_version(path)
+    model_package = joblib.load(path)
+    model = model_package['model']
+    scaler = model_package['scaler']
+
+    # Compiler les arbres en tableaux NumPy (None si le modèle n'est pas à base d'arbres)
+    compiled_model = compile_model(model)
+
+    # Replier le scaler dans les seuils (arbres) ou les coefficients (linéaire)
+    folded_model = fold_scaler(model, compiled_model, scaler) if fold else None
+
+    return ServedModel(version, model_package, model, scaler, compiled_model, folded_model, path)
+
+
+def load_artifact(path, fold=True, pickle_path=None):
+    """
+    Ouvre un artefact mappé en mémoire (sans modèle scikit-learn)
+
+    Le moteur sklearn chargera `pickle_path` à la demande (par défaut : le
+    .pkl de même nom, ex. model.forest -> model.pkl).
+    """
+    artifact = ModelArtifact(path)
+    return ServedModel(
+        artifact.model_version,
+        artifact.model_package(),
+        None,
+        artifact.scaler(),
+        artifact.compiled_forest(),
+        artifact.compiled_forest(folded=True) if fold else None,
+        path,
+        pickle_path or os.path.splitext(path)[0] + '.pkl',
+    )
+
+
+def load_served_model(path, fold=True):
+    """Charge une version selon l'extension du fichier (.forest : artefact, sinon pickle)"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Fichier modèle introuvable : {path}")
+    if path.endswith('.forest'):
+        return load_artifact(path, fold)
+    return load_pickle(path, fold)
+
+
+class ModelRegistry:
+    """
+    Versions publiées par nom, avec comptage des requêtes en cours
+
+    - `publish` remplace la version d'un nom de façon atomique : les requêtes
+      déjà commencées terminent avec l'ancienne version
+    - `acquire` réserve la version d'un nom pour la durée d'une requête
+    - une version qui n'est plus publiée est libérée (callback `on_release`)
+      quand son compteur de requêtes retombe à 0
+    """
+
+    def __init__(self, on_release=None):
+        self.on_release = on_release
+        self._lock = threading.Lock()
+        self._names = {}
+        self._versions = {}
+        self.publications = 0
+        self.releases = 0
+
+    def publish(self, name, served):
+        """Publie `served` sous `name` et retourne la version effectivement servie"""
+        with self._lock:
+            # Même fichier déjà chargé sous un autre nom : partager l'instance
+            served = self._versions.setdefault(served.version, served)
+            previous = self._names.get(name)
+            self._names[name] = served
+            self.publications += 1
+            if previous is not None and previous is not served:
+                self._release_if_unused(previous)
+        return served
+
+    def unpublish(self, name):
+        """Retire un nom ; lève KeyError s'il n'est pas publié"""
+        with self._lock:
+            served = self._names.pop(name)
+            self._release_if_unused(served)
+
+    def current(self, name=None):
+        """Version publiée sous `name` (défaut : DEFAULT_MODEL), None si absente"""
+        return self._names.get(name or DEFAULT_MODEL)
+
+    def get_version(self, version):
+        """Version chargée identifiée par son hash (publiée ou encore utilisée)"""
+        try:
+            return self._versions[version]
+        except KeyError:
+            raise KeyError(f"Version de modèle inconnue : {version}")
+
+    def acquire(self, name=None):
+        """
+        Réserve la version publiée sous `name`, à utiliser avec `with`
+
+        Lève KeyError immédiatement si le nom n'est pas publié.
+        """
+        with self._lock:
+            served = self._names[name or DEFAULT_MODEL]
+            served.active += 1
+        return self._lease(served)
+
+    @contextmanager
+    def _lease(self, served):
+        try:
+            yield served
+        finally:
+            with self._lock:
+                served.active -= 1
+                self._release_if_unused(served)
+
+    def _release_if_unused(self, served):
+        """À appeler sous le verrou : libère une version ni publiée ni utilisée"""
+        if served.active > 0 or any(s is served for s in self._names.values()):
+            return
+        if self._versions.get(served.version) is served:
+            del self._versions[served.version]
+            self.releases += 1
+            if self.on_release is not None:
+                self.on_release(served)
+
+    @property
+    def n_loaded(self):
+        return len(self._versions)
+
+    def describe(self):
+        with self._lock:
+            return {
+                "default": DEFAULT_MODEL,
+                "models": {name: served.describe() for name, served in self._names.items()},
+                "loaded_versions": len(self._versions),
+                "publications": self.publications,
+                "releases": self.releases,
+            }
@@ -0,0 +1,170 @@
+"""
+🌊 GetAround - Prédiction en flux
+Lit un corps NDJSON ou CSV au fil de l'eau et le découpe en matrices de
+taille fixe, pour prédire une flotte entière à mémoire constante
+"""
+
+import json
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from validation import MAX_REPORTED_ROWS, InputValidationError
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+CSV_CONTENT_TYPES = ('text/csv', 'application/csv')
+
+
+async def iter_lines(byte_stream):
+    """
+    Découpe un flux d'octets en lignes non vides (sans charger tout le corps)
+
+    La fin de ligne incomplète est gardée en morceaux, assemblés une seule
+    fois au prochain saut de ligne : une longue ligne reçue en plusieurs
+    chunks n'est pas recopiée à chaque chunk.
+    """
+    pieces = []
+    async for chunk in byte_stream:
+        if b'\n' not in chunk:
+            pieces.append(chunk)
+            continue
+        lines = chunk.split(b'\n')
+        if pieces:
+            lines[0] = b''.join(pieces) + lines[0]
+        pieces = [lines.pop()]
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield line
+    pending = b''.join(pieces).strip()
+    if pending:
+        yield pending
+
+
+def _parse_ndjson(lines, start, n_features):
+    """
+    Chaque ligne doit être une seule liste JSON plate de n_features nombres
+
+    Lues une par une : une ligne comme `1,2],[3,4` est refusée au lieu
+    d'être découpée en deux véhicules.
+    """
+    rows = []
+    for i, line in enumerate(lines):
+        try:
+            row = json.loads(line)
+        except ValueError:
+            raise ValueError(f"Ligne {start + i} : JSON invalide")
+        if not isinstance(row, list) or len(row) != n_features or not all(
+            isinstance(v, (int, float)) and not isinstance(v, bool) for v in row
+        ):
+            raise ValueError(f"Ligne {start + i} : liste de {n_features} nombres attendue")
+        rows.append(row)
+    return np.array(rows, dtype=np.float64)
+
+
+def _parse_csv(lines, start, n_features):
+    try:
+        return np.array([line.split(b',') for line in lines], dtype=np.float64)
+    except ValueError as e:
+        raise ValueError(f"Lignes {start}-{start + len(lines) - 1} invalides : {e}")
+
+
+def _csv_header_order(line, feature_names):
+    """
+    Retourne l'ordre des colonnes si la ligne est un en-tête CSV, sinon None
+
+    L'en-tête doit contenir exactement les features du modèle, dans n'importe
+    quel ordre : les colonnes sont alors réordonnées selon feature_names.
+    """
+    try:
+        [float(v) for v in line.split(b',')]
+        return None
+    except ValueError:
+        pass
+
+    columns = [c.strip().strip('"') for c in line.decode('utf-8').split(',')]
+    if sorted(columns) != sorted(feature_names):
+        raise ValueError("L'en-tête CSV doit contenir exactement les features du modèle (voir /features)")
+    position = {name: i for i, name in enumerate(columns)}
+    return np.array([position[name] for name in feature_names])
+
+
+async def iter_row_chunks(byte_stream, fmt, feature_names, chunk_size, check=None):
+    """
+    Produit des blocs (X, première_ligne) de `chunk_size` lignes au plus
+
+    Args:
+        byte_stream: flux asynchrone d'octets (request.stream())
+        fmt: "ndjson" ou "csv"
+        feature_names: features attendues, dans l'ordre du modèle
+        chunk_size: nombre de lignes par bloc
+        check: vérification des valeurs de chaque bloc (InputValidator.check)
+
+    Chaque bloc est converti (json.loads ligne par ligne, vérifications) dans
+    le pool de threads de Starlette, pour ne pas bloquer la boucle asyncio
+    pendant un gros flux. Lève ValueError (avec les numéros de ligne) si un
+    bloc est invalide.
+    """
+    parse = _parse_csv if fmt == 'csv' else _parse_ndjson
+    column_order = None
+    first_line = True
+    line_number = 0
+    block = []
+
+    def convert(block, start):
+        X = parse(block, start, len(feature_names))
+        if X.ndim != 2 or X.shape[1] != len(feature_names):
+            raise ValueError(
+                f"Lignes {start}-{start + len(block) - 1} : {len(feature_names)} features attendues"
+            )
+        if column_order is not None:
+            X = X[:, column_order]
+        if check is not None:
+            try:
+                check(X)
+            except InputValidationError as e:
+                # Indices du bloc convertis en numéros de ligne du corps
+                raise ValueError(" ; ".join(
+                    f"{message} (lignes {', '.join(str(start + i) for i in rows[:MAX_REPORTED_ROWS])})"
+                    for message, rows in e.errors
+                ))
+        return X
+
+    async for line in iter_lines(byte_stream):
+        line_number += 1
+        if first_line:
+            first_line = False
+            if fmt == 'csv':
+                column_order = _csv_header_order(line, feature_names)
+                if column_order is not None:
+                    continue
+        block.append(line)
+        if len(block) >= chunk_size:
+            start = line_number - len(block) + 1
+            yield await run_in_threadpool(convert, block, start), start
+            block = []
+
+    if block:
+        start = line_number - len(block) + 1
+        yield await run_in_threadpool(convert, block, start), start
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse dont le générateur lit lui-même le corps de la requête
+
+    La StreamingResponse standard écoute `http.disconnect` en parallèle sur
+    certains serveurs ASGI, ce qui consommerait les messages du corps encore
+    en cours de lecture. Ici, une déconnexion est détectée par request.stream()
+    (ClientDisconnect) ou à l'envoi (OSError).
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
@@ -5,6 +5,7 @@ Teste tous les endpoints de l'API
 
 import requests
 import json
+import struct
 
 # Configuration
 BASE_URL = "http://localhost:8000"
@@ -15,6 +16,18 @@ def print_header(title):
     print(f"🧪 {title}")
     print("="*80)
 
+def test_metrics():
+    """Affiche les métriques Prometheus (format texte) liées à /predict"""
+    print("\n📍 GET /metrics")
+    try:
+        response = requests.get(f"{BASE_URL}/metrics")
+        print(f"   Status: {response.status_code}")
+        for line in response.text.splitlines():
+            if line.startswith('getaround_') and '_bucket' not in line:
+                print(f"   {line}")
+    except requests.exceptions.ConnectionError:
+        print("   ❌ Erreur de connexion. L'API est-elle lancée ?")
+
 def test_endpoint(method, endpoint, data=None, description=""):
     """Teste un endpoint et affiche le résultat"""
     url = f"{BASE_URL}{endpoint}"
@@ -46,6 +59,150 @@ def test_endpoint(method, endpoint, data=None, description=""):
     except Exception as e:
         print(f"   ❌ Erreur: {e}")
 
+def test_engine_parity(rows):
+    """Vérifie que les moteurs compiled et sklearn donnent les mêmes prédictions"""
+    print(f"\n📍 POST /predict?engine=compiled vs /predict?engine=sklearn")
+    print(f"   Compare les prédictions sur {len(rows)} véhicules")
+
+    try:
+        predictions = {}
+        for engine in ("compiled", "sklearn"):
+            response = requests.post(f"{BASE_URL}/predict", params={"engine": engine}, json={"input": rows})
+            if response.status_code != 200:
+                print(f"   ❌ Erreur ({engine}) : {response.text}")
+                return
+            predictions[engine] = response.json()["prediction"]
+
+        if predictions["compiled"] == predictions["sklearn"]:
+            print("   ✅ Prédictions identiques")
+        else:
+            diffs = [i for i, (a, b) in enumerate(zip(predictions["compiled"], predictions["sklearn"])) if a != b]
+            print(f"   ❌ {len(diffs)} prédictions différentes (indices : {diffs[:10]})")
+
+    except requests.exceptions.ConnectionError:
+        print("   ❌ Erreur de connexion. L'API est-elle lancée ?")
+    except Exception as e:
+        print(f"   ❌ Erreur: {e}")
+
+def test_binary_predict(rows):
+    """Teste /predict avec un corps float64 little-endian brut et une réponse binaire"""
+    print(f"\n📍 POST /predict (application/octet-stream)")
+    print(f"   Envoie {len(rows)} véhicules en binaire et compare avec la réponse JSON")
+
+    try:
+        n_features = len(rows[0])
+        body = struct.pack(f"<{len(rows) * n_features}d", *[v for row in rows for v in row])
+        response = requests.post(
+            f"{BASE_URL}/predict",
+            data=body,
+            headers={
+                "Content-Type": "application/octet-stream",
+                "Accept": "application/octet-stream",
+                "X-Shape": f"{len(rows)},{n_features}",
+            },
+        )
+        print(f"   Status: {response.status_code}")
+        if response.status_code != 200:
+            print(f"   ❌ Erreur")
+            print(f"   Réponse: {response.text}")
+            return
+
+        binary_predictions = list(struct.unpack(f"<{len(rows)}d", response.content))
+        json_predictions = requests.post(f"{BASE_URL}/predict", json={"input": rows}).json()["prediction"]
+        if binary_predictions == json_predictions:
+            print(f"   ✅ Succès : {binary_predictions}")
+        else:
+            print(f"   ❌ Réponses différentes : {binary_predictions} vs {json_predictions}")
+
+    except requests.exceptions.ConnectionError:
+        print("   ❌ Erreur de connexion. L'API est-elle lancée ?")
+    except Exception as e:
+        print(f"   ❌ Erreur: {e}")
+
+def test_non_finite_rejected(row, engines=("compiled",)):
+    """Vérifie qu'un NaN (JSON ou binaire) est refusé au lieu de recevoir un prix"""
+    print(f"\n📍 POST /predict avec mileage = NaN")
+    print(f"   Devrait retourner une erreur (400 ou 422) pour chaque format et moteur")
+
+    nan_row = list(row)
+    nan_row[1] = float("nan")
+    bodies = {
+        # json.dumps écrit NaN (JSON non standard, accepté par le parseur de l'API)
+        "json": (json.dumps({"input": [nan_row]}).encode(), {"Content-Type": "application/json"}),
+        "binaire": (
+            struct.pack(f"<{len(nan_row)}d", *nan_row),
+            {"Content-Type": "application/octet-stream", "X-Shape": f"1,{len(nan_row)}"},
+        ),
+    }
+    try:
+        for engine in engines:
+            for name, (body, headers) in bodies.items():
+                response = requests.post(f"{BASE_URL}/predict", params={"engine": engine}, data=body, headers=headers)
+                if response.status_code in (400, 422):
+                    print(f"   ✅ {engine} / {name} : {response.status_code}")
+                else:
+                    print(f"   ❌ {engine} / {name} : {response.status_code} {response.text}")
+
+    except requests.exceptions.ConnectionError:
+        print("   ❌ Erreur de connexion. L'API est-elle lancée ?")
+    except Exception as e:
+        print(f"   ❌ Erreur: {e}")
+
+def test_error_shape(bodies):
+    """Vérifie que les erreurs 422 de /predict gardent le format FastAPI (loc préfixée par "body")"""
+    print(f"\n📍 POST /predict avec des corps invalides")
+    print(f"   Chaque erreur doit avoir type, loc ([\"body\", ...]) et msg ; ctx.error en texte")
+
+    try:
+        for body in bodies:
+            response = requests.post(f"{BASE_URL}/predict", json=body)
+            detail = response.json().get("detail") if response.status_code == 422 else None
+            valid = isinstance(detail, list) and len(detail) > 0 and all(
+                {"type", "loc", "msg"} <= set(error)
+                and error["loc"][:1] == ["body"]
+                and isinstance(error.get("ctx", {}).get("error", ""), str)
+                for error in detail
+            )
+            if valid:
+                print(f"   ✅ {json.dumps(body)} : {response.status_code} {[error['loc'] for error in detail]}")
+            else:
+                print(f"   ❌ {json.dumps(body)} : {response.status_code} {response.text}")
+
+    except requests.exceptions.ConnectionError:
+        print("   ❌ Erreur de connexion. L'API est-elle lancée ?")
+    except Exception as e:
+        print(f"   ❌ Erreur: {e}")
+
+def test_stream_predict(rows):
+    """Teste /predict/stream avec un corps NDJSON et lit la réponse ligne par ligne"""
+    print(f"\n📍 POST /predict/stream (application/x-ndjson)")
+    print(f"   Envoie {len(rows)} véhicules, un par ligne")
+
+    try:
+        body = "".join(json.dumps(row) + "\n" for row in rows)
+        response = requests.post(
+            f"{BASE_URL}/predict/stream",
+            data=body.encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+            stream=True,
+        )
+        print(f"   Status: {response.status_code}")
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+        predictions = [line["prediction"] for line in lines if "prediction" in line]
+        summary = lines[-1] if lines else {}
+
+        if response.status_code == 200 and len(predictions) == len(rows):
+            print(f"   ✅ Succès : {len(predictions)} prédictions")
+            print(f"   Résumé: {json.dumps(summary, ensure_ascii=False)}")
+        else:
+            print(f"   ❌ Erreur")
+            print(f"   Réponse: {summary}")
+
+    except requests.exceptions.ConnectionError:
+        print("   ❌ Erreur de connexion. L'API est-elle lancée ?")
+    except Exception as e:
+        print(f"   ❌ Erreur: {e}")
+
 def main():
     """Fonction principale de test"""
     print("="*80)
@@ -94,6 +251,22 @@ def main():
     }
     test_endpoint("POST", "/predict", data=multi_data, description="Prédit le prix de 2 véhicules")
 
+    # Test 7b: Prédiction avec des features nommées
+    print_header("Test 7b : Prédiction avec des features nommées")
+    named_data = {
+        "records": [
+            {
+                "model_key": "Renault", "mileage": 109839, "engine_power": 135,
+                "fuel": "diesel", "paint_color": "black", "car_type": "estate",
+                "private_parking_available": True, "has_gps": True,
+                "has_air_conditioning": False, "automatic_car": False,
+                "has_getaround_connect": True, "has_speed_regulator": False,
+                "winter_tires": True
+            }
+        ]
+    }
+    test_endpoint("POST", "/predict", data=named_data, description="Prédit le prix à partir des champs bruts")
+
     # Test 8: Erreur - mauvais nombre de features
     print_header("Test 8 : Test d'erreur - Mauvais nombre de features")
     bad_data = {
@@ -114,6 +287,77 @@ def main():
     print_header("Test 10 : Test 404 - Route inexistante")
     test_endpoint("GET", "/route-inexistante", description="Devrait retourner une erreur 404")
 
+    # Test 11: Parité des moteurs d'inférence
+    print_header("Test 11 : Parité des moteurs d'inférence")
+    parity_rows = [
+        [i, 10000 + 7919 * i % 300000, 70 + 13 * i % 250] + [(i >> k) & 1 for k in range(7)] + [1 if j == i % 46 else 0 for j in range(46)]
+        for i in range(200)
+    ]
+    test_engine_parity(parity_rows)
+
+    # Test 12: Format binaire
+    print_header("Test 12 : Prédiction au format binaire")
+    test_binary_predict(multi_data["input"])
+
+    # Test 13: Prédiction en flux
+    print_header("Test 13 : Prédiction en flux (NDJSON)")
+    test_stream_predict(parity_rows)
+
+    # Test 14: Cache des prédictions
+    print_header("Test 14 : Statistiques du cache des prédictions")
+    test_endpoint("POST", "/predict", data=multi_data, description="Même requête qu'au test 7 : servie par le cache")
+    test_endpoint("GET", "/cache-stats", description="Hits, misses et évictions du cache")
+
+    # Test 15: Statistiques du pool d'inférence
+    print_header("Test 15 : Statistiques du pool d'inférence")
+    test_endpoint("GET", "/pool-stats", description="Workers, prédictions en cours et requêtes refusées")
+
+    # Test 16: Statistiques du micro-batching
+    print_header("Test 16 : Statistiques du micro-batching")
+    test_endpoint("GET", "/batching-stats", description="Taille des lots, file d'attente et temps d'attente")
+
+    # Test 17: Métriques Prometheus
+    print_header("Test 17 : Métriques Prometheus")
+    test_metrics()
+
+    # Test 18: Versions du modèle (rechargement à chaud, canari)
+    print_header("Test 18 : Versions du modèle")
+    test_endpoint("GET", "/models", description="Versions publiées et requêtes en cours")
+    test_endpoint("POST", "/predict?model=default", example_data, "Prédiction avec la version explicite default")
+    test_endpoint("POST", "/predict?model=inexistant", example_data, "Devrait retourner une erreur 404")
+    test_endpoint("POST", "/models/default/load", description="Rechargement à chaud de la version default")
+
+    # Test 19: Validation vectorisée (toutes les lignes fautives en une erreur)
+    print_header("Test 19 : Validation des valeurs des features")
+    invalid_rows = [list(row) for row in parity_rows[:5]]
+    invalid_rows[1][10] = 0.5   # colonne one-hot hors de {0, 1}
+    invalid_rows[3][1] = -100   # kilométrage négatif
+    test_endpoint("POST", "/predict", data={"input": invalid_rows}, description="Erreur 422 (lignes 1 et 3) avec STRICT_INPUT=true, prédictions sinon")
+
+    # Test 20: Intervalles de prédiction
+    print_header("Test 20 : Intervalles de prédiction (quantiles des arbres)")
+    test_endpoint("POST", "/predict/interval", data=multi_data, description="Quantiles par défaut (0.1, 0.5, 0.9)")
+    test_endpoint("POST", "/predict/interval?quantiles=0.05,0.95", data=example_data, description="Intervalle à 90 %")
+    test_endpoint("POST", "/predict/interval?quantiles=1.5", data=example_data, description="Devrait retourner une erreur 400")
+
+    # Test 21: Courbe de prix (what-if)
+    print_header("Test 21 : Courbe de prix selon une feature")
+    sweep_data = {"input": example_data["input"][0], "feature": "mileage", "start": 0, "stop": 300000, "num": 7}
+    test_endpoint("POST", "/predict/sweep", data=sweep_data, description="Prix selon le kilométrage")
+    test_endpoint("POST", "/predict/sweep", data={"input": example_data["input"][0], "feature": "has_gps"}, description="Avec et sans GPS")
+
+    # Test 22: Attributions par feature
+    print_header("Test 22 : Attributions par feature (TreeSHAP)")
+    test_endpoint("POST", "/explain?top=5", data=example_data, description="Contributions et top 5 des features")
+
+    # Test 23: Valeurs manquantes
+    print_header("Test 23 : Valeurs manquantes (NaN)")
+    test_non_finite_rejected(example_data["input"][0])
+
+    # Test 24: Format des erreurs 422
+    print_header("Test 24 : Format des erreurs de validation")
+    test_error_shape([{"input": "x"}, {"foo": 1}, {"input": []}, {"input": [[1, "a"]]}])
+
     # Résumé
     print("\n" + "="*80)
     print("✅ TESTS TERMINÉS")
@@ -0,0 +1,590 @@
+"""
+🏋️ GetAround - Entraînement du modèle de prix
+Rejoue sans Jupyter le pipeline de notebooks/02_ML_pricing.ipynb (nettoyage,
+`pd.get_dummies`, split 80/20, RobustScaler, quatre modèles, GridSearchCV)
+et écrit le model_package attendu par l'API. La matrice de features encodée
+est mise en cache sur disque, indexée par le hash du CSV ; la validation
+croisée de la recherche d'hyperparamètres est répartie sur tous les cœurs.
+Chaque étape est chronométrée.
+
+Le mode incrémental (`--incremental`) ajoute de nouvelles lignes aux données
+d'un modèle existant : encodage existant relu depuis le cache, forêt agrandie
+par `warm_start`, réentraînement complet seulement en cas de dérive.
+
+Usage :
+    python train.py                                       # ../data -> model.pkl
+    python train.py --data big.csv --output model.pkl --artifact model.forest
+    python train.py --model "Random Forest" --no-search --n-jobs 4
+    python train.py --incremental model.pkl --data new_rentals.csv --artifact model-{version}.forest
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.metrics import mean_absolute_error, mean_absolute_percentage_error, mean_squared_error, r2_score
+from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.preprocessing import RobustScaler
+
+# ===== CONFIGURATION =====
+DATA_PATH = os.getenv('TRAIN_DATA_PATH', '../data/get_around_pricing_project.csv')
+CACHE_DIR = os.getenv('TRAIN_CACHE_DIR', 'feature_cache')
+TARGET = 'rental_price_per_day'
+
+# Random state pour la reproductibilité (identique au notebook)
+RANDOM_STATE = 42
+TEST_SIZE = 0.2
+CV_FOLDS = 5
+
+# Réentraînement complet si l'erreur sur les nouvelles lignes dépasse
+# DRIFT_TOLERANCE × le RMSE de test du modèle précédent
+DRIFT_TOLERANCE = float(os.getenv('TRAIN_DRIFT_TOLERANCE', '1.25'))
+
+# Version de l'encodage : à incrémenter quand prepare_features change,
+# pour ne pas relire une matrice en cache produite par l'ancien code
+FEATURES_VERSION = 2
+
+# Grilles de GridSearchCV par modèle (les autres ne sont pas optimisés)
+PARAM_GRIDS = {
+    'Random Forest': {
+        'n_estimators': [100, 200],
+        'max_depth': [10, 15, 20],
+        'min_samples_split': [2, 5],
+    },
+    'Gradient Boosting': {
+        'n_estimators': [100, 200],
+        'max_depth': [3, 5, 7],
+        'learning_rate': [0.01, 0.1],
+    },
+}
+
+
+# ===== CHRONOMÉTRAGE =====
+
+class StageTimer:
+    """Durée de chaque étape, affichée au fil de l'eau et conservée dans `timings`"""
+
+    def __init__(self):
+        self.timings = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+            print(f"⏱️  {name:<22} {elapsed:8.2f} s")
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def report(self):
+        print("\n" + "=" * 40)
+        print(f"{'Étape':<22} {'Durée (s)':>10} {'Part':>6}")
+        total = self.total
+        for name, elapsed in self.timings.items():
+            print(f"{name:<22} {elapsed:>10.2f} {elapsed / total:>6.0%}")
+        print(f"{'Total':<22} {total:>10.2f}")
+
+
+# ===== DONNÉES =====
+
+def file_hash(path):
+    """SHA-256 du fichier, lu par blocs (identifie le dataset dans le cache)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def prepare_features(df):
+    """
+    Nettoyage et encodage du notebook : suppression des valeurs manquantes et
+    des doublons, puis one-hot `pd.get_dummies(drop_first=True)` des colonnes texte
+
+    Returns:
+        (X float64, y float64, noms des features, catégorie de référence par champ)
+    """
+    df = df.dropna().drop_duplicates()
+    # Colonnes texte (dtype object, ou str avec pandas >= 3)
+    categorical_cols = df.select_dtypes(exclude=['number', 'bool']).columns.tolist()
+    # Catégorie supprimée par drop_first : la première de pd.Categorical (valeurs triées)
+    references = {col: str(pd.Categorical(df[col]).categories[0]) for col in categorical_cols if len(df)}
+    if categorical_cols:
+        df = pd.get_dummies(df, columns=categorical_cols, drop_first=True)
+    X = df.drop(TARGET, axis=1)
+    return X.to_numpy(dtype=np.float64), df[TARGET].to_numpy(dtype=np.float64), X.columns.tolist(), references
+
+
+def cache_path(data_hash, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"features-v{FEATURES_VERSION}-{data_hash[:16]}.npz")
+
+
+def read_cache(data_hash, cache_dir=CACHE_DIR):
+    """(X, y, noms des features, catégories de référence) en cache pour `data_hash`, None si absent"""
+    cached = cache_path(data_hash, cache_dir) if cache_dir else None
+    if not cached or not os.path.exists(cached):
+        return None
+    with np.load(cached, allow_pickle=False) as npz:
+        references = dict(zip(npz['reference_fields'].tolist(), npz['reference_values'].tolist()))
+        return npz['X'], npz['y'], npz['feature_names'].tolist(), references
+
+
+def write_cache(data_hash, X, y, feature_names, references, cache_dir=CACHE_DIR):
+    if not cache_dir:
+        return
+    cached = cache_path(data_hash, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Écriture atomique : un entraînement concurrent ne lit jamais un fichier partiel
+    tmp = f"{cached}.{os.getpid()}.tmp.npz"
+    np.savez(
+        tmp, X=X, y=y, feature_names=np.array(feature_names),
+        reference_fields=np.array(list(references), dtype=str),
+        reference_values=np.array(list(references.values()), dtype=str),
+    )
+    os.replace(tmp, cached)
+
+
+def load_features(path, cache_dir=CACHE_DIR, timer=None):
+    """
+    Matrice de features du CSV `path`, relue depuis le cache si le fichier n'a pas changé
+
+    Returns:
+        (X, y, noms des features, catégories de référence, hash du CSV)
+    """
+    timer = timer or StageTimer()
+    with timer.stage('hash'):
+        data_hash = file_hash(path)
+
+    with timer.stage('lecture cache'):
+        cached = read_cache(data_hash, cache_dir)
+    if cached is not None:
+        print(f"♻️  Features relues depuis le cache : {cache_path(data_hash, cache_dir)}")
+        return (*cached, data_hash)
+
+    with timer.stage('lecture CSV'):
+        df = pd.read_csv(path)
+    with timer.stage('encodage'):
+        X, y, feature_names, references = prepare_features(df)
+    with timer.stage('écriture cache'):
+        write_cache(data_hash, X, y, feature_names, references, cache_dir)
+    return X, y, feature_names, references, data_hash
+
+
+# ===== MODÈLES =====
+
+def candidate_models(n_jobs=-1):
+    """Les quatre modèles du notebook, avec les mêmes hyperparamètres"""
+    return {
+        'Linear Regression': LinearRegression(),
+        'Ridge Regression': Ridge(alpha=1.0, random_state=RANDOM_STATE),
+        'Random Forest': RandomForestRegressor(
+            n_estimators=100, max_depth=15, min_samples_split=5,
+            random_state=RANDOM_STATE, n_jobs=n_jobs,
+        ),
+        'Gradient Boosting': GradientBoostingRegressor(
+            n_estimators=100, max_depth=5, learning_rate=0.1, random_state=RANDOM_STATE,
+        ),
+    }
+
+
+def evaluate(model, X_test, y_test):
+    """Métriques de test au format du model_package"""
+    y_pred = model.predict(X_test)
+    return {
+        'r2_test': r2_score(y_test, y_pred),
+        'rmse_test': float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        'mae_test': mean_absolute_error(y_test, y_pred),
+        'mape_test': mean_absolute_percentage_error(y_test, y_pred) * 100,
+    }
+
+
+def search(name, X_train, y_train, n_jobs=-1):
+    """
+    GridSearchCV du modèle `name` (None s'il n'a pas de grille)
+
+    Les plis et combinaisons sont répartis sur `n_jobs` processus ; le modèle
+    lui-même reste mono-thread pour ne pas surcharger les cœurs.
+    """
+    if name not in PARAM_GRIDS:
+        return None
+    estimator = candidate_models(n_jobs=1)[name]
+    grid_search = GridSearchCV(estimator, PARAM_GRIDS[name], cv=CV_FOLDS, scoring='r2', n_jobs=n_jobs)
+    grid_search.fit(X_train, y_train)
+    print(f"   Meilleurs paramètres : {grid_search.best_params_} (CV R² = {grid_search.best_score_:.4f})")
+    return grid_search.best_estimator_
+
+
+def train(data_path=DATA_PATH, cache_dir=CACHE_DIR, n_jobs=-1, optimize=True, model_name=None, timer=None):
+    """
+    Pipeline complet : features, split, scaling, comparaison, optimisation
+
+    `model_name` impose le modèle (seul entraîné) ; par défaut, les quatre sont
+    comparés et le meilleur R² de test est retenu.
+
+    Returns:
+        model_package (mêmes clés que celui du notebook, plus `training`)
+    """
+    timer = timer or StageTimer()
+    X, y, feature_names, references, data_hash = load_features(data_path, cache_dir, timer)
+    return fit_package(X, y, feature_names, references, n_jobs, optimize, model_name, timer, {
+        'data_paths': [os.path.abspath(data_path)],
+        'data_hash': data_hash,
+    })
+
+
+def fit_package(X, y, feature_names, references, n_jobs=-1, optimize=True, model_name=None, timer=None,
+                training=None):
+    """
+    Entraînement complet sur une matrice déjà encodée (voir `train`)
+
+    `references` (catégorie supprimée par drop_first, par champ) est conservé
+    dans le model_package pour les réentraînements incrémentaux.
+    """
+    timer = timer or StageTimer()
+    print(f"📊 {len(X):,} lignes, {len(feature_names)} features")
+
+    with timer.stage('split + scaling'):
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE
+        )
+        scaler = RobustScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
+
+    results = {}
+    for name, model in candidate_models(n_jobs).items():
+        if model_name and name != model_name:
+            continue
+        with timer.stage(f"fit {name}"):
+            model.fit(X_train_scaled, y_train)
+            metrics = evaluate(model, X_test_scaled, y_test)
+        results[name] = (model, metrics)
+        print(f"   {name:<20} R² = {metrics['r2_test']:.4f}  RMSE = {metrics['rmse_test']:.2f}")
+
+    # Meilleur modèle sur le R² de test, comme dans le notebook
+    best_name = model_name or max(results, key=lambda name: results[name][1]['r2_test'])
+    best_model, best_metrics = results[best_name]
+    print(f"🏆 Modèle retenu : {best_name}")
+
+    if optimize and best_name in PARAM_GRIDS:
+        with timer.stage('GridSearchCV'):
+            optimized = search(best_name, X_train_scaled, y_train, n_jobs)
+            optimized_metrics = evaluate(optimized, X_test_scaled, y_test)
+        # Le modèle optimisé n'est gardé que s'il fait mieux sur le test
+        if optimized_metrics['r2_test'] > best_metrics['r2_test']:
+            print(f"✅ Modèle optimisé sélectionné (R² = {optimized_metrics['r2_test']:.4f})")
+            best_model, best_metrics = optimized, optimized_metrics
+        else:
+            print("⚠️ Le modèle de base est meilleur, on le garde")
+
+    return {
+        'model': best_model,
+        'scaler': scaler,
+        'feature_names': feature_names,
+        'reference_categories': references,
+        'model_name': best_name,
+        'metrics': best_metrics,
+        'target_name': TARGET,
+        'training': {
+            **(training or {}),
+            'mode': 'full',
+            'rows': len(X),
+            'random_state': RANDOM_STATE,
+            'sklearn_version': sklearn.__version__,
+            'timings': dict(timer.timings),
+        },
+    }
+
+
+# ===== RÉENTRAÎNEMENT INCRÉMENTAL =====
+
+def encode_like(df, feature_names, references):
+    """
+    Encode de nouvelles lignes dans les colonnes d'un modèle existant
+
+    Même nettoyage que `prepare_features` ; les catégories sont placées dans
+    les colonnes one-hot existantes par le FeatureVectorizer de l'API. Une
+    valeur sans colonne est la catégorie de référence du champ si elle
+    figure dans `references` (enregistré à l'entraînement), sinon elle est
+    nouvelle.
+
+    Returns:
+        (X, y, catégories inconnues du modèle par champ)
+    """
+    from vectorizer import FeatureVectorizer
+
+    df = df.dropna().drop_duplicates()
+    vectorizer = FeatureVectorizer(feature_names)
+    X = np.zeros((len(df), len(feature_names)))
+    for name, column in vectorizer.numeric_columns:
+        X[:, column] = df[name].to_numpy(dtype=np.float64)
+
+    unknown = {}
+    for field, index in vectorizer.category_index.items():
+        values = df[field].astype(str)
+        columns = values.map(index)
+        known = columns.notna().to_numpy()
+        X[np.flatnonzero(known), columns[known].to_numpy(dtype=np.intp)] = 1.0
+        unseen = sorted(set(values[~known]) - {references.get(field)})
+        if unseen:
+            unknown[field] = unseen
+    return X, df[TARGET].to_numpy(dtype=np.float64), unknown
+
+
+def check_drift(model_package, X_new, y_new, unknown):
+    """
+    Raisons de réentraîner complètement plutôt que d'ajouter des arbres
+
+    - catégories inconnues : le modèle n'a pas de colonne pour elles
+    - erreur sur les nouvelles lignes > DRIFT_TOLERANCE × RMSE de test du modèle
+    """
+    reasons = [f"catégories inconnues ({field} : {', '.join(values)})" for field, values in unknown.items()]
+    reference = model_package.get('metrics', {}).get('rmse_test')
+    if reference and len(X_new):
+        y_pred = model_package['model'].predict(model_package['scaler'].transform(X_new))
+        rmse = float(np.sqrt(mean_squared_error(y_new, y_pred)))
+        print(f"   RMSE sur les nouvelles lignes : {rmse:.2f} (test du modèle : {reference:.2f})")
+        if rmse > DRIFT_TOLERANCE * reference:
+            reasons.append(f"RMSE {rmse:.2f} > {DRIFT_TOLERANCE} × {reference:.2f}")
+    return reasons
+
+
+def previous_features(model_package, cache_dir=CACHE_DIR, timer=None, base_data=DATA_PATH):
+    """
+    Matrice encodée des données du modèle précédent
+
+    Relue depuis le cache ; sinon, reconstruite à partir des CSV successifs
+    (entraînement complet puis lignes ajoutées). Un model_package sans clé
+    `training` (celui du notebook) est supposé entraîné sur `base_data`.
+    Les catégories de référence viennent du model_package, ou à défaut
+    (notebook, model.pkl antérieur) du CSV d'entraînement complet.
+
+    Returns:
+        (X, y, catégories de référence, chemins des CSV, hash des données)
+    """
+    timer = timer or StageTimer()
+    feature_names = list(model_package['feature_names'])
+    training = model_package.get('training')
+    if training is None:
+        print(f"ℹ️ Modèle sans historique d'entraînement : données de base lues dans {base_data}")
+        if not os.path.exists(base_data):
+            raise ValueError(f"Données d'entraînement du modèle introuvables : {base_data} (voir --base-data)")
+        X, y, names, references, data_hash = load_features(base_data, cache_dir, timer)
+        if names != feature_names:
+            raise ValueError(f"Le CSV {base_data} ne correspond pas aux features du modèle")
+        return X, y, references, [os.path.abspath(base_data)], data_hash
+
+    paths = training.get('data_paths', [])
+    with timer.stage('lecture cache'):
+        cached = read_cache(training.get('data_hash', ''), cache_dir)
+    if cached is not None and cached[2] == feature_names:
+        references = model_package.get('reference_categories', cached[3])
+        return cached[0], cached[1], references, paths, training['data_hash']
+
+    if not paths or not all(os.path.exists(path) for path in paths):
+        raise ValueError("Données d'entraînement du modèle précédent introuvables (ni cache ni CSV)")
+    X, y, names, references, _ = load_features(paths[0], cache_dir, timer)
+    if names != feature_names:
+        raise ValueError(f"Le CSV {paths[0]} ne correspond plus au modèle précédent")
+    references = model_package.get('reference_categories', references)
+    for path in paths[1:]:
+        with timer.stage('encodage'):
+            X_added, y_added, _ = encode_like(pd.read_csv(path), feature_names, references)
+        X, y = np.concatenate([X, X_added]), np.concatenate([y, y_added])
+    return X, y, references, paths, training.get('data_hash', '')
+
+
+def incremental(model_path, data_path, cache_dir=CACHE_DIR, n_jobs=-1, add_trees=None,
+                refit_on_drift=True, timer=None, base_data=DATA_PATH):
+    """
+    Ajoute les lignes de `data_path` aux données du modèle `model_path` et le met à jour
+
+    Sans dérive, le scaler est conservé (les seuils des arbres existants en
+    dépendent) et la forêt grandit de `add_trees` arbres entraînés sur toutes
+    les lignes (`warm_start`) ; par défaut, autant d'arbres que la part des
+    nouvelles lignes dans le total. Les modèles linéaires sont simplement
+    réajustés. En cas de dérive, réentraînement complet (scaler compris) du
+    même type de modèle, avec les hyperparamètres du notebook. `base_data`
+    sert de données d'origine à un modèle sans historique (notebook).
+
+    Returns:
+        nouveau model_package (`training.parent_version` : version précédente)
+    """
+    timer = timer or StageTimer()
+    with timer.stage('chargement modèle'):
+        parent_version = file_hash(model_path)[:12]
+        model_package = joblib.load(model_path)
+    feature_names = list(model_package['feature_names'])
+    X_old, y_old, references, parent_paths, parent_hash = previous_features(
+        model_package, cache_dir, timer, base_data
+    )
+
+    with timer.stage('hash'):
+        data_hash = hashlib.sha256(f"{parent_hash}+{file_hash(data_path)}".encode()).hexdigest()
+    with timer.stage('lecture CSV'):
+        df = pd.read_csv(data_path)
+    with timer.stage('encodage'):
+        X_new, y_new, unknown = encode_like(df, feature_names, references)
+    print(f"📊 {len(X_old):,} lignes existantes + {len(X_new):,} nouvelles")
+
+    with timer.stage('contrôle dérive'):
+        drift = check_drift(model_package, X_new, y_new, unknown)
+    X = np.concatenate([X_old, X_new])
+    y = np.concatenate([y_old, y_new])
+    with timer.stage('écriture cache'):
+        write_cache(data_hash, X, y, feature_names, references, cache_dir)
+
+    training = {
+        'data_paths': parent_paths + [os.path.abspath(data_path)],
+        'data_hash': data_hash,
+        'parent_version': parent_version,
+        'drift': drift,
+    }
+    if drift:
+        print(f"⚠️ Dérive détectée : {' ; '.join(drift)}")
+        if unknown:
+            # Pas de colonne one-hot pour ces catégories : traitées comme la
+            # catégorie de référence, comme dans l'API
+            print("⚠️ Nouvelles catégories ignorées : lancer `python train.py` sur le CSV fusionné pour les apprendre")
+        if refit_on_drift:
+            return fit_package(
+                X, y, feature_names, references, n_jobs, False, model_package['model_name'], timer, training
+            )
+
+    # Même découpage que l'entraînement précédent pour les anciennes lignes :
+    # aucune ligne de test n'a servi à entraîner les arbres existants
+    with timer.stage('split + scaling'):
+        old_train, old_test, y_old_train, y_old_test = train_test_split(
+            X_old, y_old, test_size=TEST_SIZE, random_state=RANDOM_STATE
+        )
+        new_train, new_test, y_new_train, y_new_test = train_test_split(
+            X_new, y_new, test_size=TEST_SIZE, random_state=RANDOM_STATE
+        )
+        scaler = model_package['scaler']
+        X_train = scaler.transform(np.concatenate([old_train, new_train]))
+        X_test = scaler.transform(np.concatenate([old_test, new_test]))
+        y_train = np.concatenate([y_old_train, y_new_train])
+        y_test = np.concatenate([y_old_test, y_new_test])
+
+    model = model_package['model']
+    added = 0
+    with timer.stage('fit incrémental'):
+        if 'warm_start' in model.get_params():
+            n_estimators = model.get_params()['n_estimators']
+            added = add_trees or max(1, int(np.ceil(n_estimators * len(X_new) / len(X_old))))
+            params = {'warm_start': True, 'n_estimators': n_estimators + added}
+            if 'n_jobs' in model.get_params():
+                params['n_jobs'] = n_jobs
+            model.set_params(**params)
+            model.fit(X_train, y_train)
+            model.set_params(warm_start=False)
+        else:
+            model.fit(X_train, y_train)
+        metrics = evaluate(model, X_test, y_test)
+    print(f"🌲 {added} arbres ajoutés : R² = {metrics['r2_test']:.4f}  RMSE = {metrics['rmse_test']:.2f}")
+
+    return {
+        **model_package,
+        'model': model,
+        'reference_categories': references,
+        'metrics': metrics,
+        'training': {
+            **training,
+            'mode': 'incremental',
+            'rows': len(X),
+            'added_trees': added,
+            'random_state': RANDOM_STATE,
+            'sklearn_version': sklearn.__version__,
+            'timings': dict(timer.timings),
+        },
+    }
+
+
+def save_package(model_package, output, artifact=None, timer=None):
+    """
+    Écrit le model_package joblib (et l'artefact mappé en mémoire si demandé)
+
+    `{version}` dans les chemins est remplacé par la version du modèle (hash
+    du pickle écrit, celle qu'affiche /models) : chaque réentraînement
+    produit alors des fichiers distincts, chargeables par /models/{name}/load.
+
+    Returns:
+        chemin du pickle écrit
+    """
+    timer = timer or StageTimer()
+    with timer.stage('sauvegarde'):
+        tmp = f"{output}.{os.getpid()}.tmp"
+        joblib.dump(model_package, tmp)
+        version = file_hash(tmp)[:12]
+        output = output.format(version=version)
+        os.replace(tmp, output)
+    print(f"💾 Modèle sauvegardé : {output} (version {version})")
+    if artifact:
+        from artifact import export_artifact
+
+        artifact = artifact.format(version=version)
+        try:
+            with timer.stage('export artefact'):
+                # Même version que le chargement du pickle
+                export_artifact(model_package, artifact, version)
+        except TypeError as e:
+            print(f"⚠️ Artefact non exporté : {e}")
+        else:
+            print(f"💾 Artefact écrit : {artifact}")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraîne le modèle de prix et écrit model.pkl")
+    parser.add_argument('--data', default=DATA_PATH, help="CSV des locations (ou des nouvelles lignes avec --incremental)")
+    parser.add_argument('--output', help="model_package à écrire (défaut : model.pkl, model-{version}.pkl avec --incremental)")
+    parser.add_argument('--artifact', help="exporte aussi l'artefact mappé en mémoire (model.forest, model-{version}.forest)")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="cache des features encodées ('' : désactivé)")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="processus de la validation croisée (-1 : tous les cœurs)")
+    parser.add_argument('--no-search', action='store_true', help="ne pas lancer GridSearchCV")
+    parser.add_argument('--model', choices=list(candidate_models()), help="modèle imposé (défaut : meilleur R²)")
+    parser.add_argument('--incremental', metavar='MODEL', help="ajoute les lignes de --data au model_package MODEL")
+    parser.add_argument('--add-trees', type=int, help="arbres ajoutés en incrémental (défaut : part des nouvelles lignes)")
+    parser.add_argument('--no-refit', action='store_true', help="ajouter des arbres même en cas de dérive")
+    parser.add_argument('--base-data', default=DATA_PATH,
+                        help="CSV d'entraînement d'un modèle sans historique (model.pkl du notebook) avec --incremental")
+    args = parser.parse_args()
+
+    timer = StageTimer()
+    try:
+        if args.incremental:
+            model_package = incremental(
+                args.incremental, args.data, args.cache_dir, args.n_jobs, args.add_trees, not args.no_refit, timer,
+                args.base_data,
+            )
+            output = args.output or 'model-{version}.pkl'
+        else:
+            model_package = train(args.data, args.cache_dir, args.n_jobs, not args.no_search, args.model, timer)
+            output = args.output or 'model.pkl'
+        save_package(model_package, output, args.artifact, timer)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    metrics = model_package['metrics']
+    print(f"\n✅ {model_package['model_name']} : R² = {metrics['r2_test']:.4f}, RMSE = {metrics['rmse_test']:.2f}")
+    timer.report()
+
+
+if __name__ == '__main__':
+    main()
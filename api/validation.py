@@ -0,0 +1,160 @@
+"""
+✅ GetAround - Validation vectorisée des entrées JSON de /predict
+Parse le corps `{"input": [[...], ...]}` directement en matrice float64
+(np.loadtxt pour les gros corps, orjson s'il est installé sinon), puis vérifie forme, finitude et plages des
+features par masques NumPy : toutes les lignes fautives sont signalées dans
+une seule erreur, sans validation Pydantic élément par élément
+"""
+
+import io
+import json
+
+import numpy as np
+
+from vectorizer import CATEGORICAL_FIELDS
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+# Features booléennes du dataset (0 ou 1, comme les colonnes one-hot)
+BOOLEAN_FIELDS = (
+    'private_parking_available', 'has_gps', 'has_air_conditioning', 'automatic_car',
+    'has_getaround_connect', 'has_speed_regulator', 'winter_tires',
+)
+
+# Taille de corps à partir de laquelle les nombres sont lus par np.loadtxt
+TEXT_PARSE_MIN_BYTES = 4 * 1024
+
+# Nombre maximal d'indices de lignes listés par erreur
+MAX_REPORTED_ROWS = 100
+
+
+class InputValidationError(ValueError):
+    """
+    Lignes invalides regroupées par règle
+
+    `errors` est une liste de `(message, indices des lignes)` ; `to_errors()`
+    la convertit au format des erreurs 422 de FastAPI.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(" ; ".join(f"{message} ({len(rows)} lignes)" for message, rows in errors))
+
+    def to_errors(self):
+        return [
+            {
+                "type": "value_error",
+                "loc": ["body", "input"],
+                "msg": message,
+                "ctx": {"count": len(rows), "rows": [int(i) for i in rows[:MAX_REPORTED_ROWS]]},
+            }
+            for message, rows in self.errors
+        ]
+
+
+class InputValidator:
+    """
+    Règles par colonne construites une seule fois à partir de feature_names
+
+    - colonnes one-hot et booléennes : valeurs dans {0, 1}
+    - autres colonnes numériques (kilométrage, puissance, ...) : valeurs >= 0
+    """
+
+    def __init__(self, feature_names):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.binary_mask = np.array([
+            name in BOOLEAN_FIELDS or any(name.startswith(f + '_') for f in CATEGORICAL_FIELDS)
+            for name in self.feature_names
+        ], dtype=bool)
+
+    def parse(self, body):
+        """
+        Parse un corps `{"input": [...]}` en matrice float64
+
+        Retourne None si le corps n'a pas cette forme simple (JSON invalide,
+        `records`, input vide, valeurs non numériques) : l'appelant se replie
+        alors sur la validation Pydantic et ses messages d'erreur détaillés.
+        Lève InputValidationError si les lignes n'ont pas toutes la même longueur.
+        """
+        if len(body) >= TEXT_PARSE_MIN_BYTES:
+            X = self._parse_text(body)
+            if X is not None:
+                return X
+
+        try:
+            payload = json_loads(body)
+        except ValueError:
+            return None
+        if not isinstance(payload, dict) or payload.keys() - {'input', 'records'}:
+            return None
+        rows = payload.get('input')
+        if payload.get('records') is not None or not isinstance(rows, list) or not rows:
+            return None
+
+        try:
+            X = np.array(rows, dtype=np.float64)
+        except (TypeError, ValueError):
+            X = None
+        if X is not None and X.ndim == 2:
+            return X
+
+        # Lignes de longueurs différentes (ou éléments qui ne sont pas des listes)
+        if not all(isinstance(row, list) for row in rows):
+            return None
+        lengths = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+        if (lengths == lengths[0]).all():
+            # Même longueur mais valeurs non numériques (listes imbriquées, objets, ...)
+            return None
+        raise InputValidationError([(
+            f"Chaque ligne doit contenir {self.n_features} features",
+            np.flatnonzero(lengths != self.n_features),
+        )])
+
+    @staticmethod
+    def _parse_text(body):
+        """
+        Lit `{"input": [[nombres], ...]}` avec le parseur C de np.loadtxt
+
+        Évite de créer un objet float Python par valeur. Retourne None dès que
+        le corps sort de cette forme stricte (autre clé, booléens, chaînes,
+        lignes de longueurs différentes, ...) : le parseur JSON prend le relais.
+        """
+        text = body.translate(None, b' \t\n\r')
+        if not (text.startswith(b'{"input":[[') and text.endswith(b']]}')):
+            return None
+        rows = text[len(b'{"input":[['):-len(b']]}')].replace(b'],[', b'\n')
+        try:
+            X = np.loadtxt(io.BytesIO(rows), delimiter=',', comments=None, dtype=np.float64, ndmin=2)
+        except ValueError:
+            return None
+        # loadtxt ignore les lignes vides ([]) : le nombre de lignes doit correspondre
+        if len(X) != rows.count(b'\n') + 1:
+            return None
+        return X
+
+    def check(self, X):
+        """Vérifie finitude et plages de toutes les lignes ; lève InputValidationError"""
+        # Une seule passe sur la matrice pour le cas nominal (aucune erreur) ;
+        # NaN et infinis échouent aussi aux deux comparaisons
+        invalid = np.where(self.binary_mask, (X != 0) & (X != 1), ~((X >= 0) & (X < np.inf)))
+        if not invalid.any():
+            return X
+
+        not_finite = ~np.isfinite(X).all(axis=1)
+        not_binary = invalid[:, self.binary_mask].any(axis=1) & ~not_finite
+        negative = invalid[:, ~self.binary_mask].any(axis=1) & ~not_finite
+        errors = [
+            (message, np.flatnonzero(rows))
+            for message, rows in (
+                ("Valeurs manquantes ou non finies", not_finite),
+                ("Les features booléennes et one-hot doivent valoir 0 ou 1", not_binary),
+                ("Les features numériques doivent être positives", negative),
+            )
+            if rows.any()
+        ]
+        raise InputValidationError(errors)
@@ -0,0 +1,94 @@
+"""
+🔤 GetAround - Vectorisation des features nommées
+Transforme des enregistrements bruts (model_key, fuel, mileage, ...) en la
+matrice de 56 features attendue par le modèle, sans pd.get_dummies
+"""
+
+import numpy as np
+
+# Variables catégorielles encodées par pd.get_dummies(drop_first=True) dans 02_ML_pricing.ipynb
+CATEGORICAL_FIELDS = ('model_key', 'fuel', 'paint_color', 'car_type')
+
+# Features facultatives et leur valeur par défaut
+# ("Unnamed: 0" est l'index du CSV d'entraînement, resté parmi les features)
+OPTIONAL_FIELDS = {'Unnamed: 0': 0.0}
+
+
+class FeatureVectorizer:
+    """
+    Vectoriseur construit une seule fois à partir de feature_names
+
+    - chaque feature numérique ou booléenne correspond à une colonne
+    - chaque colonne one-hot `<champ>_<catégorie>` est indexée dans un dict
+      `{catégorie: colonne}` par champ catégoriel
+
+    Une catégorie absente du dict (catégorie de référence supprimée par
+    drop_first, ou catégorie inconnue) laisse toutes ses colonnes à 0.
+    """
+
+    def __init__(self, feature_names):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.category_index = {field: {} for field in CATEGORICAL_FIELDS}
+        self.numeric_columns = []
+
+        for column, name in enumerate(self.feature_names):
+            field = next((f for f in CATEGORICAL_FIELDS if name.startswith(f + '_')), None)
+            if field is not None:
+                self.category_index[field][name[len(field) + 1:]] = column
+            else:
+                self.numeric_columns.append((name, column))
+
+        # Ne garder que les champs catégoriels réellement présents dans le modèle
+        self.category_index = {f: idx for f, idx in self.category_index.items() if idx}
+        self.required_fields = [
+            name for name, _ in self.numeric_columns if name not in OPTIONAL_FIELDS
+        ] + list(self.category_index)
+
+    def describe(self):
+        """Champs attendus en entrée nommée (pour /features)"""
+        return {
+            "numeric": [name for name, _ in self.numeric_columns],
+            "categorical": {field: sorted(idx) for field, idx in self.category_index.items()},
+            "optional": OPTIONAL_FIELDS,
+        }
+
+    def transform(self, records):
+        """
+        Remplit une matrice (n, n_features) préallouée, colonne par colonne
+
+        Lève ValueError si un champ obligatoire manque ou n'est pas numérique.
+        """
+        n_rows = len(records)
+        X = np.zeros((n_rows, self.n_features), dtype=np.float64)
+        if n_rows == 0:
+            return X
+
+        missing = {f for r in records for f in self.required_fields if f not in r}
+        if missing:
+            raise ValueError(f"Champs manquants : {', '.join(sorted(missing))}")
+
+        for name, column in self.numeric_columns:
+            default = OPTIONAL_FIELDS.get(name)
+            try:
+                if default is None:
+                    X[:, column] = [r[name] for r in records]
+                else:
+                    X[:, column] = [r.get(name, default) for r in records]
+            except (TypeError, ValueError):
+                raise ValueError(f"Le champ '{name}' doit être numérique ou booléen")
+            if np.isnan(X[:, column]).any():
+                raise ValueError(f"Le champ '{name}' ne peut pas être null")
+
+        rows = np.arange(n_rows)
+        for field, index in self.category_index.items():
+            try:
+                columns = np.fromiter(
+                    (index.get(r[field], -1) for r in records), dtype=np.intp, count=n_rows
+                )
+            except TypeError:
+                raise ValueError(f"Le champ '{field}' doit être une chaîne de caractères")
+            known = columns >= 0
+            X[rows[known], columns[known]] = 1.0
+
+        return X
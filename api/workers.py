@@ -0,0 +1,126 @@
+"""
+⚙️ GetAround - Pool d'inférence
+Exécute les prédictions (CPU) hors de la boucle asyncio, dans un pool de
+threads ou de processus, avec une limite de requêtes en cours (backpressure)
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+POOL_KINDS = ('thread', 'process', 'none')
+
+# Fonction de prédiction du processus worker (héritée par fork)
+_worker_predict_fn = None
+
+
+def _init_worker(predict_fn):
+    global _worker_predict_fn
+    _worker_predict_fn = predict_fn
+
+
+def _call_worker(*args):
+    return _worker_predict_fn(*args)
+
+
+class PoolSaturatedError(RuntimeError):
+    """Levée quand le pool a déjà atteint son nombre maximal de tâches en cours"""
+
+
+class InferencePool:
+    """
+    Pool d'exécution des prédictions
+
+    - `thread` : ThreadPoolExecutor, partage le modèle du processus principal
+    - `process` : ProcessPoolExecutor démarré par fork, chaque worker hérite
+      du modèle déjà chargé (pages partagées en copy-on-write, pas de rechargement)
+    - `none` : exécution directe dans la boucle (comportement historique)
+
+    Au-delà de `max_pending` tâches en cours, `run` lève PoolSaturatedError
+    pour que l'API réponde 503 plutôt que d'accumuler une file sans fin.
+    """
+
+    def __init__(self, predict_fn, kind='thread', workers=4, max_pending=32):
+        if kind not in POOL_KINDS:
+            raise ValueError(f"Type de pool inconnu : {kind} (attendu : {', '.join(POOL_KINDS)})")
+        if kind == 'process' and 'fork' not in multiprocessing.get_all_start_methods():
+            print("⚠️ fork indisponible sur cette plateforme, utilisation d'un pool de threads")
+            kind = 'thread'
+
+        self.predict_fn = predict_fn
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor = None
+
+    @property
+    def saturated(self):
+        return self.kind != 'none' and self.in_flight >= self.max_pending
+
+    def _get_executor(self):
+        """Crée l'executor au premier appel (après le chargement du modèle)"""
+        if self._executor is None:
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('fork'),
+                    initializer=_init_worker,
+                    initargs=(self.predict_fn,),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='inference',
+                )
+        return self._executor
+
+    def check_capacity(self):
+        """Lève PoolSaturatedError si aucune nouvelle tâche ne peut être acceptée"""
+        if self.saturated:
+            self.rejected += 1
+            raise PoolSaturatedError(
+                f"Pool d'inférence saturé ({self.in_flight}/{self.max_pending} tâches en cours)"
+            )
+
+    async def run(self, *args):
+        """Exécute predict_fn(*args) dans le pool et attend le résultat"""
+        if self.kind == 'none':
+            return self.predict_fn(*args)
+
+        self.check_capacity()
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            if self.kind == 'process':
+                return await loop.run_in_executor(self._get_executor(), _call_worker, *args)
+            return await loop.run_in_executor(self._get_executor(), self.predict_fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    def get_stats(self):
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+        }
+
+    def restart(self):
+        """
+        Recrée les workers d'un pool de processus (après publication d'un modèle)
+
+        Les nouveaux workers sont forkés avec le registre à jour ; l'ancien
+        executor termine les tâches déjà soumises avant de s'arrêter.
+        """
+        if self.kind == 'process' and self._executor is not None:
+            executor, self._executor = self._executor, None
+            executor.shutdown(wait=False)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
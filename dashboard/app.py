@@ -10,6 +10,9 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 
+from data import load_delay_data
+from stats import HISTOGRAM_BIN_WIDTH, HISTOGRAM_CLIP_PCT, SCOPES, DelayStats
+
 # ===== CONFIGURATION PAGE =====
 st.set_page_config(
     page_title="GetAround Analysis",
@@ -19,18 +22,29 @@ st.set_page_config(
 )
 
 # ===== CHARGEMENT DES DONNÉES =====
-@st.cache_data
+@st.cache_resource
 def load_data():
-    """Charger les données depuis le fichier Excel"""
+    """
+    Charger les données depuis le cache Arrow (converti depuis l'Excel au premier lancement)
+
+    cache_resource : un seul DataFrame partagé par toutes les sessions, sans
+    copie à chaque rerun (il ne doit pas être modifié)
+    """
     try:
-        df = pd.read_excel('../data/get_around_delay_analysis.xlsx')
-        return df
+        return load_delay_data()
     except FileNotFoundError:
         st.error("❌ Fichier de données introuvable. Assurez-vous que 'get_around_delay_analysis.xlsx' est dans le dossier 'data/'")
         st.stop()
 
+
+@st.cache_resource
+def load_stats():
+    """Agrégats mémorisés par sélection, partagés par toutes les sessions"""
+    return DelayStats(load_data())
+
 # Charger les données
-df = load_data()
+stats = load_stats()
+df = stats.df
 
 # ===== SIDEBAR =====
 st.sidebar.title("⚙️ Paramètres")
@@ -46,7 +60,23 @@ checkin_types = st.sidebar.multiselect(
 )
 
 # Filtrer les données selon la sélection
-df_filtered = df[df['checkin_type'].isin(checkin_types)] if checkin_types else df
+df_filtered = stats.rentals(checkin_types)
+
+# Histogramme (calculé côté serveur : seules les barres sont envoyées au navigateur)
+st.sidebar.subheader("Histogramme des retards")
+bin_width = st.sidebar.select_slider(
+    "Largeur des barres (minutes)",
+    options=[5, 10, 15, 30, 60, 120],
+    value=HISTOGRAM_BIN_WIDTH,
+)
+clip_pct = st.sidebar.slider(
+    "Valeurs extrêmes regroupées (% de chaque côté)",
+    min_value=0.0,
+    max_value=5.0,
+    value=HISTOGRAM_CLIP_PCT,
+    step=0.5,
+    help="Les retards au-delà de ces percentiles sont comptés dans les barres des bords"
+)
 
 st.sidebar.markdown("---")
 st.sidebar.info("""
@@ -69,23 +99,11 @@ st.markdown("---")
 # ===== SECTION 1 : MÉTRIQUES CLÉS =====
 st.header("📊 Vue d'ensemble")
 
-# Calculs
-total_rentals = len(df_filtered)
-late_rentals = (df_filtered['delay_at_checkout_in_minutes'] > 0).sum()
-late_pct = (late_rentals / total_rentals * 100) if total_rentals > 0 else 0
-avg_delay = df_filtered[df_filtered['delay_at_checkout_in_minutes'] > 0]['delay_at_checkout_in_minutes'].mean()
-
-df_with_next = df_filtered[df_filtered['time_delta_with_previous_rental_in_minutes'].notna()]
-consecutive = len(df_with_next)
-
-# Cas problématiques
-df_with_next_copy = df_with_next.copy()
-df_with_next_copy['is_problematic'] = (
-    (df_with_next_copy['delay_at_checkout_in_minutes'] > 0) &
-    (df_with_next_copy['delay_at_checkout_in_minutes'] > df_with_next_copy['time_delta_with_previous_rental_in_minutes'])
-)
-total_problems = df_with_next_copy['is_problematic'].sum()
-problem_pct = (total_problems / consecutive * 100) if consecutive > 0 else 0
+# Calculs (mémorisés par filtre dans stats.py)
+metrics = stats.overview(checkin_types)
+total_rentals, late_rentals, late_pct = metrics['total_rentals'], metrics['late_rentals'], metrics['late_pct']
+avg_delay = metrics['avg_delay']
+total_problems, problem_pct = metrics['total_problems'], metrics['problem_pct']
 
 # Affichage des métriques
 col1, col2, col3, col4 = st.columns(4)
@@ -132,13 +150,24 @@ col1, col2 = st.columns(2)
 
 with col1:
     # Histogramme des retards
-    fig_hist = px.histogram(
-        df_filtered[df_filtered['delay_at_checkout_in_minutes'].notna()],
-        x='delay_at_checkout_in_minutes',
-        nbins=100,
-        title="Distribution des retards au checkout",
-        labels={'delay_at_checkout_in_minutes': 'Retard (minutes)', 'count': 'Nombre de locations'},
-        color_discrete_sequence=['indianred']
+    histogram = stats.delay_histogram(checkin_types, bin_width, clip_pct)
+    edges = histogram['edges']
+    fig_hist = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=histogram['counts'],
+        width=bin_width,
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        marker_color='indianred',
+        hovertemplate='<b>Retard</b>: %{customdata[0]:.0f} à %{customdata[1]:.0f} min<br>'
+                      '<b>Locations</b>: %{y:,}<extra></extra>'
+    ))
+    clipped = histogram['clipped_low'] + histogram['clipped_high']
+    fig_hist.update_layout(
+        title="Distribution des retards au checkout"
+              + (f" ({clipped:,} valeurs extrêmes dans les barres des bords)" if clipped else ""),
+        xaxis_title="Retard (minutes)",
+        yaxis_title="Nombre de locations",
+        bargap=0,
     )
     fig_hist.add_vline(x=0, line_dash="dash", line_color="black", annotation_text="À l'heure")
     fig_hist.update_layout(height=400, showlegend=False)
@@ -164,25 +193,8 @@ with col2:
 st.markdown("---")
 st.header("📱 Analyse par type de checkin")
 
-# Calculs par type
-checkin_stats = []
-for checkin_type in df_filtered['checkin_type'].dropna().unique():
-    subset = df_filtered[df_filtered['checkin_type'] == checkin_type]
-    late_count = (subset['delay_at_checkout_in_minutes'] > 0).sum()
-    late_pct_type = (late_count / len(subset) * 100) if len(subset) > 0 else 0
-    avg_delay_type = subset[subset['delay_at_checkout_in_minutes'] > 0]['delay_at_checkout_in_minutes'].mean() if late_count > 0 else 0
-    median_delay_type = subset[subset['delay_at_checkout_in_minutes'] > 0]['delay_at_checkout_in_minutes'].median() if late_count > 0 else 0
-
-    checkin_stats.append({
-        'Type': checkin_type,
-        'Total': len(subset),
-        'Retards': late_count,
-        'Pct_retards': late_pct_type,
-        'Retard_moyen': avg_delay_type,
-        'Retard_median': median_delay_type
-    })
-
-df_checkin = pd.DataFrame(checkin_stats)
+# Calculs par type (un seul groupby, mémorisé par filtre)
+df_checkin = stats.checkin_stats(checkin_types)
 
 col1, col2 = st.columns(2)
 
@@ -257,49 +269,35 @@ with col1:
     # Scope
     scope = st.radio(
         "Périmètre d'application",
-        options=["Tous les véhicules", "Uniquement Connect", "Uniquement Mobile"],
+        options=list(SCOPES),
         index=0,
         help="Choisir sur quels véhicules appliquer le seuil"
     )
 
 with col2:
-    # Calcul de l'impact
-    df_analysis = df_with_next_copy.copy()
-
-    # Appliquer le scope
-    if scope == "Uniquement Connect":
-        df_analysis = df_analysis[df_analysis['checkin_type'] == 'connect']
-    elif scope == "Uniquement Mobile":
-        df_analysis = df_analysis[df_analysis['checkin_type'] == 'mobile']
-
-    # Locations bloquées
-    blocked = df_analysis[df_analysis['time_delta_with_previous_rental_in_minutes'] < threshold]
-
-    # Problèmes résolus
-    total_problems_scope = df_analysis['is_problematic'].sum()
-    problems_solved = df_analysis[
-        (df_analysis['is_problematic']) &
-        (df_analysis['time_delta_with_previous_rental_in_minutes'] < threshold)
-    ]
+    # Calcul de l'impact : lecture dans la courbe cumulée du périmètre
+    curve = stats.threshold_curve(checkin_types, scope)
+    blocked, problems_solved = (int(n[0]) for n in curve.counts([threshold]))
+    total_problems_scope = curve.total_problems
 
     # Métriques
     col_a, col_b, col_c = st.columns(3)
 
     with col_a:
-        blocked_pct = (len(blocked) / len(df_analysis) * 100) if len(df_analysis) > 0 else 0
+        blocked_pct = (blocked / curve.total * 100) if curve.total > 0 else 0
         st.metric(
             "Locations bloquées",
-            f"{len(blocked):,}",
+            f"{blocked:,}",
             f"{blocked_pct:.1f}%",
             delta_color="inverse",
             help="Nombre de locations qui seraient refusées avec ce seuil"
         )
 
     with col_b:
-        solved_pct = (len(problems_solved) / total_problems_scope * 100) if total_problems_scope > 0 else 0
+        solved_pct = (problems_solved / total_problems_scope * 100) if total_problems_scope > 0 else 0
         st.metric(
             "Problèmes résolus",
-            f"{len(problems_solved):,}",
+            f"{problems_solved:,}",
             f"{solved_pct:.1f}%",
             help="Nombre de cas problématiques qui seraient évités"
         )
@@ -316,49 +314,52 @@ with col2:
 # Graphique comparatif
 st.subheader("Comparaison de différents seuils")
 
-# Générer les résultats pour différents seuils
+# Courbe complète à la minute (0-720) et seuils du tableau, lus dans le même moteur
 thresholds_to_test = [0, 30, 60, 120, 180, 240, 360, 480, 720]
-results = []
-
-for t in thresholds_to_test:
-    blocked_t = df_analysis[df_analysis['time_delta_with_previous_rental_in_minutes'] < t]
-    problems_t = df_analysis[
-        (df_analysis['is_problematic']) &
-        (df_analysis['time_delta_with_previous_rental_in_minutes'] < t)
-    ]
-
-    results.append({
-        'Seuil (min)': t,
-        'Seuil (h)': t/60,
-        'Locations bloquées (%)': (len(blocked_t)/len(df_analysis)*100) if len(df_analysis) > 0 else 0,
-        'Problèmes résolus (%)': (len(problems_t)/total_problems_scope*100) if total_problems_scope > 0 else 0,
-        'Locations bloquées': len(blocked_t),
-        'Problèmes résolus': len(problems_t)
-    })
-
-df_results = pd.DataFrame(results)
+df_curve = curve.curve()
+df_results = curve.table(thresholds_to_test)
 
 # Graphique Trade-off
 fig_tradeoff = go.Figure()
 
 fig_tradeoff.add_trace(go.Scatter(
-    x=df_results['Seuil (h)'],
-    y=df_results['Locations bloquées (%)'],
-    mode='lines+markers',
+    x=df_curve['Seuil (h)'],
+    y=df_curve['Locations bloquées (%)'],
+    mode='lines',
     name='Locations bloquées (%)',
+    legendgroup='Locations bloquées (%)',
     line=dict(color='red', width=3),
-    marker=dict(size=10),
-    hovertemplate='<b>Seuil</b>: %{x:.1f}h<br><b>Bloquées</b>: %{y:.1f}%<extra></extra>'
+    hovertemplate='<b>Seuil</b>: %{x:.2f}h<br><b>Bloquées</b>: %{y:.1f}%<extra></extra>'
 ))
-
+# Seuils du tableau détaillé
 fig_tradeoff.add_trace(go.Scatter(
     x=df_results['Seuil (h)'],
-    y=df_results['Problèmes résolus (%)'],
-    mode='lines+markers',
+    y=df_results['Locations bloquées (%)'],
+    mode='markers',
+    legendgroup='Locations bloquées (%)',
+    showlegend=False,
+    marker=dict(color='red', size=10),
+    hoverinfo='skip'
+))
+
+fig_tradeoff.add_trace(go.Scatter(
+    x=df_curve['Seuil (h)'],
+    y=df_curve['Problèmes résolus (%)'],
+    mode='lines',
     name='Problèmes résolus (%)',
+    legendgroup='Problèmes résolus (%)',
     line=dict(color='green', width=3),
-    marker=dict(size=10),
-    hovertemplate='<b>Seuil</b>: %{x:.1f}h<br><b>Résolus</b>: %{y:.1f}%<extra></extra>'
+    hovertemplate='<b>Seuil</b>: %{x:.2f}h<br><b>Résolus</b>: %{y:.1f}%<extra></extra>'
+))
+# Seuils du tableau détaillé
+fig_tradeoff.add_trace(go.Scatter(
+    x=df_results['Seuil (h)'],
+    y=df_results['Problèmes résolus (%)'],
+    mode='markers',
+    legendgroup='Problèmes résolus (%)',
+    showlegend=False,
+    marker=dict(color='green', size=10),
+    hoverinfo='skip'
 ))
 
 # Ligne verticale pour le seuil actuel
@@ -444,7 +445,7 @@ with st.expander("📋 Voir les données brutes"):
     st.dataframe(df_filtered.head(100), use_container_width=True)
 
     st.subheader("Statistiques descriptives")
-    st.dataframe(df_filtered.describe(), use_container_width=True)
+    st.dataframe(stats.describe(checkin_types), use_container_width=True)
 
 # ===== FOOTER =====
 st.markdown("---")
@@ -0,0 +1,107 @@
+"""
+⏱️ GetAround - Benchmark du chargement des données du dashboard
+Mesure, chacun dans un processus neuf, la durée de chargement et la mémoire
+(RSS) de l'ancien chargement (pd.read_excel) et du cache Arrow (premier
+chargement avec conversion, puis relecture mappée en mémoire), ainsi que le
+premier rendu complet de app.py (streamlit.testing)
+
+Usage :
+    python bench_data.py --repeat 3 --json data.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Code exécuté dans chaque processus : chargement puis mesures
+WORKER_CODE = r"""
+import json, resource, sys, time
+mode, cache_dir = sys.argv[1], sys.argv[2]
+errors = []
+started = time.perf_counter()
+if mode == 'excel':
+    import pandas as pd
+    df = pd.read_excel('../data/get_around_delay_analysis.xlsx')
+elif mode == 'app':
+    import os
+    os.environ['DATA_CACHE_DIR'] = cache_dir
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file('app.py', default_timeout=120).run()
+    # Exceptions affichées dans la page (ex. matplotlib absent pour background_gradient)
+    errors = [e.message for e in at.exception]
+    df = None
+else:
+    import data
+    df = data.load_delay_data(cache_dir=cache_dir)
+elapsed = time.perf_counter() - started
+
+rss_kb = 0
+with open('/proc/self/status') as f:
+    for line in f:
+        if line.startswith('VmRSS:'):
+            rss_kb = int(line.split()[1])
+print(json.dumps({
+    "mode": mode,
+    "load_s": elapsed,
+    "rss_mb": rss_kb / 1024,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "rows": None if df is None else len(df),
+    "frame_mb": None if df is None else df.memory_usage(deep=True).sum() / 1e6,
+    "errors": errors,
+}))
+"""
+
+# Modes mesurés : ancien chargement, cache vide, cache existant, page complète
+MODES = {
+    'excel': "pd.read_excel (avant)",
+    'arrow_cold': "cache Arrow, 1er chargement",
+    'arrow_warm': "cache Arrow mappé",
+    'app': "app.py, 1er rendu (cache mappé)",
+}
+
+
+def run(mode, cache_dir):
+    output = subprocess.run(
+        [sys.executable, '-c', WORKER_CODE, mode, cache_dir],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chargement des données du dashboard : Excel vs cache Arrow")
+    parser.add_argument('--repeat', type=int, default=3, help="mesures par mode (meilleure durée retenue)")
+    parser.add_argument('--json', dest='json_path', help="écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in MODES:
+            runs = []
+            for i in range(args.repeat):
+                # 1er chargement : un cache vide par mesure ; sinon le cache commun, déjà rempli
+                cache_dir = os.path.join(directory, f'cold-{i}') if mode == 'arrow_cold' else directory
+                if mode in ('arrow_warm', 'app') and not runs:
+                    run('arrow_cold', cache_dir)
+                runs.append(run(mode, cache_dir))
+            best = min(runs, key=lambda r: r['load_s'])
+            results.append(best)
+
+    print(f"\n{'Mode':<34} {'Durée (s)':>10} {'RSS (Mo)':>9} {'Pic RSS (Mo)':>13} {'DataFrame (Mo)':>15}")
+    for r in results:
+        frame = f"{r['frame_mb']:.2f}" if r['frame_mb'] is not None else '-'
+        print(f"{MODES[r['mode']]:<34} {r['load_s']:>10.3f} {r['rss_mb']:>9.1f} {r['peak_rss_mb']:>13.1f} {frame:>15}")
+        for error in r['errors']:
+            print(f"   ⚠️ {error}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+📦 GetAround - Couche de données du dashboard
+Convertit les sources (Excel, CSV) en un cache Arrow typé (identifiants
+int32, types de checkin et états en catégories) au premier chargement, puis
+le relit par mémoire mappée aux démarrages suivants : plus de parsing Excel
+après un déploiement, et les pages sont partagées entre les processus.
+"""
+
+import glob
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+# ===== CONFIGURATION =====
+# Sources concaténées dans l'ordre (chemins ou motifs glob, séparés par des virgules) :
+# l'Excel d'origine, puis les exports CSV ajoutés au fil du temps
+DATA_SOURCES = os.getenv('DATA_SOURCES', '../data/get_around_delay_analysis.xlsx,../data/delays/*.csv')
+CACHE_DIR = os.getenv('DATA_CACHE_DIR', '.data_cache')
+
+# Version du format du cache : à incrémenter quand SCHEMA ou la conversion changent
+CACHE_VERSION = 1
+
+# Types des colonnes dans le cache
+SCHEMA = pa.schema([
+    ('rental_id', pa.int32()),
+    ('car_id', pa.int32()),
+    ('checkin_type', pa.dictionary(pa.int8(), pa.string())),
+    ('state', pa.dictionary(pa.int8(), pa.string())),
+    ('delay_at_checkout_in_minutes', pa.float64()),
+    ('previous_ended_rental_id', pa.int32()),
+    ('time_delta_with_previous_rental_in_minutes', pa.float64()),
+])
+
+
+def source_paths(sources=DATA_SOURCES):
+    """Fichiers sources existants, dans l'ordre de DATA_SOURCES (motifs triés)"""
+    paths = []
+    for pattern in filter(None, (s.strip() for s in sources.split(','))):
+        paths.extend(sorted(glob.glob(pattern)) if any(c in pattern for c in '*?[') else [pattern])
+    return [path for path in paths if os.path.exists(path)]
+
+
+def cache_key(path):
+    """
+    Clé d'un fichier source : chemin absolu, taille et date de modification
+
+    Évite de relire la source pour savoir si le cache est à jour ; toute
+    modification (nouveau dépôt, réécriture) change la clé.
+    """
+    stat = os.stat(path)
+    raw = f"{CACHE_VERSION}:{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def read_source(path):
+    """Lit une source Excel ou CSV et la convertit au SCHEMA du cache"""
+    if path.endswith(('.xlsx', '.xls')):
+        table = pa.Table.from_pandas(pd.read_excel(path), preserve_index=False)
+    else:
+        table = pa_csv.read_csv(path)
+    columns = []
+    for field in SCHEMA:
+        column = table.column(field.name)
+        if pa.types.is_dictionary(field.type):
+            column = column.cast(pa.string()).dictionary_encode().cast(field.type)
+        else:
+            # Identifiants lus en float64 (à cause des valeurs manquantes) : conversion exacte
+            column = column.cast(field.type, safe=True)
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=SCHEMA)
+
+
+def cached_table(path, cache_dir=CACHE_DIR):
+    """
+    Table Arrow d'une source, mappée en mémoire depuis le cache
+
+    Au premier appel (ou si la source a changé), la source est convertie et
+    écrite au format IPC Arrow non compressé, lisible sans copie.
+    """
+    cache_path = os.path.join(cache_dir, f"{os.path.basename(path)}-{cache_key(path)}.arrow")
+    if not os.path.exists(cache_path):
+        table = read_source(path)
+        os.makedirs(cache_dir, exist_ok=True)
+        # Écriture atomique : un autre worker ne lit jamais un fichier partiel
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, cache_path)
+    return pa.ipc.open_file(pa.memory_map(cache_path, 'r')).read_all()
+
+
+def rental_positions(rental_id):
+    """
+    Index dense rental_id → position (-1 si absent)
+
+    Les identifiants sont des entiers quasi contigus (500001..521310 dans l'export actuel) : un tableau
+    indexé par `rental_id - min` remplace une table de hachage ou un merge.
+    """
+    rental_id = np.asarray(rental_id, dtype=np.int64)
+    first = rental_id.min() if len(rental_id) else 0
+    positions = np.full(rental_id.max() - first + 1 if len(rental_id) else 0, -1, dtype=np.int32)
+    positions[rental_id - first] = np.arange(len(rental_id), dtype=np.int32)
+    return positions, first
+
+
+def previous_delay(df):
+    """
+    Retard au checkout de la location précédente (previous_ended_rental_id)
+
+    Une seule passe vectorisée via rental_positions ; NaN quand il n'y a pas
+    de location précédente, qu'elle n'est pas dans les données ou que son
+    retard est inconnu.
+    """
+    positions, first = rental_positions(df['rental_id'].to_numpy())
+    previous = df['previous_ended_rental_id'].to_numpy(dtype=np.float64)
+    delay = df['delay_at_checkout_in_minutes'].to_numpy(dtype=np.float64)
+    result = np.full(len(df), np.nan)
+
+    offset = previous - first
+    valid = ~np.isnan(offset)
+    valid[valid] = (offset[valid] >= 0) & (offset[valid] < len(positions))
+    position = np.full(len(df), -1, dtype=np.int64)
+    position[valid] = positions[offset[valid].astype(np.int64)]
+    found = position >= 0
+    result[found] = delay[position[found]]
+    return result
+
+
+def load_delay_data(sources=DATA_SOURCES, cache_dir=CACHE_DIR):
+    """
+    DataFrame des locations de toutes les sources
+
+    Colonnes numériques converties sans passer par des objets Python (vues
+    des pages mappées quand elles n'ont pas de valeurs manquantes),
+    catégories en pd.Categorical ; `previous_ended_rental_id` redevient
+    float64 (NaN pour les valeurs manquantes), comme avec pd.read_excel.
+    Ajoute `previous_delay_at_checkout_in_minutes` (voir previous_delay),
+    calculée sur toutes les sources réunies : la location précédente peut
+    venir d'un autre fichier.
+
+    Lève FileNotFoundError si aucune source n'existe.
+    """
+    paths = source_paths(sources)
+    if not paths:
+        raise FileNotFoundError(f"Aucune source de données trouvée : {sources}")
+    table = pa.concat_tables([cached_table(path, cache_dir) for path in paths])
+    df = table.to_pandas(split_blocks=True)
+    df['previous_delay_at_checkout_in_minutes'] = previous_delay(df)
+    return df
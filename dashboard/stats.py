@@ -0,0 +1,157 @@
+"""
+📐 GetAround - Agrégats du dashboard
+Toutes les statistiques affichées par app.py, calculées sans Streamlit et
+mémorisées par sélection (types de checkin filtrés, périmètre du
+simulateur) : un rerun avec une sélection déjà vue ne recalcule rien.
+"""
+
+import numpy as np
+
+from thresholds import ThresholdCurve
+
+# Type de checkin de chaque périmètre du simulateur (None : tous les véhicules)
+SCOPES = {
+    "Tous les véhicules": None,
+    "Uniquement Connect": 'connect',
+    "Uniquement Mobile": 'mobile',
+}
+
+DELAY = 'delay_at_checkout_in_minutes'
+TIME_DELTA = 'time_delta_with_previous_rental_in_minutes'
+PREVIOUS_DELAY = 'previous_delay_at_checkout_in_minutes'
+
+# Histogramme des retards : largeur des barres (minutes) et part des valeurs
+# extrêmes (en %, de chaque côté) regroupées dans les barres des bords
+HISTOGRAM_BIN_WIDTH = 30
+HISTOGRAM_CLIP_PCT = 1.0
+
+
+def overview(df):
+    """Métriques de la vue d'ensemble (dict de scalaires)"""
+    delay = df[DELAY].to_numpy(dtype=np.float64)
+    late = delay > 0
+    has_previous = df[TIME_DELTA].notna().to_numpy()
+    previous_delay = df[PREVIOUS_DELAY].to_numpy(dtype=np.float64)
+    time_delta = df[TIME_DELTA].to_numpy(dtype=np.float64)
+    # Cas problématiques : le retard de la location précédente dépasse le délai entre les deux
+    problematic = has_previous & (previous_delay > 0) & (previous_delay > time_delta)
+
+    total_rentals, late_rentals = len(df), int(late.sum())
+    consecutive, total_problems = int(has_previous.sum()), int(problematic.sum())
+    return {
+        'total_rentals': total_rentals,
+        'late_rentals': late_rentals,
+        'late_pct': late_rentals / total_rentals * 100 if total_rentals > 0 else 0,
+        'avg_delay': float(delay[late].mean()) if late_rentals > 0 else np.nan,
+        'consecutive': consecutive,
+        'total_problems': total_problems,
+        'problem_pct': total_problems / consecutive * 100 if consecutive > 0 else 0,
+    }
+
+
+def checkin_stats(df):
+    """
+    Tableau récapitulatif par type de checkin, en un seul groupby
+
+    Retard moyen et médian calculés sur les locations en retard (0 pour un
+    type sans retard), types dans l'ordre d'apparition.
+    """
+    late = df[DELAY].where(df[DELAY] > 0)
+    grouped = late.groupby(df['checkin_type'], observed=True, sort=False).agg(['size', 'count', 'mean', 'median'])
+    result = grouped.reset_index().rename(columns={
+        'checkin_type': 'Type',
+        'size': 'Total',
+        'count': 'Retards',
+        'mean': 'Retard_moyen',
+        'median': 'Retard_median',
+    })
+    result['Type'] = result['Type'].astype(str)
+    result.insert(3, 'Pct_retards', result['Retards'] / result['Total'] * 100)
+    return result.fillna({'Retard_moyen': 0, 'Retard_median': 0})
+
+
+def delay_histogram(df, bin_width=HISTOGRAM_BIN_WIDTH, clip_pct=HISTOGRAM_CLIP_PCT):
+    """
+    Histogramme des retards au checkout, calculé côté serveur
+
+    Bornes alignées sur des multiples de `bin_width` (0 est toujours une
+    borne) et couvrant les percentiles clip_pct / 100 - clip_pct ; les
+    valeurs au-delà sont comptées dans la première ou la dernière barre.
+    Renvoie un dict : `edges` (n + 1 bornes), `counts` (n), `clipped_low`
+    et `clipped_high` (nombre de valeurs regroupées). Sa taille ne dépend
+    que de l'étendue retenue et de bin_width, pas du nombre de locations.
+    """
+    delay = df[DELAY].to_numpy(dtype=np.float64)
+    delay = delay[~np.isnan(delay)]
+    if len(delay) == 0:
+        return {'edges': np.zeros(1), 'counts': np.zeros(0, dtype=np.int64), 'clipped_low': 0, 'clipped_high': 0}
+
+    low, high = np.percentile(delay, [clip_pct, 100 - clip_pct]) if clip_pct > 0 else (delay.min(), delay.max())
+    low = np.floor(low / bin_width) * bin_width
+    high = max(np.ceil(high / bin_width) * bin_width, low + bin_width)
+    edges = np.arange(low, high + bin_width / 2, bin_width)
+    # np.histogram : la dernière barre inclut sa borne haute, où tombent les valeurs écrêtées
+    counts, _ = np.histogram(np.clip(delay, low, high), bins=edges)
+    return {
+        'edges': edges,
+        'counts': counts,
+        'clipped_low': int((delay < low).sum()),
+        'clipped_high': int((delay > high).sum()),
+    }
+
+
+class DelayStats:
+    """
+    Agrégats d'un DataFrame de locations, mémorisés par sélection
+
+    Le DataFrame n'est jamais modifié ; les résultats renvoyés sont partagés
+    entre les appels (et les sessions) et ne doivent pas l'être non plus.
+    Le nombre de sélections possibles est petit (sous-ensembles des types de
+    checkin × périmètres) : le cache n'est pas borné.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._cache = {}
+
+    def _memoize(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    @staticmethod
+    def _key(checkin_types):
+        # Sélection vide = pas de filtre, comme dans la sidebar
+        return tuple(sorted(checkin_types or ()))
+
+    def rentals(self, checkin_types):
+        """Locations des types de checkin sélectionnés (toutes si la sélection est vide)"""
+        key = self._key(checkin_types)
+        return self._memoize(
+            ('rentals', key),
+            lambda: self.df[self.df['checkin_type'].isin(key)] if key else self.df,
+        )
+
+    def overview(self, checkin_types):
+        return self._memoize(('overview', self._key(checkin_types)), lambda: overview(self.rentals(checkin_types)))
+
+    def checkin_stats(self, checkin_types):
+        return self._memoize(('checkin', self._key(checkin_types)), lambda: checkin_stats(self.rentals(checkin_types)))
+
+    def describe(self, checkin_types):
+        return self._memoize(('describe', self._key(checkin_types)), lambda: self.rentals(checkin_types).describe())
+
+    def delay_histogram(self, checkin_types, bin_width=HISTOGRAM_BIN_WIDTH, clip_pct=HISTOGRAM_CLIP_PCT):
+        return self._memoize(
+            ('histogram', self._key(checkin_types), bin_width, clip_pct),
+            lambda: delay_histogram(self.rentals(checkin_types), bin_width, clip_pct),
+        )
+
+    def threshold_curve(self, checkin_types, scope):
+        """Moteur de seuils des locations sélectionnées, restreint au périmètre"""
+        def compute():
+            subset = self.rentals(checkin_types)
+            if SCOPES[scope] is not None:
+                subset = subset[subset['checkin_type'] == SCOPES[scope]]
+            return ThresholdCurve.from_frame(subset)
+        return self._memoize(('threshold_curve', self._key(checkin_types), scope), compute)
@@ -0,0 +1,64 @@
+"""
+🎯 GetAround - Moteur de courbe des seuils
+Trie une seule fois les délais avec la location précédente d'un périmètre et
+cumule les cas problématiques dans cet ordre : le nombre de locations
+bloquées et de problèmes résolus pour n'importe quel seuil se lit ensuite par
+np.searchsorted, et toute la courbe (0-720 min, à la minute) en un seul appel.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Plage de la courbe complète (minutes)
+MAX_THRESHOLD = 720
+
+
+class ThresholdCurve:
+    """
+    Locations bloquées et problèmes résolus en fonction du seuil minimum
+
+    Une location est bloquée par un seuil t quand son délai avec la location
+    précédente est < t ; un problème est résolu quand la location bloquée
+    était problématique (retard au checkout de la location précédente
+    supérieur à ce délai, voir data.previous_delay).
+    """
+
+    def __init__(self, time_delta, is_problematic):
+        time_delta = np.asarray(time_delta, dtype=np.float64)
+        order = np.argsort(time_delta, kind='stable')
+        self.time_delta = time_delta[order]
+        # cumulative[i] : problèmes parmi les i plus petits délais
+        self.cumulative = np.concatenate([[0], np.cumsum(np.asarray(is_problematic, dtype=bool)[order])])
+        self.total = len(self.time_delta)
+        self.total_problems = int(self.cumulative[-1])
+
+    @classmethod
+    def from_frame(cls, df):
+        """Courbe des locations de df ayant une location précédente"""
+        df = df[df['time_delta_with_previous_rental_in_minutes'].notna()]
+        delta = df['time_delta_with_previous_rental_in_minutes'].to_numpy(dtype=np.float64)
+        delay = df['previous_delay_at_checkout_in_minutes'].to_numpy(dtype=np.float64)
+        # NaN > x vaut False : retard précédent inconnu = pas de problème
+        return cls(delta, (delay > 0) & (delay > delta))
+
+    def counts(self, thresholds):
+        """(bloquées, résolus) pour chaque seuil : tableaux d'entiers"""
+        blocked = np.searchsorted(self.time_delta, np.asarray(thresholds, dtype=np.float64), side='left')
+        return blocked, self.cumulative[blocked]
+
+    def table(self, thresholds):
+        """DataFrame du comparatif des seuils (mêmes colonnes que le tableau du dashboard)"""
+        thresholds = np.asarray(thresholds)
+        blocked, solved = self.counts(thresholds)
+        return pd.DataFrame({
+            'Seuil (min)': thresholds,
+            'Seuil (h)': thresholds / 60,
+            'Locations bloquées (%)': blocked / self.total * 100 if self.total else np.zeros(len(thresholds)),
+            'Problèmes résolus (%)': solved / self.total_problems * 100 if self.total_problems else np.zeros(len(thresholds)),
+            'Locations bloquées': blocked,
+            'Problèmes résolus': solved,
+        })
+
+    def curve(self, max_threshold=MAX_THRESHOLD, step=1):
+        """Courbe complète, de 0 à max_threshold minutes inclus"""
+        return self.table(np.arange(0, max_threshold + 1, step))